@@ -0,0 +1,64 @@
+"""
+Benchmark map_speakers on over-segmented hypotheses against a single dense solve.
+
+Usage:
+    python -m benchmarks.bench_mapping [--ref-speakers N] [--clusters 500,1000,...]
+"""
+import argparse
+import random
+import time
+
+from mdeval.scoring import _map_dense, map_speakers
+
+DEFAULT_CLUSTERS = [100, 500, 1000, 2000]
+
+
+def over_segmented_overlap(n_ref, n_sys, rng):
+    # Every SYS cluster is a fragment of one REF speaker that bleeds into up
+    # to two others at its boundaries.
+    overlap = {f"ref{r}": {} for r in range(n_ref)}
+    for s in range(n_sys):
+        owner = rng.randrange(n_ref)
+        overlap[f"ref{owner}"][f"sys{s}"] = rng.uniform(5.0, 60.0)
+        for _ in range(rng.randrange(3)):
+            other = rng.randrange(n_ref)
+            row = overlap[f"ref{other}"]
+            row[f"sys{s}"] = row.get(f"sys{s}", 0.0) + rng.uniform(0.1, 2.0)
+    return overlap
+
+
+def mapped_overlap(overlap, mapping):
+    return sum(overlap[r].get(s, 0.0) for r, s in mapping.items())
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ref-speakers', type=int, default=20)
+    parser.add_argument('--clusters', default=','.join(map(str, DEFAULT_CLUSTERS)),
+                        help='Comma-separated SYS cluster counts')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'ref':>5} {'sys':>6} {'dense s':>9} {'mapped s':>9} {'speedup':>8}")
+    for n_sys in (int(c) for c in args.clusters.split(',')):
+        for n_ref, label in ((args.ref_speakers, 'over-segmented'), (n_sys, 'equal counts')):
+            overlap = over_segmented_overlap(n_ref, n_sys, rng)
+            refs = sorted(overlap)
+            syss = sorted({s for row in overlap.values() for s in row})
+            dense, dense_time = timed(_map_dense, refs, syss, overlap)
+            mapping, map_time = timed(map_speakers, overlap)
+            # Equal optima may pick different pairs, but never a different total.
+            assert abs(mapped_overlap(overlap, dense) - mapped_overlap(overlap, mapping)) < 1e-6
+            print(f"{n_ref:>5} {n_sys:>6} {dense_time:>9.4f} {map_time:>9.4f} "
+                  f"{dense_time / map_time:>7.1f}x  {label}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark linear_sum_assignment scaling on random overlap-like matrices.
+
+Usage:
+    python -m benchmarks.bench_munkres [--sizes 5,10,...] [--repeat N]
+"""
+import argparse
+import random
+import time
+
+from mdeval import munkres
+from mdeval.munkres import linear_sum_assignment
+
+DEFAULT_SIZES = [5, 10, 20, 50, 100, 200, 500, 1000, 2000]
+
+
+def random_cost_matrix(n_rows, n_cols, rng):
+    # Sparse negative overlaps, as produced by map_speakers.
+    return [[-rng.random() * 100.0 if rng.random() < 0.2 else 0.0
+             for _ in range(n_cols)] for _ in range(n_rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated square matrix sizes')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per size')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"numpy acceleration: {'on' if munkres.np is not None else 'off'}")
+    print(f"{'size':>6} {'seconds':>10}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        best = float('inf')
+        for _ in range(args.repeat):
+            cost = random_cost_matrix(size, size, rng)
+            start = time.perf_counter()
+            linear_sum_assignment(cost)
+            best = min(best, time.perf_counter() - start)
+        print(f"{size:>6} {best:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark RTTM parsing throughput: load_rttm versus load_rttm_fast.
+
+Usage:
+    python -m benchmarks.bench_parse [--lines 10000000] [--skip-baseline]
+
+The synthetic RTTM is written to a temporary file. Note that load_rttm keeps a
+dict per row, so the baseline needs several GB of memory at 10M lines.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from mdeval import io
+from mdeval.io import load_rttm, load_rttm_fast
+
+
+def write_synthetic_rttm(path, n_lines, n_files=1000, seed=0):
+    rng = random.Random(seed)
+    lines_per_file = max(1, n_lines // n_files)
+    with open(path, 'w') as f:
+        written = 0
+        file_idx = 0
+        while written < n_lines:
+            t = 0.0
+            for _ in range(min(lines_per_file, n_lines - written)):
+                dur = rng.uniform(0.2, 5.0)
+                f.write(f"SPEAKER rec{file_idx:05d} 1 {t:.3f} {dur:.3f} <NA> <NA> spk{rng.randrange(8)} <NA> <NA>\n")
+                t += rng.uniform(0.0, 4.0)
+                written += 1
+            file_idx += 1
+
+
+def timed(label, fn, n_lines):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>22}: {elapsed:8.2f} s  {n_lines / elapsed:12,.0f} lines/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=10000000)
+    parser.add_argument('--skip-baseline', action='store_true', help='Do not run load_rttm')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.rttm')
+    os.close(fd)
+    try:
+        write_synthetic_rttm(path, args.lines)
+        print(f"{args.lines:,} lines, {os.path.getsize(path) / 2**20:.0f} MiB")
+        if not args.skip_baseline:
+            timed('load_rttm', lambda: load_rttm(path), args.lines)
+        timed('load_rttm(columnar)', lambda: load_rttm(path, columnar=True), args.lines)
+        timed('load_rttm_fast', lambda: load_rttm_fast(path, use_numpy=False), args.lines)
+        if io.np is not None:
+            timed('load_rttm_fast(numpy)', lambda: load_rttm_fast(path, use_numpy=True), args.lines)
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
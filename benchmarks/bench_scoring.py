@@ -0,0 +1,61 @@
+"""
+Benchmark score_speaker_diarization backends on a long synthetic meeting.
+
+Usage:
+    python -m benchmarks.bench_scoring [--hours 10] [--segments 20000]
+"""
+import argparse
+import random
+import time
+
+from mdeval import scoring
+from mdeval.scoring import score_speaker_diarization
+from mdeval.segments import SegmentTable
+from mdeval.utils import Segment
+
+
+def synthetic_meeting(rng, duration, n_segs, n_spkrs, prefix):
+    data = {}
+    for _ in range(n_segs):
+        spkr = f"{prefix}{rng.randrange(n_spkrs)}"
+        tbeg = round(rng.uniform(0, duration), 2)
+        tdur = round(rng.uniform(0.2, 4.0), 2)
+        data.setdefault(spkr, []).append({'TBEG': tbeg, 'TDUR': tdur, 'TEND': tbeg + tdur})
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hours', type=float, default=10.0)
+    parser.add_argument('--segments', type=int, default=20000, help='Segments per side')
+    parser.add_argument('--speakers', type=int, default=8)
+    parser.add_argument('--collar', type=float, default=0.25)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    duration = args.hours * 3600
+    ref = synthetic_meeting(rng, duration, args.segments, args.speakers, 'ref')
+    hyp = synthetic_meeting(rng, duration, args.segments, args.speakers * 2, 'sys')
+    uem = [Segment(0.0, duration)]
+
+    ref_table = SegmentTable.from_speaker_dict(ref)
+    hyp_table = SegmentTable.from_speaker_dict(hyp)
+
+    runs = [('python', 'python', ref, hyp), ('python+table', 'python', ref_table, hyp_table)]
+    if scoring.numpy_scoring is not None:
+        runs += [('numpy', 'numpy', ref, hyp), ('numpy+table', 'numpy', ref_table, hyp_table)]
+    timings = {}
+    for name, backend, ref_data, hyp_data in runs:
+        start = time.perf_counter()
+        stats, _ = score_speaker_diarization('bench', '1', ref_data, hyp_data, uem, args.collar, False, backend=backend)
+        timings[name] = time.perf_counter() - start
+        der = (stats['MISSED_SPEAKER'] + stats['FALARM_SPEAKER'] + stats['SPEAKER_ERROR']) / stats['SCORED_SPEAKER']
+        print(f"{name:>12}: {timings[name]:8.3f} s  DER={100 * der:.4f}%")
+    for name in timings:
+        if name != 'python':
+            print(f"{name:>12} speedup: {timings['python'] / timings[name]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Deterministic synthetic diarization corpora.
+
+`synthetic_recording` draws one recording's REF and SYS speaker segments:
+
+- REF is a sequence of speaker turns. With probability `overlap_ratio` a turn
+  starts before the previous one ends, so overlap_ratio roughly controls the
+  share of turns that overlap.
+- SYS follows REF with jittered boundaries, a few missed and false alarm
+  segments and some speaker confusion. Every REF turn is cut into about
+  `over_segmentation` pieces, and the pieces are spread over
+  `over_segmentation` clusters per REF speaker, as an over-clustering
+  system would produce.
+
+`write_corpus` writes `n_files` such recordings as ref.rttm, sys.rttm and
+all.uem. The same arguments always give the same files.
+
+Usage:
+    python -m benchmarks.corpus OUT_DIR [--files 20] [--minutes 30] ...
+"""
+import argparse
+import os
+import random
+from typing import Dict, List, Tuple
+
+Recording = Dict[str, List[Dict[str, float]]]
+
+
+def _add(data: Recording, spkr: str, tbeg: float, tend: float):
+    tbeg = round(tbeg, 3)
+    tend = round(tend, 3)
+    if tend > tbeg:
+        data.setdefault(spkr, []).append({'TBEG': tbeg, 'TDUR': round(tend - tbeg, 3), 'TEND': tend})
+
+
+def synthetic_recording(rng: random.Random, duration: float, n_speakers: int = 4,
+                        overlap_ratio: float = 0.1, over_segmentation: float = 1.0) -> Tuple[Recording, Recording]:
+    """Return ({ref spkr: segments}, {sys spkr: segments}) of one recording."""
+    turns = []
+    t = 0.0
+    prev = None
+    while t < duration:
+        spkr = rng.randrange(n_speakers)
+        if spkr == prev and n_speakers > 1:
+            spkr = (spkr + 1) % n_speakers
+        length = rng.uniform(1.0, 8.0)
+        end = min(t + length, duration)
+        turns.append((spkr, t, end))
+        prev = spkr
+        if rng.random() < overlap_ratio:
+            t = end - rng.uniform(0.1, 0.5) * (end - t)
+        else:
+            t = end + rng.uniform(0.0, 1.0)
+
+    ref = {}
+    sys = {}
+    clusters = max(1, int(round(over_segmentation)))
+    for spkr, tbeg, tend in turns:
+        _add(ref, f"spk{spkr}", tbeg, tend)
+        if rng.random() < 0.05:
+            continue # missed turn
+        n_pieces = max(1, int(over_segmentation) + (rng.random() < over_segmentation % 1))
+        cuts = sorted(rng.uniform(tbeg, tend) for _ in range(n_pieces - 1))
+        bounds = [tbeg + rng.uniform(-0.2, 0.2)] + cuts + [tend + rng.uniform(-0.2, 0.2)]
+        for k in range(n_pieces):
+            owner = spkr if rng.random() > 0.1 else rng.randrange(n_speakers)
+            _add(sys, f"sys{owner * clusters + rng.randrange(clusters)}", max(bounds[k], 0.0), bounds[k + 1])
+    for _ in range(len(turns) // 20):
+        tbeg = rng.uniform(0.0, duration)
+        _add(sys, f"sys{rng.randrange(n_speakers * clusters)}", tbeg, min(tbeg + rng.uniform(0.2, 2.0), duration))
+    return ref, sys
+
+
+def write_corpus(out_dir: str, n_files: int = 20, duration: float = 1800.0, n_speakers: int = 4,
+                 overlap_ratio: float = 0.1, over_segmentation: float = 1.0, seed: int = 0) -> Dict[str, str]:
+    """Write ref.rttm, sys.rttm and all.uem to out_dir and return their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, name) for name in ('ref.rttm', 'sys.rttm', 'all.uem')}
+    rng = random.Random(seed)
+    with open(paths['ref.rttm'], 'w') as ref_f, open(paths['sys.rttm'], 'w') as sys_f, \
+            open(paths['all.uem'], 'w') as uem_f:
+        for i in range(n_files):
+            file = f"rec{i:04d}"
+            ref, sys = synthetic_recording(rng, duration, n_speakers, overlap_ratio, over_segmentation)
+            for f, data in ((ref_f, ref), (sys_f, sys)):
+                for spkr, segs in data.items():
+                    for seg in segs:
+                        f.write(f"SPEAKER {file} 1 {seg['TBEG']:.3f} {seg['TDUR']:.3f} <NA> <NA> {spkr} <NA> <NA>\n")
+            uem_f.write(f"{file} 1 0.000 {duration:.3f}\n")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--minutes', type=float, default=30.0, help='Length of every recording')
+    parser.add_argument('--speakers', type=int, default=4)
+    parser.add_argument('--overlap', type=float, default=0.1, help='Share of REF turns that overlap the previous one')
+    parser.add_argument('--over-segmentation', type=float, default=1.0, help='SYS pieces and clusters per REF turn and speaker')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    paths = write_corpus(args.out_dir, args.files, args.minutes * 60, args.speakers, args.overlap,
+                         args.over_segmentation, args.seed)
+    for path in paths.values():
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""
+Timed benchmark scenarios over a synthetic corpus, with baseline comparison.
+
+Usage:
+    python -m benchmarks.suite [--files 20] [--minutes 30] [--speakers 4]
+                               [--overlap 0.1] [--over-segmentation 1.0]
+                               [--scenarios score_python,cli] [--repeat 3]
+                               [--save-baseline base.json] [--baseline base.json]
+                               [--threshold 0.2]
+
+A corpus is generated with benchmarks.corpus (deterministic for given knobs).
+Each scenario then runs in its own process, so its peak RSS is its own, and
+reports the best wall time of --repeat runs, its throughput and the peak RSS.
+With --baseline, scenarios slower than the baseline by more than --threshold
+(a fraction) are flagged and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import write_corpus
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# name: (setup function, throughput unit); filled in by @scenario
+SCENARIOS = {}
+
+
+def scenario(name, unit):
+    def register(setup):
+        SCENARIOS[name] = (setup, unit)
+        return setup
+    return register
+
+
+class Workload:
+    """Corpus files and the parsed recordings shared by the scenarios."""
+
+    def __init__(self, corpus_dir):
+        self.ref_path = os.path.join(corpus_dir, 'ref.rttm')
+        self.sys_path = os.path.join(corpus_dir, 'sys.rttm')
+        self.uem_path = os.path.join(corpus_dir, 'all.uem')
+        self._recordings = None
+
+    def lines(self, path):
+        with open(path, 'rb') as f:
+            return sum(1 for _ in f)
+
+    @property
+    def recordings(self):
+        """[(file, ref SegmentTable, sys SegmentTable, uem)] sorted by file."""
+        if self._recordings is None:
+            from mdeval.io import load_rttm_fast, load_uem
+            ref = load_rttm_fast(self.ref_path)
+            hyp = load_rttm_fast(self.sys_path)
+            uem = load_uem(self.uem_path)
+            self._recordings = [(file, ref[file]['1']['SPEAKER'], hyp[file]['1']['SPEAKER'], uem[file]['1'])
+                                for file in sorted(ref) if file in hyp]
+        return self._recordings
+
+    @property
+    def hours(self):
+        return sum(s.tdur for _, _, _, uem in self.recordings for s in uem) / 3600
+
+    def segments(self, side=1):
+        return sum(len(rec[side]) for rec in self.recordings)
+
+
+@scenario('load_rttm', 'lines/s')
+def _load_rttm(w):
+    from mdeval.io import load_rttm
+    return lambda: load_rttm(w.sys_path), w.lines(w.sys_path)
+
+
+@scenario('load_rttm_fast', 'lines/s')
+def _load_rttm_fast(w):
+    from mdeval.io import load_rttm_fast
+    return lambda: load_rttm_fast(w.sys_path), w.lines(w.sys_path)
+
+
+@scenario('exclusion_and_collars', 'segments/s')
+def _exclusion(w):
+    from mdeval.scoring import apply_collars, exclude_overlapping_speech
+    def run():
+        for _, ref, _, uem in w.recordings:
+            apply_collars(exclude_overlapping_speech(uem, ref), ref, 0.25)
+    return run, w.segments(1)
+
+
+@scenario('create_speaker_segs', 'segments/s')
+def _create_speaker_segs(w):
+    from mdeval.scoring import create_speaker_segs
+    def run():
+        for _, ref, hyp, uem in w.recordings:
+            create_speaker_segs(uem, ref, hyp)
+    return run, w.segments(1) + w.segments(2)
+
+
+def _overlaps(w):
+    from mdeval.scoring import _Accumulator, new_stats, sweep_partition
+    from mdeval.segments import speaker_names
+    overlaps = []
+    for _, ref, hyp, uem in w.recordings:
+        acc = _Accumulator(new_stats(), speaker_names(ref), speaker_names(hyp))
+        sweep_partition(uem, ref, hyp, 0.0, False, acc)
+        overlaps.append(acc.overlap.to_dict())
+    return overlaps
+
+
+@scenario('map_speakers', 'matrices/s')
+def _map_speakers(w):
+    from mdeval.scoring import map_speakers
+    overlaps = _overlaps(w)
+    return lambda: [map_speakers(o) for o in overlaps], len(overlaps)
+
+
+@scenario('linear_sum_assignment', 'matrices/s')
+def _linear_sum_assignment(w):
+    from mdeval.munkres import linear_sum_assignment
+    costs = []
+    for overlap in _overlaps(w):
+        syss = sorted({s for row in overlap.values() for s in row})
+        costs.append([[-row.get(s, 0.0) for s in syss] for row in overlap.values()])
+    return lambda: [linear_sum_assignment(c) for c in costs if c and c[0]], len(costs)
+
+
+def _scoring(w, backend):
+    from mdeval.scoring import score_speaker_diarization
+    def run():
+        for file, ref, hyp, uem in w.recordings:
+            score_speaker_diarization(file, '1', ref, hyp, uem, 0.25, False, backend)
+    return run, w.hours
+
+
+@scenario('score_python', 'audio h/s')
+def _score_python(w):
+    return _scoring(w, 'python')
+
+
+@scenario('score_numpy', 'audio h/s')
+def _score_numpy(w):
+    from mdeval import scoring
+    if scoring.numpy_scoring is None:
+        return None
+    return _scoring(w, 'numpy')
+
+
+@scenario('score_systems', 'audio h/s')
+def _score_systems(w):
+    from mdeval.scoring import score_systems
+    def run():
+        for file, ref, hyp, uem in w.recordings:
+            score_systems(file, '1', ref, [hyp, hyp, hyp], uem, 0.25)
+    return run, 3 * w.hours
+
+
+@scenario('score_settings', 'audio h/s')
+def _score_settings(w):
+    from mdeval.scoring import score_settings
+    settings = [(0.0, False), (0.25, False), (0.5, False), (0.25, True)]
+    def run():
+        for file, ref, hyp, uem in w.recordings:
+            score_settings(file, '1', ref, hyp, uem, settings)
+    return run, len(settings) * w.hours
+
+
+@scenario('cli', 'audio h/s')
+def _cli(w):
+    cmd = [sys.executable, '-m', 'mdeval.cli', '-r', w.ref_path, '-s', w.sys_path, '-u', w.uem_path,
+           '-c', '0.25', '--no-cache']
+    return lambda: subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL), w.hours
+
+
+def peak_rss_mb():
+    """Peak RSS in MB of this process and its waited-for children, or None."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in KB elsewhere.
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_scenario(name, corpus_dir, repeat):
+    """Run one scenario in this process and return its result dict (None if unavailable)."""
+    setup, unit = SCENARIOS[name]
+    prepared = setup(Workload(corpus_dir))
+    if prepared is None:
+        return None
+    fn, units = prepared
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'throughput': units / best if best else 0.0, 'unit': unit,
+            'peak_rss_mb': peak_rss_mb()}
+
+
+def compare(results, baseline, threshold):
+    """[(name, seconds, baseline seconds)] of scenarios slower than baseline * (1 + threshold)."""
+    slower = []
+    for name, result in results.items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base and result['seconds'] > base['seconds'] * (1 + threshold):
+            slower.append((name, result['seconds'], base['seconds']))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--minutes', type=float, default=30.0, help='Length of every recording')
+    parser.add_argument('--speakers', type=int, default=4)
+    parser.add_argument('--overlap', type=float, default=0.1, help='Share of REF turns that overlap the previous one')
+    parser.add_argument('--over-segmentation', type=float, default=1.0, help='SYS pieces and clusters per REF turn and speaker')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenarios', help=f"Comma-separated subset of: {','.join(SCENARIOS)}")
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario; the best time is kept')
+    parser.add_argument('--baseline', help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', help='Write the results as a baseline JSON')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Flag scenarios slower than the baseline by more than this fraction')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--corpus-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.corpus_dir, args.repeat)))
+        return
+
+    names = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    config = {'files': args.files, 'minutes': args.minutes, 'speakers': args.speakers, 'overlap': args.overlap,
+              'over_segmentation': args.over_segmentation, 'seed': args.seed}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        write_corpus(corpus_dir, args.files, args.minutes * 60, args.speakers, args.overlap,
+                     args.over_segmentation, args.seed)
+        for name in names:
+            out = subprocess.run([sys.executable, '-m', 'benchmarks.suite', '--child', name,
+                                  '--corpus-dir', corpus_dir, '--repeat', str(args.repeat)],
+                                 check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+            result = json.loads(out.splitlines()[-1])
+            if result is None:
+                print(f"{name:>22}: skipped")
+                continue
+            results[name] = result
+            rss = f"{result['peak_rss_mb']:8.1f} MB" if result['peak_rss_mb'] is not None else ''
+            print(f"{name:>22}: {result['seconds']:8.3f} s  {result['throughput']:14,.1f} {result['unit']:<10} {rss}")
+
+    report = {'config': config, 'python': sys.version.split()[0], 'scenarios': results}
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print('Warning: the baseline was recorded with a different corpus configuration.', file=sys.stderr)
+        slower = compare(results, baseline, args.threshold)
+        for name, seconds, base in slower:
+            print(f"SLOWER: {name} {seconds:.3f} s vs {base:.3f} s baseline (+{100 * (seconds / base - 1):.0f}%)")
+        if slower:
+            sys.exit(1)
+        print(f"No scenario is more than {100 * args.threshold:g}% slower than the baseline.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+Versioned binary cache for parsed RTTM and UEM files.
+
+A cache file sits next to its source (`<source>.mdcache`) and contains:
+
+    header        magic, format version, kind (RTTM/UEM), source size,
+                  source mtime, source SHA-1, section offsets
+    string table  newline-separated UTF-8 file ids, channels and speakers
+    index         one fixed-size entry per (file, chnl) recording
+    data          per recording: speaker string ids (int32), then
+                  tbeg (float64), tend (float64) and speaker ids (int32);
+                  for RTTMs the same four columns follow for the LEXEME rows
+
+The cache is opened with mmap and only the index is decoded up front, so only
+the recordings that are actually looked up are paged in. It is rebuilt when
+the source size or content changes; a changed mtime with identical content
+(checked by hash) still reuses the cache.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .io import load_rttm_fast, load_uem
+from .segments import SegmentTable
+from .utils import Segment
+
+MAGIC = b'MDEVALBC'
+VERSION = 2
+KIND_RTTM = 0
+KIND_UEM = 1
+CACHE_SUFFIX = '.mdcache'
+
+# magic, version, kind, source size, source mtime_ns, sha1,
+# string table offset/size, index offset, recording count
+_HEADER = struct.Struct('<8sIIQQ20sQQQQ')
+_MTIME_OFFSET = struct.calcsize('<8sIIQ')
+# file string id, chnl string id, n speakers, n rows, n word speakers,
+# n words, data offset
+_ENTRY = struct.Struct('<IIIQIQQ')
+
+
+def cache_path_for(source_path: str) -> str:
+    return source_path + CACHE_SUFFIX
+
+
+def _file_hash(path: str) -> bytes:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def _native(values: array) -> bytes:
+    # The cache is little-endian regardless of the host.
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def write_cache(cache_path: str, source_path: str, kind: int,
+                recordings: Dict[str, Dict[str, Union[Dict[str, Any], List[Segment]]]],
+                source_hash: Optional[bytes] = None):
+    """
+    Write {file: {chnl: {'SPEAKER': SegmentTable, 'LEXEME': SegmentTable or []}}}
+    (RTTM) or {file: {chnl: [Segment]}} (UEM) to cache_path. The file is
+    written to a temporary name and moved into place.
+    """
+    stat = os.stat(source_path)
+    if source_hash is None:
+        source_hash = _file_hash(source_path)
+
+    strings = {}
+    def string_id(s):
+        if s not in strings:
+            strings[s] = len(strings)
+        return strings[s]
+
+    entries = []
+    chunks = []
+    offset = 0
+    for file in sorted(recordings):
+        for chnl in sorted(recordings[file]):
+            rec = recordings[file][chnl]
+            if kind == KIND_RTTM:
+                table = rec['SPEAKER']
+                words = rec['LEXEME'] or SegmentTable()
+                speakers = array('i', [string_id(s) for s in table.speakers])
+                word_speakers = array('i', [string_id(s) for s in words.speakers])
+                columns = [speakers, table.tbeg, table.tend, table.spkr,
+                           word_speakers, words.tbeg, words.tend, words.spkr]
+                n_rows = len(table)
+                n_words = len(words)
+            else:
+                speakers = word_speakers = array('i')
+                columns = [speakers, array('d', [s.tbeg for s in rec]), array('d', [s.tend for s in rec])]
+                n_rows = len(rec)
+                n_words = 0
+            entries.append((string_id(file), string_id(chnl), len(speakers), n_rows,
+                            len(word_speakers), n_words, offset))
+            for column in columns:
+                data = _native(column)
+                chunks.append(data)
+                offset += len(data)
+
+    string_blob = '\n'.join(strings).encode()
+    strings_offset = _HEADER.size
+    index_offset = strings_offset + len(string_blob)
+    data_offset = index_offset + _ENTRY.size * len(entries)
+    header = _HEADER.pack(MAGIC, VERSION, kind, stat.st_size, stat.st_mtime_ns, source_hash,
+                          strings_offset, len(string_blob), index_offset, len(entries))
+
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(string_blob)
+        for *entry, rel_offset in entries:
+            f.write(_ENTRY.pack(*entry, data_offset + rel_offset))
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, cache_path)
+
+
+class CachedData(Mapping):
+    """
+    Read-only {file: {chnl: ...}} view of a cache file, backed by mmap.
+
+    For RTTM caches each channel maps to {'SPEAKER': SegmentTable, 'LEXEME': ...}
+    like load_rttm_fast(words=True); for UEM caches to a list of Segment.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        with open(cache_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self._mm, 0)
+        (magic, version, self.kind, self.source_size, self.source_mtime_ns, self.source_hash,
+         strings_offset, strings_size, index_offset, n_entries) = header
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{cache_path} is not a version {VERSION} mdeval cache")
+        blob = self._mm[strings_offset:strings_offset + strings_size].decode()
+        self._strings = blob.split('\n') if blob else []
+        self._index = {} # {file: {chnl: (n_speakers, n_rows, n_word_speakers, n_words, offset)}}
+        for k in range(n_entries):
+            file_id, chnl_id, *entry = _ENTRY.unpack_from(self._mm, index_offset + k * _ENTRY.size)
+            chnls = self._index.setdefault(self._strings[file_id], {})
+            chnls[self._strings[chnl_id]] = tuple(entry)
+
+    def _read(self, typecode: str, offset: int, count: int):
+        size = array(typecode).itemsize * count
+        return _from_bytes(typecode, self._mm[offset:offset + size]), offset + size
+
+    def _load_table(self, n_spkrs: int, n_rows: int, offset: int):
+        speakers, offset = self._read('i', offset, n_spkrs)
+        table = SegmentTable()
+        for string_id in speakers:
+            table.speaker_id(self._strings[string_id])
+        table.tbeg, offset = self._read('d', offset, n_rows)
+        table.tend, offset = self._read('d', offset, n_rows)
+        table.spkr, offset = self._read('i', offset, n_rows)
+        return table, offset
+
+    def _load(self, n_spkrs: int, n_rows: int, n_word_spkrs: int, n_words: int, offset: int):
+        if self.kind == KIND_UEM:
+            _, offset = self._read('i', offset, n_spkrs)
+            tbeg, offset = self._read('d', offset, n_rows)
+            tend, offset = self._read('d', offset, n_rows)
+            return [Segment(b, e) for b, e in zip(tbeg, tend)]
+        table, offset = self._load_table(n_spkrs, n_rows, offset)
+        words, _ = self._load_table(n_word_spkrs, n_words, offset) if n_words else ([], offset)
+        return {'SPEAKER': table, 'LEXEME': words}
+
+    def __getitem__(self, file: str) -> Dict[str, Any]:
+        return {chnl: self._load(*entry) for chnl, entry in self._index[file].items()}
+
+    def __contains__(self, file) -> bool:
+        return file in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self):
+        self._mm.close()
+
+
+def _open_valid_cache(cache_path: str, source_path: str, kind: int):
+    """Return CachedData if cache_path is a valid cache of source_path, else (None, hash)."""
+    if not os.path.exists(cache_path):
+        return None, None
+    try:
+        cached = CachedData(cache_path)
+    except (ValueError, OSError, struct.error):
+        return None, None
+    stat = os.stat(source_path)
+    if cached.kind == kind and cached.source_size == stat.st_size:
+        if cached.source_mtime_ns == stat.st_mtime_ns:
+            return cached, None
+        source_hash = _file_hash(source_path)
+        if cached.source_hash == source_hash:
+            _update_mtime(cache_path, stat.st_mtime_ns)
+            return cached, source_hash
+        cached.close()
+        return None, source_hash
+    cached.close()
+    return None, None
+
+
+def _update_mtime(cache_path: str, mtime_ns: int):
+    """Record a new source mtime so the next run skips hashing the source."""
+    try:
+        with open(cache_path, 'r+b') as f:
+            f.seek(_MTIME_OFFSET)
+            f.write(struct.pack('<Q', mtime_ns))
+    except OSError:
+        pass # read-only cache: hash again next time
+
+
+def _load_cached(source_path: str, kind: int, parse, cache_path: Optional[str]):
+    cache_path = cache_path or cache_path_for(source_path)
+    cached, source_hash = _open_valid_cache(cache_path, source_path, kind)
+    if cached is not None:
+        return cached
+    data = parse(source_path)
+    try:
+        write_cache(cache_path, source_path, kind, data, source_hash)
+    except OSError:
+        # Read-only location: use the freshly parsed data without caching.
+        return data
+    return CachedData(cache_path)
+
+
+def load_rttm_cached(file_path: str, cache_path: Optional[str] = None) -> Mapping:
+    """
+    Load the SPEAKER and LEXEME rows of an RTTM through the binary cache,
+    parsing the source (and writing the cache) only when no valid cache exists.
+    Returns the structure of load_rttm_fast(file_path, words=True).
+    """
+    return _load_cached(file_path, KIND_RTTM, lambda path: load_rttm_fast(path, words=True), cache_path)
+
+
+def load_uem_cached(file_path: str, cache_path: Optional[str] = None) -> Mapping:
+    """Load a UEM through the binary cache. Returns {file: {chnl: [Segment]}}."""
+    return _load_cached(file_path, KIND_UEM, load_uem, cache_path)
@@ -0,0 +1,103 @@
+"""
+Bootstrap confidence intervals for DER.
+
+Per-recording stats are kept as rows of one flat `array('d')`. A bootstrap
+replicate resamples recordings with replacement and sums their rows, so once
+the corpus has been scored the intervals only cost a few vectorized sums and
+the scorer never needs to be re-run.
+"""
+import random
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+TIME_KEYS = (
+    'EVAL_TIME',
+    'EVAL_SPEECH',
+    'SCORED_TIME',
+    'SCORED_SPEECH',
+    'MISSED_SPEECH',
+    'FALARM_SPEECH',
+    'SCORED_SPEAKER',
+    'MISSED_SPEAKER',
+    'FALARM_SPEAKER',
+    'SPEAKER_ERROR',
+)
+
+# Resample at most this many (replicate, recording) cells at a time.
+_CHUNK_CELLS = 1 << 22
+
+
+class RecordingStats:
+    """Per-recording stat vectors, one row of `keys` per scored recording."""
+
+    def __init__(self, keys: Sequence[str] = TIME_KEYS):
+        self.keys = tuple(keys)
+        self.values = array('d')
+
+    def append(self, stats: Dict[str, float]):
+        self.values.extend([stats[k] for k in self.keys])
+
+    def __len__(self) -> int:
+        return len(self.values) // len(self.keys)
+
+    def column(self, key: str) -> List[float]:
+        return self.values[self.keys.index(key)::len(self.keys)].tolist()
+
+    def bootstrap_der(self, n_resamples: int, confidence: float = 0.95,
+                      seed: Optional[int] = None) -> Tuple[float, float]:
+        """
+        Percentile bootstrap interval of the corpus-level DER (in percent),
+        resampling recordings with replacement.
+        """
+        scored = self.column('SCORED_SPEAKER')
+        errors = [m + f + e for m, f, e in zip(self.column('MISSED_SPEAKER'),
+                                               self.column('FALARM_SPEAKER'),
+                                               self.column('SPEAKER_ERROR'))]
+        if not scored or n_resamples <= 0:
+            return 0.0, 0.0
+        if np is not None:
+            ders = _resample_numpy(np.asarray(scored), np.asarray(errors), n_resamples, seed)
+        else:
+            ders = _resample_python(scored, errors, n_resamples, seed)
+        alpha = (1.0 - confidence) / 2
+        return _percentile(ders, alpha), _percentile(ders, 1.0 - alpha)
+
+
+def _resample_numpy(scored, errors, n_resamples, seed):
+    rng = np.random.default_rng(seed)
+    n = len(scored)
+    ders = []
+    chunk = max(1, _CHUNK_CELLS // n)
+    for start in range(0, n_resamples, chunk):
+        size = min(chunk, n_resamples - start)
+        drawn = rng.integers(0, n, size=(size, n))
+        sums = np.stack([scored[drawn].sum(axis=1), errors[drawn].sum(axis=1)], axis=1)
+        ders.append(np.divide(100 * sums[:, 1], sums[:, 0], out=np.zeros(size), where=sums[:, 0] > 0))
+    return np.sort(np.concatenate(ders)).tolist()
+
+
+def _resample_python(scored, errors, n_resamples, seed):
+    rng = random.Random(seed)
+    n = len(scored)
+    ders = []
+    for _ in range(n_resamples):
+        total_scored = 0.0
+        total_errors = 0.0
+        for i in rng.choices(range(n), k=n):
+            total_scored += scored[i]
+            total_errors += errors[i]
+        ders.append(100 * total_errors / total_scored if total_scored else 0.0)
+    return sorted(ders)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of an already sorted list."""
+    pos = q * (len(sorted_values) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
@@ -0,0 +1,110 @@
+"""
+Per-speaker error breakdown and Jaccard Error Rate (JER).
+
+Both scoring backends can fill a `SpeakerActivity` while they accumulate the
+ref x sys overlap: the scored time of every speaker, the time a REF speaker
+talks while the system is silent and the time a SYS speaker talks while no
+REF speaker does. Together with the overlap matrix and the speaker map these
+give every per-speaker figure without another pass over the recording.
+
+For REF speaker r mapped to SYS speaker s:
+
+- CORRECT: time r and s talk together.
+- MISSED: time r talks while no SYS speaker does.
+- CONFUSED: the rest of r's time, when SYS speakers talk but not s.
+
+JER follows DIHARD: REF and SYS speakers are paired to maximize the total
+Jaccard index |r & s| / |r | s| (not overlap time, as for DER), a speaker's
+JER is 1 minus the Jaccard index with its pair (100% if unpaired), and the
+JER of a recording is the mean over the REF speakers that have scored time.
+"""
+from array import array
+from typing import Any, Callable, Dict, Sequence
+
+
+class SpeakerActivity:
+    """
+    Scored speaker times of one recording, indexed like the overlap matrix.
+
+    Attributes:
+        overlap: the ref x sys OverlapMatrix of the recording.
+        ref_time, sys_time: scored time of every REF / SYS speaker.
+        ref_missed: time each REF speaker talks while no SYS speaker does.
+        sys_falarm: time each SYS speaker talks while no REF speaker does.
+    """
+    __slots__ = ('overlap', 'ref_time', 'ref_missed', 'sys_time', 'sys_falarm')
+
+    def __init__(self, n_ref: int = 0, n_sys: int = 0):
+        self.overlap = None
+        self.ref_time = array('d', bytes(8 * n_ref))
+        self.ref_missed = array('d', bytes(8 * n_ref))
+        self.sys_time = array('d', bytes(8 * n_sys))
+        self.sys_falarm = array('d', bytes(8 * n_sys))
+
+    def add(self, dur: float, ref_ids: Sequence[int], sys_ids: Sequence[int]):
+        """Add one scored interval with the given active speaker ids."""
+        for i in ref_ids:
+            self.ref_time[i] += dur
+            if not sys_ids:
+                self.ref_missed[i] += dur
+        for j in sys_ids:
+            self.sys_time[j] += dur
+            if not ref_ids:
+                self.sys_falarm[j] += dur
+
+    def breakdown(self, spkr_map: Dict[str, str], map_fn: Callable) -> Dict[str, Any]:
+        """
+        Per-speaker report for the DER speaker map spkr_map; map_fn is the
+        assignment solver used for the JER pairing (scoring.map_speakers).
+
+        Returns {'SPEAKERS': {ref: {...}}, 'SYSTEMS': {sys: {...}},
+        'CONFUSION': {ref: {sys: overlap}}, 'JER': percent}.
+        """
+        overlap = self.overlap
+        ref_names = overlap.ref_names
+        sys_names = overlap.sys_names
+        confusion = overlap.to_dict()
+        ref_ids = {name: i for i, name in enumerate(ref_names)}
+        sys_ids = {name: j for j, name in enumerate(sys_names)}
+
+        # Jaccard index of every overlapping pair, and its optimal pairing.
+        jaccard = {}
+        for r, row in confusion.items():
+            t_ref = self.ref_time[ref_ids[r]]
+            jaccard[r] = {s: o / (t_ref + self.sys_time[sys_ids[s]] - o) for s, o in row.items()}
+        jer_map = map_fn(jaccard) if jaccard else {}
+
+        speakers = {}
+        jers = []
+        for i, r in enumerate(ref_names):
+            scored = self.ref_time[i]
+            mapped = spkr_map.get(r)
+            correct = overlap.get(r, mapped) if mapped is not None else 0.0
+            paired = jer_map.get(r)
+            jer = 100 * (1 - jaccard[r][paired]) if paired is not None else 100.0
+            speakers[r] = {
+                'SCORED': scored,
+                'CORRECT': correct,
+                'MISSED': self.ref_missed[i],
+                'CONFUSED': max(scored - correct - self.ref_missed[i], 0.0),
+                'MAPPED': mapped,
+                'JER': jer if scored > 0 else None,
+                'JER_MAPPED': paired,
+            }
+            if scored > 0:
+                jers.append(jer)
+
+        inverse = {s: r for r, s in spkr_map.items()}
+        systems = {s: {'SCORED': self.sys_time[j], 'FALARM': self.sys_falarm[j], 'MAPPED': inverse.get(s)}
+                   for j, s in enumerate(sys_names)}
+        return {
+            'SPEAKERS': speakers,
+            'SYSTEMS': systems,
+            'CONFUSION': confusion,
+            'JER': sum(jers) / len(jers) if jers else 0.0,
+        }
+
+
+def jer_speakers(breakdown: Dict[str, Any]):
+    """The per-speaker JERs of a breakdown that count towards its JER."""
+    return [s['JER'] for s in breakdown['SPEAKERS'].values() if s['JER'] is not None]
@@ -1,109 +1,591 @@
 import argparse
+import glob
 import sys
 import os
+import sqlite3
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from typing import List
-from .io import load_rttm, load_uem
-from .scoring import score_speaker_diarization
+from . import profiling
+from .io import DEFAULT_PREFETCH, STDIN, RttmFiles, RttmIndex, is_plain_file, is_rttm_collection, load_rttm_fast, load_uem
+from .binary_cache import load_rttm_cached, load_uem_cached
+from .bootstrap import RecordingStats
+from .breakdown import jer_speakers
+from .frames import DEFAULT_FRAME_SHIFT, is_frame_file, load_frames
+from .report import FORMATS, ReportWriter
+from .result_cache import ResultCache, result_key, DEFAULT_MAX_BYTES
+from .scoring import score_speaker_diarization, score_systems, score_settings, resolve_backend, BACKENDS
+from .segments import SegmentTable
+from .shard import PartialWriter, ShardView, merge_partials, parse_shard
 from .utils import Segment
 
-def main():
-    parser = argparse.ArgumentParser(description='Python implementation of NIST md-eval.pl')
-    parser.add_argument('-r', '--ref', required=True, help='Reference RTTM file')
-    parser.add_argument('-s', '--sys', required=True, help='System RTTM file')
-    parser.add_argument('-u', '--uem', help='UEM file (Evaluation Partition)')
-    parser.add_argument('-c', '--collar', type=float, default=0.0, help='No-score collar around reference boundaries (seconds)')
-    parser.add_argument('-1', '--single-speaker', action='store_true', dest='single_speaker', help='Limit scoring to single-speaker regions')
-    # Add other flags as needed
-    
-    args = parser.parse_args()
-    
-    # Load Data
-    ref_data = load_rttm(args.ref)
-    sys_data = load_rttm(args.sys)
-    
-    uem_data = None
-    if args.uem:
-        uem_data = load_uem(args.uem)
-    
-    # Process each file found in REF
-    files = sorted(ref_data.keys())
-    
-    # Accumulate global scores
-    total_stats = {
-        'EVAL_TIME': 0.0,
-        'EVAL_SPEECH': 0.0,
-        'SCORED_TIME': 0.0,
-        'SCORED_SPEECH': 0.0,
-        'MISSED_SPEECH': 0.0,
-        'FALARM_SPEECH': 0.0,
-        'SCORED_SPEAKER': 0.0,
-        'MISSED_SPEAKER': 0.0,
-        'FALARM_SPEAKER': 0.0,
-        'SPEAKER_ERROR': 0.0,
-        'SCORED_WORDS': 0, # Placeholder
-        'EVAL_WORDS': 0
-    }
-    
-    # TODO: Output header matching md-eval.pl
-    
-    for file in files:
+STAT_KEYS = [
+    'EVAL_TIME',
+    'EVAL_SPEECH',
+    'SCORED_TIME',
+    'SCORED_SPEECH',
+    'MISSED_SPEECH',
+    'FALARM_SPEECH',
+    'SCORED_SPEAKER',
+    'MISSED_SPEAKER',
+    'FALARM_SPEAKER',
+    'SPEAKER_ERROR',
+    'SCORED_WORDS',
+    'EVAL_WORDS',
+    'MISSED_WORDS',
+    'ERROR_WORDS',
+]
+
+def new_total_stats():
+    return {k: (0 if k.endswith('_WORDS') else 0.0) for k in STAT_KEYS}
+
+def add_stats(total_stats, file_stats):
+    for k in total_stats:
+        if k in file_stats:
+            total_stats[k] += file_stats[k]
+
+def infer_uem(ref_segs) -> List[Segment]:
+    # Infer UEM from REF RTTM (min TBEG, max TEND)
+    min_t = 1e30
+    max_t = 0
+    if isinstance(ref_segs, SegmentTable):
+        if len(ref_segs):
+            min_t = min(min_t, min(ref_segs.tbeg))
+            max_t = max(max_t, max(ref_segs.tend))
+    else:
+        for seg in ref_segs:
+            min_t = min(min_t, seg['TBEG'])
+            max_t = max(max_t, seg['TEND'])
+    if max_t > min_t:
+        return [Segment(min_t, max_t)]
+    return []
+
+def group_by_speaker(segs):
+    # Expected format for scoring: {spkr: [{TBEG, TDUR, TEND, ...}]} or a SegmentTable
+    if isinstance(segs, SegmentTable):
+        return segs
+    grouped = {}
+    for seg in segs:
+        s = seg['SPKR']
+        if s not in grouped: grouped[s] = []
+        grouped[s].append(seg)
+    return grouped
+
+def iter_recordings(ref_data, sys_data, uem_data=None):
+    """
+    Yield (file, chnl, ref_spkrs, sys_spkrs, uem_eval, ref_words) for every
+    scorable recording in REF, in sorted order, where ref_words are the REF
+    LEXEME rows. Each tuple only holds that recording's data.
+    """
+    for file in sorted(ref_data.keys()):
         if file not in sys_data:
             print(f"Warning: File {file} found in REF but not in SYS. Skipping.", file=sys.stderr)
             continue
-            
-        chnls = sorted(ref_data[file].keys())
-        for chnl in chnls:
-            if chnl not in sys_data[file]:
+
+        # Look each recording up once; indexed inputs parse it on access.
+        with profiling.recording(file), profiling.stage('load'):
+            ref_rec = ref_data[file]
+            sys_rec = sys_data[file]
+        for chnl in sorted(ref_rec.keys()):
+            if chnl not in sys_rec:
                 print(f"Warning: Channel {chnl} for file {file} found in REF but not in SYS. Skipping.", file=sys.stderr)
                 continue
-                
+
             # Determine UEM
             if uem_data and file in uem_data and chnl in uem_data[file]:
                 uem_eval = uem_data[file][chnl]
             else:
-                # Infer UEM from REF RTTM (min TBEG, max TEND)
-                min_t = 1e30
-                max_t = 0
-                found_seg = False
-                for seg in ref_data[file][chnl]['SPEAKER']:
-                    min_t = min(min_t, seg['TBEG'])
-                    max_t = max(max_t, seg['TEND'])
-                    found_seg = True
-                if not found_seg:
-                    # Try other types? For now just SPEAKER
-                    pass
-                if max_t > min_t:
-                    uem_eval = [Segment(min_t, max_t)]
+                uem_eval = infer_uem(ref_rec[chnl]['SPEAKER'])
+
+            curr_ref = group_by_speaker(ref_rec[chnl]['SPEAKER'])
+            curr_sys = group_by_speaker(sys_rec[chnl]['SPEAKER'])
+            yield file, chnl, curr_ref, curr_sys, uem_eval, ref_rec[chnl].get('LEXEME', [])
+
+def iter_multi_recordings(ref_data, sys_list, uem_data=None):
+    """
+    Like iter_recordings, but for several systems: yield
+    (file, chnl, ref_spkrs, [sys_spkrs per system], uem_eval, ref_words).
+
+    A recording is skipped only when no system has it; a system missing a
+    recording that others have is scored as empty for it, so every system is
+    scored on the same recordings.
+    """
+    for file in sorted(ref_data.keys()):
+        with profiling.recording(file), profiling.stage('load'):
+            sys_recs = [sys_data.get(file) for sys_data in sys_list]
+            ref_rec = ref_data[file] if any(rec is not None for rec in sys_recs) else None
+        if ref_rec is None:
+            print(f"Warning: File {file} found in REF but not in any SYS. Skipping.", file=sys.stderr)
+            continue
+
+        for chnl in sorted(ref_rec.keys()):
+            if all(rec is None or chnl not in rec for rec in sys_recs):
+                print(f"Warning: Channel {chnl} for file {file} found in REF but not in any SYS. Skipping.", file=sys.stderr)
+                continue
+
+            if uem_data and file in uem_data and chnl in uem_data[file]:
+                uem_eval = uem_data[file][chnl]
+            else:
+                uem_eval = infer_uem(ref_rec[chnl]['SPEAKER'])
+
+            curr_sys = []
+            for k, rec in enumerate(sys_recs):
+                if rec is None or chnl not in rec:
+                    print(f"Warning: File {file} channel {chnl} not found in SYS #{k + 1}. Scoring it as empty.", file=sys.stderr)
+                    curr_sys.append(SegmentTable())
                 else:
-                    uem_eval = []
-
-            # Determine REF/SYS inputs
-            # Group by speaker
-            # Expected format for scoring: {spkr: [{TBEG, TDUR, TEND, ...}]}
-            curr_ref = {}
-            for seg in ref_data[file][chnl]['SPEAKER']:
-                s = seg['SPKR']
-                if s not in curr_ref: curr_ref[s] = []
-                curr_ref[s].append(seg)
-                
-            curr_sys = {}
-            if 'SPEAKER' in sys_data[file][chnl]:
-                for seg in sys_data[file][chnl]['SPEAKER']:
-                    s = seg['SPKR']
-                    if s not in curr_sys: curr_sys[s] = []
-                    curr_sys[s].append(seg)
-            
-            file_stats, _ = score_speaker_diarization(file, chnl, curr_ref, curr_sys, uem_eval, args.collar, args.single_speaker)
-            
-            # Add to totals
-            for k in total_stats:
-                if k in file_stats:
-                    total_stats[k] += file_stats[k]
+                    curr_sys.append(group_by_speaker(rec[chnl]['SPEAKER']))
+            yield file, chnl, group_by_speaker(ref_rec[chnl]['SPEAKER']), curr_sys, uem_eval, ref_rec[chnl].get('LEXEME', [])
+
+def _score_task(task):
+    file, chnl, curr_ref, curr_sys, uem_eval, words, collar, single_speaker, backend = task
+    file_stats, _ = score_speaker_diarization(file, chnl, curr_ref, curr_sys, uem_eval, collar, single_speaker, backend,
+                                              words=words)
+    return file_stats
+
+def _score_systems_task(task):
+    file, chnl, curr_ref, sys_list, uem_eval, words, collar, single_speaker, backend = task
+    return score_systems(file, chnl, curr_ref, sys_list, uem_eval, collar, single_speaker, backend, words)
+
+def _score_settings_task(task):
+    file, chnl, curr_ref, sys_list, uem_eval, words, settings, backend = task
+    return [score_settings(file, chnl, curr_ref, curr_sys, uem_eval, settings, backend, words) for curr_sys in sys_list]
+
+def _score_result_task(task):
+    file, chnl, curr_ref, curr_sys, uem_eval, words, collar, single_speaker, backend = task
+    return score_speaker_diarization(file, chnl, curr_ref, curr_sys, uem_eval, collar, single_speaker, backend,
+                                     words=words)
+
+def _score_detailed_task(task):
+    file, chnl, curr_ref, curr_sys, uem_eval, words, collar, single_speaker, backend = task
+    return score_speaker_diarization(file, chnl, curr_ref, curr_sys, uem_eval, collar, single_speaker, backend,
+                                     detailed=True, words=words)
+
+def score_recordings(recordings, collar=0.0, single_speaker=False, backend=None, jobs=1, cache=None, maps=False,
+                     detailed=False):
+    """
+    Score (file, chnl, ref_spkrs, sys_spkrs, uem_eval, ref_words) tuples and yield the
+    per-recording stats in input order, or (stats, spkr_map) pairs with maps,
+    or (stats, spkr_map, breakdown) triples with detailed (see
+    score_speaker_diarization; detailed results are not cached).
+
+    With jobs > 1 recordings are scored in a process pool. Results are still
+    yielded in input order, so any accumulation over them is independent of
+    the worker count and of completion order. At most a few recordings per
+    worker are in flight, so lazily produced recordings are never all held in
+    memory at once.
+
+    With a ResultCache, recordings whose inputs and options are already
+    cached are not scored again, and new results are added to the cache.
+    """
+    tasks = (rec + (collar, single_speaker, backend) for rec in recordings)
+    if detailed:
+        yield from _run_tasks(_score_detailed_task, tasks, jobs)
+        return
+    if cache is None:
+        yield from _run_tasks(_score_result_task if maps else _score_task, tasks, jobs)
+        return
+    backend = resolve_backend(backend)
+    keyed = ((result_key(t[2], t[3], t[4], collar, single_speaker, backend, t[5]), t) for t in tasks)
+    yield from _run_cached_tasks(keyed, jobs, cache, maps)
+
+def _run_cached_tasks(keyed_tasks, jobs, cache, maps=False):
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    pending = deque()
+
+    def finish():
+        key, scored, future = pending.popleft()
+        file_stats, spkr_map = _result(future) if scored and executor is not None else future.result()
+        if scored:
+            cache.put(key, file_stats, spkr_map)
+        return (file_stats, spkr_map) if maps else file_stats
+
+    try:
+        for key, task in keyed_tasks:
+            result = cache.get(key)
+            scored = result is None
+            if scored and executor is not None:
+                future = _submit(executor, _score_result_task, task)
+            else:
+                future = Future()
+                future.set_result(result if result is not None else _score_result_task(task))
+            pending.append((key, scored, future))
+            if len(pending) >= 4 * max(jobs, 1):
+                yield finish()
+        while pending:
+            yield finish()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def score_multi_recordings(recordings, collar=0.0, single_speaker=False, backend=None, jobs=1, maps=False):
+    """
+    Score tuples from iter_multi_recordings and yield, per recording, the
+    list of per-system stats (or (stats, spkr_map) pairs with maps), in
+    input order.
+    """
+    tasks = (rec + (collar, single_speaker, backend) for rec in recordings)
+    for results in _run_tasks(_score_systems_task, tasks, jobs):
+        yield results if maps else [file_stats for file_stats, _ in results]
+
+def score_settings_recordings(recordings, settings, backend=None, jobs=1, maps=False):
+    """
+    Score tuples from iter_multi_recordings under several (collar,
+    ignore_overlap) settings. Yields, per recording, a list over systems of
+    lists over settings of stats (or (stats, spkr_map) pairs with maps), in
+    input order. Each recording is partitioned once per system for all
+    settings.
+    """
+    tasks = (rec + (list(settings), backend) for rec in recordings)
+    for results in _run_tasks(_score_settings_task, tasks, jobs):
+        yield results if maps else [[file_stats for file_stats, _ in sys_results] for sys_results in results]
+
+def _run_tasks(fn, tasks, jobs):
+    if jobs <= 1:
+        yield from map(fn, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(_submit(executor, fn, task))
+            if len(pending) >= 4 * jobs:
+                yield _result(pending.popleft())
+        while pending:
+            yield _result(pending.popleft())
+
+def _submit(executor, fn, task):
+    # Workers record their own profile, which is merged back in _result.
+    if profiling.active() is None:
+        return executor.submit(fn, task)
+    return executor.submit(profiling.call_profiled, fn, task)
+
+def _result(future):
+    prof = profiling.active()
+    if prof is None:
+        return future.result()
+    result, data = future.result()
+    prof.merge(data)
+    return result
+
+def main():
+    if sys.argv[1:2] == ['merge']:
+        merge_main(sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser(description='Python implementation of NIST md-eval.pl',
+                                     epilog="Run 'mdeval merge -h' for combining partial results of sharded runs.")
+    parser.add_argument('-r', '--ref', required=True, help="Reference RTTM file ('-' for stdin; gzip/bz2/xz is detected), or a directory or list file (.lst/.list) of per-recording RTTM files")
+    parser.add_argument('-s', '--sys', required=True, nargs='+', help="System RTTM ('-' for stdin; gzip/bz2/xz is detected) or frame label (.npy/.npz/.frames) file(s), directories or list files of per-recording RTTMs, or glob patterns; several systems are scored against one REF pass")
+    parser.add_argument('-u', '--uem', help="UEM file (Evaluation Partition); '-' for stdin")
+    parser.add_argument('-c', '--collar', type=parse_collars, default=[0.0], help='No-score collar around reference boundaries (seconds); a comma-separated list such as 0,0.25,0.5 scores every collar in one pass')
+    parser.add_argument('-1', '--single-speaker', action='store_true', dest='single_speaker', help='Limit scoring to single-speaker regions')
+    parser.add_argument('--backend', choices=BACKENDS, default='auto', help="Scoring backend ('auto' uses NumPy when installed)")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of worker processes for scoring recordings (0 = all CPUs)')
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH, metavar='N', help=f"Per-recording RTTM inputs: read up to N recordings ahead on background threads (default: {DEFAULT_PREFETCH}, 0 = read on demand)")
+    parser.add_argument('--frame-shift', type=float, default=DEFAULT_FRAME_SHIFT, help='Frame shift in seconds of .npy/.npz/.frames label inputs (default: 0.01)')
+    parser.add_argument('--ref-cache', action='store_true', dest='ref_cache', help='Cache parsed REF and UEM files in binary form next to the sources (<file>.mdcache)')
+    parser.add_argument('--no-cache', action='store_false', dest='result_cache', help='Do not read or write the per-recording result cache')
+    parser.add_argument('--cache-dir', help='Directory of the result cache (default: $MDEVAL_CACHE_DIR or ~/.cache/mdeval)')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / (1 << 20), help='Size bound of the result cache in MB; least recently used results are evicted beyond it')
+    parser.add_argument('--bootstrap', type=int, default=0, metavar='N', help='Report a bootstrap confidence interval for DER from N resamples of the scored recordings')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the bootstrap interval (default: 0.95)')
+    parser.add_argument('--seed', type=int, help='Random seed for the bootstrap')
+    parser.add_argument('--per-file', action='store_true', dest='per_file', help='Also report every recording, as soon as it is scored')
+    parser.add_argument('--format', choices=FORMATS, default='text', help='Output format: md-eval style text (default), JSON Lines, CSV or TSV records with a final summary record')
+    parser.add_argument('--speakers', action='store_true', help='Report per-speaker missed/confused time, the confusion matrix and JER of every recording (one system and collar; text or json)')
+    parser.add_argument('--shard', type=shard_arg, metavar='I/N', help='Only score the recordings of shard I of N (1-based), chosen by a hash of the file id')
+    parser.add_argument('--partial', metavar='PATH', help="Write per-recording results to a partial result file for 'mdeval merge'")
+    parser.add_argument('--profile', nargs='?', const='-', metavar='PATH', help='Write per-stage and per-recording timings as JSON to PATH (default: stderr)')
+    # Add other flags as needed
+    
+    args = parser.parse_args()
+    if args.speakers:
+        if len(args.collar) > 1 or len(args.sys) > 1 or any(c in args.sys[0] for c in '*?['):
+            parser.error('--speakers scores one system at one collar')
+        if args.format not in ('text', 'json'):
+            parser.error('--speakers needs --format text or json')
+        if args.partial:
+            parser.error('--speakers cannot be combined with --partial')
+    if not args.profile:
+        run(args)
+        return
+    with profiling.profile() as prof:
+        run(args)
+    if args.profile == '-':
+        print(prof.to_json(), file=sys.stderr)
+    else:
+        with open(args.profile, 'w') as f:
+            f.write(prof.to_json() + '\n')
+
+def run(args):
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    
+    # Index data; recordings are parsed one at a time as they are scored
+    if is_frame_file(args.ref):
+        ref_data = load_frames(args.ref, args.frame_shift)
+    elif is_rttm_collection(args.ref):
+        ref_data = RttmFiles(args.ref, args.prefetch, words=True)
+    elif args.ref_cache and args.ref != STDIN:
+        ref_data = load_rttm_cached(args.ref)
+    else:
+        ref_data = load_rttm_input(args.ref, words=True)
+    readers = [ref_data] # inputs that can read recordings ahead
+    if args.shard:
+        ref_data = ShardView(ref_data, *args.shard)
+    sys_paths = expand_sys_paths(args.sys)
+    if [args.ref, args.uem, *sys_paths].count(STDIN) > 1:
+        raise SystemExit("Error: only one input can be read from stdin ('-')")
+    sys_list = [load_speakers(path, args.frame_shift, args.prefetch) for path in sys_paths]
+    readers = [data for data in readers + sys_list if isinstance(data, RttmFiles)]
+    if readers:
+        # Recordings are looked up in sorted order when some system has them.
+        order = [file for file in sorted(ref_data) if any(file in sys_data for sys_data in sys_list)]
+        for data in readers:
+            data.prefetch(order)
+    
+    uem_data = None
+    if args.uem:
+        uem_data = load_uem_cached(args.uem) if args.ref_cache and args.uem != STDIN else load_uem(args.uem)
     
-    # Print simplified output
-    print_scores("ALL", total_stats)
+    report = ReportWriter(args.format, sys.stdout, STAT_KEYS) if args.format != 'text' else None
+    try:
+        if not args.partial:
+            score_main(args, ref_data, sys_paths, sys_list, uem_data, jobs, report)
+            return
+        index, count = args.shard or (1, 1)
+        with PartialWriter(args.partial, sys_paths, args.collar, args.single_speaker, STAT_KEYS,
+                           [index], count) as partial:
+            score_main(args, ref_data, sys_paths, sys_list, uem_data, jobs, report, partial)
+    finally:
+        if report is not None:
+            report.close()
+        for data in readers:
+            data.close()
+
+def merge_main(argv=None):
+    """`mdeval merge`: report the combined partial results of sharded runs."""
+    parser = argparse.ArgumentParser(prog='mdeval merge', description='Combine partial result files of sharded mdeval runs into one report')
+    parser.add_argument('partials', nargs='+', help='Partial result files (--partial) or glob patterns')
+    parser.add_argument('--per-file', action='store_true', dest='per_file', help='Also report every recording')
+    parser.add_argument('--format', choices=FORMATS, default='text', help='Output format, as for scoring runs')
+    parser.add_argument('--bootstrap', type=int, default=0, metavar='N', help='Report a bootstrap confidence interval for DER from N resamples of the recordings')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the bootstrap interval (default: 0.95)')
+    parser.add_argument('--seed', type=int, help='Random seed for the bootstrap')
+    parser.add_argument('--partial', metavar='PATH', help='Also write the combined results as one partial result file')
+    parser.set_defaults(speakers=False)
+    args = parser.parse_args(argv)
+
+    try:
+        header, rows = merge_partials(expand_sys_paths(args.partials))
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Error: {e}")
+    if header['missing']:
+        missing = ', '.join(f"{i}/{header['shard_count']}" for i in header['missing'])
+        print(f"Warning: no partial results for shard(s) {missing}. The report only covers the others.", file=sys.stderr)
+    report = ReportWriter(args.format, sys.stdout, STAT_KEYS) if args.format != 'text' else None
+    try:
+        if not args.partial:
+            report_results(args, header['systems'], header['collars'], rows, report)
+            return
+        with PartialWriter(args.partial, header['systems'], header['collars'], header['single_speaker'],
+                           STAT_KEYS, header['shards'], header['shard_count']) as partial:
+            report_results(args, header['systems'], header['collars'], rows, report, partial)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+    finally:
+        if report is not None:
+            report.close()
+
+def score_main(args, ref_data, sys_paths, sys_list, uem_data, jobs, report=None, partial=None):
+    keys = deque() # (file, chnl) of the recordings being scored, in order
+    cache = None
+    if len(args.collar) > 1:
+        settings = [(collar, args.single_speaker) for collar in args.collar]
+        recordings = track_recordings(iter_multi_recordings(ref_data, sys_list, uem_data), keys)
+        results = score_settings_recordings(recordings, settings, args.backend, jobs, maps=True)
+    elif len(sys_list) > 1:
+        recordings = track_recordings(iter_multi_recordings(ref_data, sys_list, uem_data), keys)
+        results = ([[pair] for pair in pairs] for pairs in
+                   score_multi_recordings(recordings, args.collar[0], args.single_speaker, args.backend, jobs, maps=True))
+    else:
+        if args.result_cache and not args.speakers:
+            try:
+                cache = ResultCache(args.cache_dir, int(args.cache_size * (1 << 20)))
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: result cache unavailable ({e}). Scoring without it.", file=sys.stderr)
+        recordings = track_recordings(iter_recordings(ref_data, sys_list[0], uem_data), keys)
+        results = ([[result]] for result in
+                   score_recordings(recordings, args.collar[0], args.single_speaker, args.backend, jobs, cache,
+                                    maps=True, detailed=args.speakers))
+    try:
+        report_results(args, sys_paths, args.collar, ((*keys.popleft(), r) for r in results), report, partial)
+    finally:
+        if cache is not None:
+            cache.close()
+
+def report_results(args, sys_paths, collars, rows, report=None, partial=None):
+    """
+    Accumulate and report (file, chnl, results) rows, where results[k][s]
+    is the (stats, spkr_map) pair of system k under collar s, in recording
+    order. Prints one summary per system and collar (as a table for several
+    systems) or writes report records, and adds every row to a partial
+    result writer. Shared by scoring runs and `mdeval merge`.
+
+    With args.speakers, results[0][0] is a (stats, spkr_map, breakdown)
+    triple; every recording's breakdown is reported and the summary adds
+    the JER over all REF speakers of the corpus.
+    """
+    multi_collar = len(collars) > 1
+    multi_sys = len(sys_paths) > 1
+    per_file = args.per_file or args.speakers
+    totals = [[new_total_stats() for _ in collars] for _ in sys_paths]
+    per_recording = [[RecordingStats() for _ in collars] for _ in sys_paths]
+    jers = [] # per-speaker JERs over all recordings
+
+    for file, chnl, results in rows:
+        if partial is not None:
+            partial.add(file, chnl, results)
+        for k, (sys_totals, sys_rows, sys_results) in enumerate(zip(totals, per_recording, results)):
+            for collar, total_stats, stat_rows, result in zip(collars, sys_totals, sys_rows, sys_results):
+                stats = result[0]
+                add_stats(total_stats, stats)
+                stat_rows.append(stats)
+                if not per_file:
+                    continue
+                breakdown = result[2] if args.speakers else None
+                if breakdown is not None:
+                    jers.extend(jer_speakers(breakdown))
+                # Per-recording output
+                if report is not None:
+                    report.record(file, chnl, sys_paths[k], collar, stats, details=breakdown)
+                    continue
+                condition = f"{file} {chnl}"
+                if multi_sys:
+                    condition += f", {sys_paths[k]}"
+                if multi_collar:
+                    condition += f", collar={collar:g}"
+                print_scores(condition, stats)
+                if breakdown is not None:
+                    print_speakers(condition, breakdown)
+
+    summary = {'JER': sum(jers) / len(jers) if jers else 0.0} if args.speakers else None
+    for s, collar in enumerate(collars):
+        intervals = [bootstrap_interval(args, sys_rows[s]) for sys_rows in per_recording]
+        if report is not None:
+            for path, sys_totals, interval in zip(sys_paths, totals, intervals):
+                report.summary(path, collar, sys_totals[s], interval, details=summary)
+        elif multi_sys:
+            if multi_collar:
+                print(f"\n*** Collar {collar:g} ***\n")
+            print_system_table(sys_paths, [sys_totals[s] for sys_totals in totals], intervals)
+        else:
+            print_scores(f"ALL, collar={collar:g}" if multi_collar else "ALL", totals[0][s], intervals[0])
+            if summary is not None:
+                print(f" OVERALL JACCARD ERROR RATE = {summary['JER']:5.2f} percent, mean over {len(jers)} reference speakers")
+                print("---------------------------------------------")
+
+def track_recordings(recordings, keys):
+    """Pass recordings through, appending each one's (file, chnl) to keys."""
+    for rec in recordings:
+        keys.append((rec[0], rec[1]))
+        yield rec
+
+def load_speakers(path, frame_shift=DEFAULT_FRAME_SHIFT, prefetch=DEFAULT_PREFETCH):
+    """
+    Open an RTTM, a frame label file (.npy/.npz/.frames) or a directory or
+    list file of per-recording RTTMs as a recording mapping.
+    """
+    if is_frame_file(path):
+        return load_frames(path, frame_shift)
+    if is_rttm_collection(path):
+        return RttmFiles(path, prefetch)
+    return load_rttm_input(path)
+
+def load_rttm_input(path, words=False):
+    """
+    Index a plain RTTM file so recordings are parsed as they are scored;
+    compressed or piped RTTM is parsed in one streaming pass instead. With
+    words, LEXEME rows are kept as well.
+    """
+    if is_plain_file(path):
+        return RttmIndex(path, types=('SPEAKER', 'LEXEME') if words else ('SPEAKER',), columnar=True)
+    return load_rttm_fast(path, words=words)
+
+def bootstrap_interval(args, per_recording):
+    """(low, high, confidence) DER interval when --bootstrap is set, else None."""
+    if args.bootstrap <= 0:
+        return None
+    low, high = per_recording.bootstrap_der(args.bootstrap, args.confidence, args.seed)
+    return low, high, args.confidence
+
+def shard_arg(value: str):
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_collars(value: str) -> List[float]:
+    """Parse a collar or a comma-separated list of collars, e.g. '0,0.25,0.5'."""
+    try:
+        collars = [float(c) for c in value.split(',') if c.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid collar list: {value}")
+    if not collars:
+        raise argparse.ArgumentTypeError(f"invalid collar list: {value}")
+    return collars
+
+def expand_sys_paths(patterns: List[str]) -> List[str]:
+    """Expand glob patterns among the --sys arguments, keeping plain paths as given."""
+    paths = []
+    for pattern in patterns:
+        if any(c in pattern for c in '*?['):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise SystemExit(f"Error: no SYS files match {pattern}")
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return paths
+
+def diarization_error(scores):
+    """Return (miss, falarm, speaker error, DER) as percent of scored speaker time."""
+    scored = scores['SCORED_SPEAKER']
+    if not scored:
+        return 0.0, 0.0, 0.0, 0.0
+    miss = 100 * scores['MISSED_SPEAKER'] / scored
+    falarm = 100 * scores['FALARM_SPEAKER'] / scored
+    error = 100 * scores['SPEAKER_ERROR'] / scored
+    return miss, falarm, error, miss + falarm + error
+
+def print_system_table(names, totals, intervals=None):
+    intervals = intervals or [None] * len(names)
+    width = max([len('SYSTEM')] + [len(n) for n in names])
+    header = f"{'SYSTEM':<{width}}    MISS  FALARM  SPKERR     DER"
+    if intervals[0] is not None:
+        header += f"  {100 * intervals[0][2]:g}% CI"
+    print(header)
+    for name, scores, interval in zip(names, totals, intervals):
+        miss, falarm, error, der = diarization_error(scores)
+        line = f"{name:<{width}}  {miss:6.2f}  {falarm:6.2f}  {error:6.2f}  {der:6.2f}"
+        if interval is not None:
+            line += f"  [{interval[0]:5.2f}, {interval[1]:5.2f}]"
+        print(line)
+
+def print_speakers(condition, breakdown):
+    """Print the per-speaker table of a breakdown from score_speaker_diarization(detailed=True)."""
+    speakers = breakdown['SPEAKERS']
+    width = max([len('REF SPEAKER')] + [len(r) for r in speakers])
+    sys_width = max([len('SYS SPEAKER')] + [len(s['MAPPED'] or '-') for s in speakers.values()])
+    print(f"\n*** Speaker breakdown for {condition} ***\n")
+    print(f"{'REF SPEAKER':<{width}}  {'SYS SPEAKER':<{sys_width}}     SCORED    CORRECT     MISSED   CONFUSED     JER")
+    for r in sorted(speakers):
+        s = speakers[r]
+        jer = f"{s['JER']:6.2f}" if s['JER'] is not None else '     -'
+        print(f"{r:<{width}}  {s['MAPPED'] or '-':<{sys_width}} {s['SCORED']:10.2f} {s['CORRECT']:10.2f} "
+              f"{s['MISSED']:10.2f} {s['CONFUSED']:10.2f}  {jer}")
+    print(f" JACCARD ERROR RATE = {breakdown['JER']:5.2f} percent, mean over reference speakers  ({condition})")
+    print("---------------------------------------------")
 
-def print_scores(condition, scores):
+def print_scores(condition, scores, interval=None):
     print(f"\n*** Performance analysis for Speaker Diarization for {condition} ***\n")
     
     def p(val): return val
@@ -117,21 +599,26 @@ def print_scores(condition, scores):
     print(f"  EVAL SPEECH = {eval_speech:10.2f} secs ({100*eval_speech/eval_time if eval_time else 0:5.1f} percent of evaluated time)")
     print(f"  SCORED TIME = {scored_time:10.2f} secs ({100*scored_time/eval_time if eval_time else 0:5.1f} percent of evaluated time)")
     print(f"SCORED SPEECH = {scored_speech:10.2f} secs ({100*scored_speech/scored_time if scored_time else 0:5.1f} percent of scored time)")
-    print(f"   EVAL WORDS = {scores['EVAL_WORDS']:7d}        ")
-    print(f" SCORED WORDS = {scores['SCORED_WORDS']:7d}         (100.0 percent of evaluated words)")
+    eval_words = scores['EVAL_WORDS']
+    scored_words = scores['SCORED_WORDS']
+    print(f"   EVAL WORDS = {eval_words:7d}        ")
+    print(f" SCORED WORDS = {scored_words:7d}         ({100*scored_words/eval_words if eval_words else 100:5.1f} percent of evaluated words)")
     print("---------------------------------------------")
     print(f"MISSED SPEECH = {scores['MISSED_SPEECH']:10.2f} secs ({100*scores['MISSED_SPEECH']/scored_time if scored_time else 0:5.1f} percent of scored time)")
     print(f"FALARM SPEECH = {scores['FALARM_SPEECH']:10.2f} secs ({100*scores['FALARM_SPEECH']/scored_time if scored_time else 0:5.1f} percent of scored time)")
-    print(f" MISSED WORDS =       0         (100.0 percent of scored words)")
+    print(f" MISSED WORDS = {scores['MISSED_WORDS']:7d}         ({100*scores['MISSED_WORDS']/scored_words if scored_words else 100:5.1f} percent of scored words)")
     print("---------------------------------------------")
     print(f"SCORED SPEAKER TIME = {scores['SCORED_SPEAKER']:10.2f} secs ({100*scores['SCORED_SPEAKER']/scored_speech if scored_speech else 0:5.1f} percent of scored speech)")
     print(f"MISSED SPEAKER TIME = {scores['MISSED_SPEAKER']:10.2f} secs ({100*scores['MISSED_SPEAKER']/scores['SCORED_SPEAKER'] if scores['SCORED_SPEAKER'] else 0:5.1f} percent of scored speaker time)")
     print(f"FALARM SPEAKER TIME = {scores['FALARM_SPEAKER']:10.2f} secs ({100*scores['FALARM_SPEAKER']/scores['SCORED_SPEAKER'] if scores['SCORED_SPEAKER'] else 0:5.1f} percent of scored speaker time)")
     print(f" SPEAKER ERROR TIME = {scores['SPEAKER_ERROR']:10.2f} secs ({100*scores['SPEAKER_ERROR']/scores['SCORED_SPEAKER'] if scores['SCORED_SPEAKER'] else 0:5.1f} percent of scored speaker time)")
-    print(f"SPEAKER ERROR WORDS =       0         (100.0 percent of scored speaker words)")
+    print(f"SPEAKER ERROR WORDS = {scores['ERROR_WORDS']:7d}         ({100*scores['ERROR_WORDS']/scored_words if scored_words else 100:5.1f} percent of scored speaker words)")
     print("---------------------------------------------")
     der = (scores['MISSED_SPEAKER'] + scores['FALARM_SPEAKER'] + scores['SPEAKER_ERROR']) / scores['SCORED_SPEAKER'] if scores['SCORED_SPEAKER'] else 0
     print(f" OVERALL SPEAKER DIARIZATION ERROR = {100*der:5.2f} percent of scored speaker time  `({condition})")
+    if interval is not None:
+        low, high, confidence = interval
+        print(f" {100*confidence:g}% BOOTSTRAP CONFIDENCE INTERVAL = [{low:5.2f}, {high:5.2f}] percent of scored speaker time")
     print("---------------------------------------------")
 
 if __name__ == '__main__':
@@ -0,0 +1,288 @@
+"""
+Frame-level speaker labels.
+
+Frame-level diarization systems emit one label per fixed-shift frame (10 ms
+typically). Instead of writing them out as thousands of tiny RTTM segments,
+the labels are run-length encoded in bulk into a `SegmentTable`, which the
+scoring engines then sweep with one event per run boundary rather than one
+per frame. Collar, UEM and overlap handling are exactly those of
+`score_speaker_diarization`.
+
+A recording's labels are either a 1-D integer array holding one speaker
+index per frame (negative for silence), or a 2-D (frames x speakers) activity
+matrix, which can also express overlapping speech. Speaker k is named `str(k)`.
+Frame i covers [i * frame_shift, (i + 1) * frame_shift).
+
+Label files:
+
+    .npy     one recording, named after the file, channel '1'
+    .npz     one array per recording, keyed `<file>` (channel '1') or
+             `<file>/<chnl>`; an optional `frame_shift` scalar overrides the
+             frame shift given on the command line
+    .frames  compact binary file written by `write_frames`:
+
+        header   magic, format version, recording count
+        per recording:
+                 file id, channel, speaker and frame counts, frame shift,
+                 then one bit-packed (MSB first) activity row per speaker
+
+`.frames` files are read without NumPy; `.npy`/`.npz` files require it.
+"""
+import os
+import struct
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .scoring import score_speaker_diarization
+from .segments import SegmentTable
+from .utils import Segment
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+DEFAULT_FRAME_SHIFT = 0.01
+FRAME_SUFFIXES = ('.npy', '.npz', '.frames')
+
+MAGIC = b'MDEVALFR'
+VERSION = 1
+# magic, version, recording count
+_HEADER = struct.Struct('<8sII')
+# file id length, channel length, n speakers, n frames, frame shift
+_RECORD = struct.Struct('<IIIQd')
+
+
+def is_frame_file(path: str) -> bool:
+    return path.endswith(FRAME_SUFFIXES)
+
+
+def _build_table(spkr, starts, ends, frame_shift: float) -> SegmentTable:
+    """SegmentTable of frame runs; only speakers that have runs are registered."""
+    table = SegmentTable()
+    if np is not None:
+        spkr = np.asarray(spkr, dtype=np.int64)
+        labels, ids = np.unique(spkr, return_inverse=True)
+        for label in labels.tolist():
+            table.speaker_id(str(label))
+        table.tbeg = array('d', (np.asarray(starts) * frame_shift).astype(np.float64).tobytes())
+        table.tend = array('d', (np.asarray(ends) * frame_shift).astype(np.float64).tobytes())
+        table.spkr = array('i', ids.astype(np.intc).tobytes())
+        return table
+    for k, start, end in zip(spkr, starts, ends):
+        table.append(str(k), start * frame_shift, (end - start) * frame_shift)
+    return table
+
+
+def _activity_runs(activity):
+    """(speaker, start, end) arrays of the runs in a (speakers x frames) bool matrix."""
+    edges = np.diff(activity.astype(np.int8), axis=1, prepend=0, append=0)
+    spkr, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return spkr, starts, ends
+
+
+def _label_runs(labels):
+    """(speaker, start, end) arrays of the runs of a 1-D label array, without silence."""
+    n_frames = len(labels)
+    if n_frames == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    change = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [n_frames]))
+    spkr = labels[starts]
+    keep = spkr >= 0
+    return spkr[keep], starts[keep], ends[keep]
+
+
+def _label_runs_python(labels: Sequence[int]):
+    spkr, starts, ends = [], [], []
+    prev = -1
+    for i, label in enumerate(labels):
+        if label != prev:
+            if prev >= 0:
+                ends.append(i)
+            if label >= 0:
+                spkr.append(label)
+                starts.append(i)
+            prev = label
+    if prev >= 0:
+        ends.append(len(labels))
+    return spkr, starts, ends
+
+
+def labels_to_table(labels, frame_shift: float = DEFAULT_FRAME_SHIFT) -> SegmentTable:
+    """
+    Run-length encode one recording's frame labels into a SegmentTable.
+
+    `labels` is a 1-D sequence of per-frame speaker indices (negative for
+    silence) or a 2-D (frames x speakers) activity matrix (NumPy only).
+    """
+    if np is None:
+        if len(labels) and isinstance(labels[0], (list, tuple)):
+            raise ImportError('2-D frame activity requires NumPy to be installed')
+        return _build_table(*_label_runs_python(labels), frame_shift)
+    labels = np.asarray(labels)
+    if labels.ndim == 1:
+        runs = _label_runs(labels.astype(np.int64))
+    elif labels.ndim == 2:
+        runs = _activity_runs(labels.T != 0)
+    else:
+        raise ValueError(f"frame labels must be 1-D or 2-D, got shape {labels.shape}")
+    return _build_table(*runs, frame_shift)
+
+
+def _activity_matrix(labels):
+    """(speakers x frames) bool activity of 1-D labels or a 2-D activity matrix."""
+    labels = np.asarray(labels)
+    if labels.ndim == 2:
+        return labels.T != 0
+    labels = labels.astype(np.int64)
+    n_spkrs = int(labels.max()) + 1 if len(labels) else 0
+    return labels[None, :] == np.arange(n_spkrs)[:, None]
+
+
+def _packed_runs(row: bytes, n_frames: int) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) runs of set bits in an MSB-first bit-packed row."""
+    start = None
+    for k, byte in enumerate(row):
+        # Whole bytes that continue the current state.
+        if byte == (0 if start is None else 0xFF):
+            continue
+        for b in range(8):
+            frame = 8 * k + b
+            if byte >> (7 - b) & 1:
+                if start is None:
+                    start = frame
+            elif start is not None:
+                yield start, frame
+                start = None
+    if start is not None:
+        yield start, n_frames
+
+
+def write_frames(path: str, recordings: Dict[str, Dict[str, Any]], frame_shift: float = DEFAULT_FRAME_SHIFT):
+    """
+    Write {file: {chnl: labels}} to a compact `.frames` file. Labels are
+    1-D speaker indices or 2-D activity matrices as for labels_to_table.
+    """
+    if np is None:
+        raise ImportError('write_frames requires NumPy to be installed')
+    n_recordings = sum(len(chnls) for chnls in recordings.values())
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, n_recordings))
+        for file in sorted(recordings):
+            for chnl in sorted(recordings[file]):
+                activity = _activity_matrix(recordings[file][chnl])
+                n_spkrs, n_frames = activity.shape
+                file_id = file.encode()
+                chnl_id = chnl.encode()
+                f.write(_RECORD.pack(len(file_id), len(chnl_id), n_spkrs, n_frames, frame_shift))
+                f.write(file_id)
+                f.write(chnl_id)
+                f.write(np.packbits(activity, axis=1).tobytes())
+    os.replace(tmp_path, path)
+
+
+class FrameData(Mapping):
+    """
+    Read-only {file: {chnl: {'SPEAKER': SegmentTable, 'LEXEME': []}}} view of
+    a frame label file, like load_rttm(columnar=True). Recordings are only
+    run-length encoded when they are looked up.
+    """
+
+    def __init__(self, path: str, frame_shift: float = DEFAULT_FRAME_SHIFT):
+        self.path = path
+        self.frame_shift = frame_shift
+        self._index = {} # {file: {chnl: source}}
+        if path.endswith('.frames'):
+            with open(path, 'rb') as f:
+                self._data = f.read()
+            self._index_frames()
+            return
+        if np is None:
+            raise ImportError(f"reading {path} requires NumPy to be installed")
+        if path.endswith('.npz'):
+            self._data = np.load(path)
+            if 'frame_shift' in self._data.files:
+                self.frame_shift = float(self._data['frame_shift'])
+            for key in self._data.files:
+                if key != 'frame_shift':
+                    file, _, chnl = key.partition('/')
+                    self._index.setdefault(file, {})[chnl or '1'] = key
+        else:
+            self._data = None
+            name = os.path.basename(path)[:-len('.npy')]
+            self._index[name] = {'1': path}
+
+    def _index_frames(self):
+        data = self._data
+        magic, version, n_recordings = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} mdeval frame file")
+        offset = _HEADER.size
+        for _ in range(n_recordings):
+            file_len, chnl_len, n_spkrs, n_frames, frame_shift = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            file = data[offset:offset + file_len].decode()
+            offset += file_len
+            chnl = data[offset:offset + chnl_len].decode()
+            offset += chnl_len
+            self._index.setdefault(file, {})[chnl] = (offset, n_spkrs, n_frames, frame_shift)
+            offset += n_spkrs * ((n_frames + 7) // 8)
+
+    def _load(self, source) -> SegmentTable:
+        if isinstance(source, tuple):
+            return self._load_packed(*source)
+        if self._data is None:
+            return labels_to_table(np.load(source), self.frame_shift)
+        return labels_to_table(self._data[source], self.frame_shift)
+
+    def _load_packed(self, offset: int, n_spkrs: int, n_frames: int, frame_shift: float) -> SegmentTable:
+        row_bytes = (n_frames + 7) // 8
+        block = self._data[offset:offset + n_spkrs * row_bytes]
+        if np is not None:
+            packed = np.frombuffer(block, dtype=np.uint8).reshape(n_spkrs, row_bytes)
+            activity = np.unpackbits(packed, axis=1, count=n_frames).astype(bool)
+            return _build_table(*_activity_runs(activity), frame_shift)
+        spkr, starts, ends = [], [], []
+        for k in range(n_spkrs):
+            for start, end in _packed_runs(block[k * row_bytes:(k + 1) * row_bytes], n_frames):
+                spkr.append(k)
+                starts.append(start)
+                ends.append(end)
+        return _build_table(spkr, starts, ends, frame_shift)
+
+    def __getitem__(self, file: str) -> Dict[str, Dict[str, Any]]:
+        return {chnl: {'SPEAKER': self._load(source), 'LEXEME': []}
+                for chnl, source in self._index[file].items()}
+
+    def __contains__(self, file) -> bool:
+        return file in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def load_frames(path: str, frame_shift: float = DEFAULT_FRAME_SHIFT) -> FrameData:
+    """Open a .npy, .npz or .frames label file as a recording mapping."""
+    if not is_frame_file(path):
+        raise ValueError(f"{path} is not a frame label file ({', '.join(FRAME_SUFFIXES)})")
+    return FrameData(path, frame_shift)
+
+
+def score_frames(file: str, chnl: str, ref_data, labels, uem_eval: List[Segment],
+                 frame_shift: float = DEFAULT_FRAME_SHIFT, collar: float = 0.0,
+                 ignore_overlap: bool = False, backend: Optional[str] = None):
+    """
+    score_speaker_diarization with the SYS side given as frame labels.
+    Returns (stats, spkr_map).
+    """
+    return score_speaker_diarization(file, chnl, ref_data, labels_to_table(labels, frame_shift),
+                                     uem_eval, collar, ignore_overlap, backend)
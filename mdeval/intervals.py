@@ -0,0 +1,197 @@
+"""
+Array-backed interval sets.
+
+An `IntervalSet` holds sorted, disjoint intervals as two parallel
+`array('d')` columns. Union, intersection, difference and dilation are
+linear merges of two such sets, so evaluation maps, collars and overlap
+regions are combined without building event lists or sorting them again.
+Touching intervals are joined and empty ones dropped, so every set has a
+single representation.
+"""
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Sequence
+
+from .utils import Segment
+
+
+class IntervalSet:
+    """
+    Sorted, disjoint, non-touching intervals [tbeg[i], tend[i]].
+
+    Iterating yields `Segment`s, so a set can be passed wherever a list of
+    UEM segments is expected.
+    """
+    __slots__ = ('tbeg', 'tend')
+
+    def __init__(self):
+        self.tbeg = array('d')
+        self.tend = array('d')
+
+    @classmethod
+    def from_pairs(cls, tbeg: Sequence[float], tend: Sequence[float]) -> 'IntervalSet':
+        """Build a set from parallel start/end sequences in any order."""
+        if any(tbeg[i] > tbeg[i + 1] for i in range(len(tbeg) - 1)):
+            order = sorted(range(len(tbeg)), key=tbeg.__getitem__)
+            tbeg = [tbeg[i] for i in order]
+            tend = [tend[i] for i in order]
+        return cls._from_sorted(tbeg, tend)
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Segment]) -> 'IntervalSet':
+        """Build a set from Segments (returned as is if already a set)."""
+        if isinstance(segments, IntervalSet):
+            return segments
+        segments = list(segments)
+        return cls.from_pairs([s.tbeg for s in segments], [s.tend for s in segments])
+
+    @classmethod
+    def around(cls, points: Iterable[float], radius: float) -> 'IntervalSet':
+        """The union of [p - radius, p + radius] over all points p."""
+        points = sorted(points)
+        return cls._from_sorted([p - radius for p in points], [p + radius for p in points])
+
+    @classmethod
+    def coverage(cls, tbeg: Sequence[float], tend: Sequence[float], depth: int) -> 'IntervalSet':
+        """
+        Where at least `depth` of the intervals [tbeg[i], tend[i]] overlap.
+        Intervals that only touch do not overlap.
+        """
+        begs = sorted(b for b, e in zip(tbeg, tend) if e > b)
+        ends = sorted(e for b, e in zip(tbeg, tend) if e > b)
+        out_beg, out_end = [], []
+        n = len(begs)
+        i = j = count = 0
+        start = 0.0
+        while i < n:
+            # Ends sort before begins at the same time.
+            if ends[j] <= begs[i]:
+                if count == depth:
+                    out_beg.append(start)
+                    out_end.append(ends[j])
+                count -= 1
+                j += 1
+            else:
+                count += 1
+                if count == depth:
+                    start = begs[i]
+                i += 1
+        if count >= depth:
+            out_beg.append(start)
+            out_end.append(ends[j + count - depth])
+        # A region that ends where the next one starts is joined with it here.
+        return cls._from_sorted(out_beg, out_end)
+
+    @classmethod
+    def _from_sorted(cls, tbeg: Iterable[float], tend: Iterable[float]) -> 'IntervalSet':
+        """Join the overlapping and touching intervals of pairs sorted by start."""
+        out_beg, out_end = [], []
+        last = None
+        for b, e in zip(tbeg, tend):
+            if e <= b:
+                continue
+            if last is not None and b <= last:
+                if e > last:
+                    out_end[-1] = last = e
+                continue
+            out_beg.append(b)
+            out_end.append(e)
+            last = e
+        return cls._of(out_beg, out_end)
+
+    @classmethod
+    def _of(cls, tbeg: Iterable[float], tend: Iterable[float]) -> 'IntervalSet':
+        """Wrap columns that already form a valid set."""
+        out = cls()
+        out.tbeg.extend(tbeg)
+        out.tend.extend(tend)
+        return out
+
+    def union(self, other: 'IntervalSet') -> 'IntervalSet':
+        a_beg, a_end, b_beg, b_end = self.tbeg, self.tend, other.tbeg, other.tend
+        tbeg, tend = [], []
+        i = j = 0
+        n, m = len(a_beg), len(b_beg)
+        while i < n or j < m:
+            if j == m or (i < n and a_beg[i] <= b_beg[j]):
+                tbeg.append(a_beg[i])
+                tend.append(a_end[i])
+                i += 1
+            else:
+                tbeg.append(b_beg[j])
+                tend.append(b_end[j])
+                j += 1
+        return IntervalSet._from_sorted(tbeg, tend)
+
+    def intersect(self, other: 'IntervalSet') -> 'IntervalSet':
+        # Pieces cut from two sets of non-touching intervals never touch.
+        a_beg, a_end, b_beg, b_end = self.tbeg, self.tend, other.tbeg, other.tend
+        tbeg, tend = [], []
+        i = j = 0
+        n, m = len(a_beg), len(b_beg)
+        while i < n and j < m:
+            b = max(a_beg[i], b_beg[j])
+            if a_end[i] < b_end[j]:
+                e = a_end[i]
+                i += 1
+            else:
+                e = b_end[j]
+                j += 1
+            if e > b:
+                tbeg.append(b)
+                tend.append(e)
+        return IntervalSet._of(tbeg, tend)
+
+    def difference(self, other: 'IntervalSet') -> 'IntervalSet':
+        b_beg, b_end = other.tbeg, other.tend
+        tbeg, tend = [], []
+        j = 0
+        m = len(b_beg)
+        for b, e in zip(self.tbeg, self.tend):
+            while j < m and b_end[j] <= b:
+                j += 1
+            # Interval j may also cut into the next interval, so scan from a copy.
+            k = j
+            while k < m and b_beg[k] < e:
+                if b_beg[k] > b:
+                    tbeg.append(b)
+                    tend.append(b_beg[k])
+                if b_end[k] > b:
+                    b = b_end[k]
+                k += 1
+            if e > b:
+                tbeg.append(b)
+                tend.append(e)
+        return IntervalSet._of(tbeg, tend)
+
+    def dilate(self, amount: float) -> 'IntervalSet':
+        """Widen every interval by `amount` on both sides (narrow if negative)."""
+        return IntervalSet._from_sorted([b - amount for b in self.tbeg], [e + amount for e in self.tend])
+
+    def total_duration(self) -> float:
+        return sum(e - b for b, e in zip(self.tbeg, self.tend))
+
+    def segments(self) -> List[Segment]:
+        return [Segment(b, e) for b, e in zip(self.tbeg, self.tend)]
+
+    def __contains__(self, time: float) -> bool:
+        """Whether `time` falls in some [tbeg, tend) (binary search)."""
+        i = bisect_right(self.tbeg, time) - 1
+        return i >= 0 and time < self.tend[i]
+
+    def __iter__(self) -> Iterator[Segment]:
+        return (Segment(b, e) for b, e in zip(self.tbeg, self.tend))
+
+    def __getitem__(self, i: int) -> Segment:
+        return Segment(self.tbeg[i], self.tend[i])
+
+    def __len__(self) -> int:
+        return len(self.tbeg)
+
+    def __eq__(self, other):
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self.tbeg == other.tbeg and self.tend == other.tend
+
+    def __repr__(self):
+        return f"IntervalSet({', '.join(f'[{b:.2f}, {e:.2f}]' for b, e in zip(self.tbeg, self.tend))})"
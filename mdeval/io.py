@@ -1,64 +1,616 @@
-import re
-from typing import Dict, List, Any
+import bz2
+import gzip
+import io
+import itertools
+import lzma
+import operator
+import os
+import queue
+import sys
+import threading
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Sequence, Tuple
+from .segments import SegmentTable
 from .utils import Segment
 
-def load_rttm(file_path: str) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+RTTM_TYPES = ('SPEAKER', 'LEXEME')
+
+# Input path that reads standard input.
+STDIN = '-'
+# Compressed inputs are recognized by their first bytes.
+COMPRESSION_MAGIC = ((b'\x1f\x8b', 'gzip'), (b'BZh', 'bz2'), (b'\xfd7zXZ\x00', 'xz'))
+_DECOMPRESSORS = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz')
+
+# Per-recording RTTM files in directories, and list files naming them.
+RTTM_SUFFIX = '.rttm'
+LIST_SUFFIXES = ('.lst', '.list')
+# Recordings read ahead by RttmFiles.prefetch, and its reader threads.
+DEFAULT_PREFETCH = 16
+PREFETCH_THREADS = 4
+
+# Read size used by the block parsers.
+BLOCK_SIZE = 1 << 24
+
+def _detect_compression(head: bytes) -> Optional[str]:
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+def input_compression(path: str) -> Optional[str]:
+    """'gzip', 'bz2' or 'xz' if the file at path is compressed, else None."""
+    with open(path, 'rb') as f:
+        return _detect_compression(f.read(6))
+
+def is_plain_file(path: str) -> bool:
+    """True for an uncompressed file, which can be indexed and read at random offsets."""
+    return path != STDIN and input_compression(path) is None
+
+class _ThreadedReader:
+    """
+    Binary stream wrapper that reads `block_size` blocks of the wrapped
+    stream on a background thread, up to `depth` blocks ahead, so that
+    decompression (which releases the GIL) overlaps with parsing.
+    """
+
+    def __init__(self, stream, block_size: int = BLOCK_SIZE, depth: int = 2):
+        self.stream = stream
+        self.block_size = block_size
+        self._blocks = queue.Queue(depth)
+        self._buffer = b''
+        self._eof = False
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._closing:
+                block = self.stream.read(self.block_size)
+                self._put(block)
+                if not block:
+                    return
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._closing:
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = [self._buffer] if self._buffer else []
+        n = len(self._buffer)
+        while not self._eof and (size < 0 or n < size):
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            if not block:
+                self._eof = True
+                break
+            chunks.append(block)
+            n += len(block)
+        # A single whole block is returned without copying it.
+        data = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+        self._buffer = b''
+        if 0 <= size < len(data):
+            self._buffer = data[size:]
+            data = data[:size]
+        return data
+
+    def close(self):
+        self._closing = True
+        self._thread.join()
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_input(path: str, text: bool = False, threaded: bool = False):
+    """
+    Open an input file for reading. '-' reads standard input, and gzip, bz2
+    and xz input (detected by magic bytes, not by name) is decompressed as
+    it is read, without a temporary copy. With threaded, compressed and
+    piped binary input is read ahead on a background thread.
+    """
+    if path == STDIN:
+        raw = open(sys.stdin.fileno(), 'rb', closefd=False)
+    else:
+        raw = open(path, 'rb')
+    compression = _detect_compression(raw.peek(6)[:6])
+    stream = raw
+    if compression is not None:
+        if path != STDIN:
+            # Let the decompressor own the file, so closing it closes both.
+            raw.close()
+            raw = path
+        stream = _DECOMPRESSORS[compression](raw)
+    if text:
+        return io.TextIOWrapper(stream)
+    if threaded and (compression is not None or path == STDIN):
+        return _ThreadedReader(stream)
+    return stream
+
+def _parse_rttm_fields(line: str) -> Optional[Tuple[str, str, str, float, float, str, str]]:
+    line = line.strip()
+    if not line or line.startswith(';') or line.startswith('#'):
+        return None
+    parts = line.split()
+    if len(parts) < 9:
+        return None
+    
+    type_ = parts[0] # SPEAKER, LEXEME etc
+    file = parts[1]
+    chnl = parts[2]
+    tbeg = float(parts[3])
+    tdur_str = parts[4]
+    tdur = 0.0 if tdur_str == '<NA>' else float(tdur_str)
+    
+    # parts[5] ortho
+    # parts[6] subtype
+    # parts[7] speaker name
+    
+    return type_, file, chnl, tbeg, tdur, parts[6], parts[7]
+
+def _entry(fields: Tuple[str, str, str, float, float, str, str]) -> Dict[str, Any]:
+    type_, file, chnl, tbeg, tdur, subt, spkr = fields
+    return {
+        'TYPE': type_,
+        'FILE': file,
+        'CHNL': chnl,
+        'TBEG': tbeg,
+        'TDUR': tdur,
+        'TEND': tbeg + tdur,
+        'SPKR': spkr,
+        'SUBT': subt
+    }
+
+def parse_rttm_line(line: str) -> Optional[Dict[str, Any]]:
+    fields = _parse_rttm_fields(line)
+    if fields is None:
+        return None
+    return _entry(fields)
+
+def _add_fields(recording: Dict[str, Dict[str, Any]], fields: Tuple[str, str, str, float, float, str, str],
+                types: Sequence[str] = RTTM_TYPES, columnar: bool = False):
+    """
+    Add one parsed RTTM row to recording ({chnl: {'SPEAKER': ..., 'LEXEME': [...]}}).
+    With columnar=True SPEAKER rows go into a SegmentTable without building a
+    dict per row.
+    """
+    type_, file, chnl, tbeg, tdur, subt, spkr = fields
+    if chnl not in recording:
+        recording[chnl] = {'SPEAKER': SegmentTable() if columnar else [], 'LEXEME': []}
+    if type_ in types:
+        if columnar and type_ == 'SPEAKER':
+            recording[chnl]['SPEAKER'].append(spkr, tbeg, tdur)
+        else:
+            recording[chnl][type_].append(_entry(fields))
+    # Add other types if needed
+
+def load_rttm(file_path: str, columnar: bool = False) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Load an RTTM file into {file: {chnl: {'SPEAKER': [...], 'LEXEME': [...]}}}.
+    With columnar=True the SPEAKER rows of each channel are a SegmentTable.
+    """
     data = {}
-    with open(file_path, 'r') as f:
+    with open_input(file_path, text=True) as f:
         for line in f:
-            line = line.strip()
-            if not line or line.startswith(';') or line.startswith('#'):
+            fields = _parse_rttm_fields(line)
+            if fields is None:
                 continue
-            parts = re.split(r'\s+', line)
-            if len(parts) < 9:
-                continue
-            
-            type_ = parts[0] # SPEAKER, LEXEME etc
-            file = parts[1]
-            chnl = parts[2]
-            tbeg = float(parts[3])
-            tdur_str = parts[4]
-            tdur = 0.0 if tdur_str == '<NA>' else float(tdur_str)
-            
-            # parts[5] ortho
-            # parts[6] subtype
-            # parts[7] speaker name
-            
-            spkr = parts[7]
-            
+            file = fields[1]
             if file not in data:
                 data[file] = {}
-            if chnl not in data[file]:
-                data[file][chnl] = {'SPEAKER': [], 'LEXEME': []}
-                
-            entry = {
-                'TYPE': type_,
-                'FILE': file,
-                'CHNL': chnl,
-                'TBEG': tbeg,
-                'TDUR': tdur,
-                'TEND': tbeg + tdur,
-                'SPKR': spkr,
-                'SUBT': parts[6] if len(parts) > 6 else '<NA>'
-            }
-            
-            if type_ == 'SPEAKER':
-                data[file][chnl]['SPEAKER'].append(entry)
-            elif type_ == 'LEXEME':
-                 data[file][chnl]['LEXEME'].append(entry)
-            # Add other types if needed
+            _add_fields(data[file], fields, columnar=columnar)
             
     return data
 
+def _iter_blocks(f, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Yield chunks of a binary file that always end on a line boundary."""
+    tail = b''
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        block = tail + block
+        cut = block.rfind(b'\n') + 1
+        tail = block[cut:]
+        if cut:
+            yield block[:cut]
+    if tail:
+        yield tail
+
+def _scan_speaker_rows(block: bytes, columns: Dict[Tuple[bytes, bytes], Tuple[list, list, list]],
+                       words: Optional[Dict[Tuple[bytes, bytes], Tuple[list, list, list]]] = None):
+    """
+    Collect the raw SPKR/TBEG/TDUR tokens of SPEAKER rows in block, grouped
+    by (file, chnl), and those of LEXEME rows into `words` if given. Rows of
+    other types only register their channel, like load_rttm does; comments
+    are skipped.
+    """
+    if _scan_regular_block(block, columns):
+        return
+    last_key = None
+    cols = None
+    for line in block.split(b'\n'):
+        parts = line.split()
+        if len(parts) < 9 or parts[0][:1] in (b';', b'#'):
+            continue
+        key = (parts[1], parts[2])
+        if key != last_key:
+            cols = columns.get(key)
+            if cols is None:
+                cols = columns[key] = ([], [], [])
+            last_key = key
+        if parts[0] != b'SPEAKER':
+            if words is not None and parts[0] == b'LEXEME':
+                word_cols = words.setdefault(key, ([], [], []))
+                word_cols[0].append(parts[7])
+                word_cols[1].append(parts[3])
+                word_cols[2].append(parts[4])
+            continue
+        cols[0].append(parts[7])
+        cols[1].append(parts[3])
+        cols[2].append(parts[4])
+
+def _scan_regular_block(block: bytes, columns: Dict[Tuple[bytes, bytes], Tuple[list, list, list]]) -> bool:
+    """
+    Fast path of _scan_speaker_rows for blocks made only of 10-field SPEAKER
+    rows: split the whole block at once and slice the columns out of the
+    token list. Returns False (without touching columns) for any other block.
+    """
+    n_lines = block.count(b'\n') + (not block.endswith(b'\n'))
+    tokens = block.split()
+    if len(tokens) != 10 * n_lines or tokens[0::10].count(b'SPEAKER') != n_lines:
+        return False
+    files = tokens[1::10]
+    chnls = tokens[2::10]
+    spkrs = tokens[7::10]
+    tbegs = tokens[3::10]
+    tdurs = tokens[4::10]
+    # Split into runs of consecutive rows from the same recording.
+    changed = map(operator.or_, map(operator.ne, files[1:], files), map(operator.ne, chnls[1:], chnls))
+    starts = [0, *itertools.compress(range(1, n_lines), changed), n_lines]
+    for start, end in zip(starts, starts[1:]):
+        key = (files[start], chnls[start])
+        cols = columns.get(key)
+        if cols is None:
+            cols = columns[key] = ([], [], [])
+        cols[0].extend(spkrs[start:end])
+        cols[1].extend(tbegs[start:end])
+        cols[2].extend(tdurs[start:end])
+    return True
+
+def _to_floats(tokens: List[bytes], use_numpy: bool) -> array:
+    try:
+        if use_numpy:
+            return array('d', np.array(tokens).astype(np.float64).tobytes())
+        return array('d', map(float, tokens))
+    except ValueError:
+        # '<NA>' durations
+        return array('d', [0.0 if t == b'<NA>' else float(t) for t in tokens])
+
+def _build_table(spkrs: List[bytes], tbegs: List[bytes], tdurs: List[bytes], use_numpy: bool) -> SegmentTable:
+    table = SegmentTable()
+    table.tbeg = _to_floats(tbegs, use_numpy)
+    tdur = _to_floats(tdurs, use_numpy)
+    table.tend = array('d', map(float.__add__, table.tbeg, tdur))
+    ids = {name: table.speaker_id(name.decode()) for name in dict.fromkeys(spkrs)}
+    table.spkr = array('i', map(ids.__getitem__, spkrs))
+    return table
+
+def _tables_from_columns(columns, use_numpy: bool = False, words=None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    data = {}
+    for key, (spkrs, tbegs, tdurs) in columns.items():
+        file, chnl = key
+        word_cols = words.get(key) if words else None
+        recording = data.setdefault(file.decode(), {})
+        recording[chnl.decode()] = {'SPEAKER': _build_table(spkrs, tbegs, tdurs, use_numpy),
+                                    'LEXEME': _build_table(*word_cols, use_numpy) if word_cols else []}
+    return data
+
+def load_rttm_fast(file_path: str, use_numpy: bool = False, block_size: int = BLOCK_SIZE,
+                   words: bool = False) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    High-throughput loader for the SPEAKER rows of an RTTM file.
+
+    Reads the file in large binary blocks, splits lines with bytes.split,
+    keeps only the FILE/CHNL/TBEG/TDUR/NAME columns and converts times in bulk
+    per recording (through NumPy if use_numpy is True). Returns the same
+    structure as load_rttm(file_path, columnar=True) without LEXEME rows,
+    or with words, with the LEXEME rows of each channel as a SegmentTable.
+    """
+    if use_numpy and np is None:
+        raise ImportError('load_rttm_fast(use_numpy=True) requires NumPy to be installed')
+    columns = {}
+    word_columns = {} if words else None
+    with open_input(file_path, threaded=True) as f:
+        for block in _iter_blocks(f, block_size):
+            _scan_speaker_rows(block, columns, word_columns)
+    return _tables_from_columns(columns, use_numpy, word_columns)
+
+def parse_rttm_fast(data: bytes, use_numpy: bool = False, words: bool = False) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """load_rttm_fast for RTTM content that is already in memory."""
+    if use_numpy and np is None:
+        raise ImportError('parse_rttm_fast(use_numpy=True) requires NumPy to be installed')
+    columns = {}
+    word_columns = {} if words else None
+    _scan_speaker_rows(data, columns, word_columns)
+    return _tables_from_columns(columns, use_numpy, word_columns)
+
+class RttmIndex(Mapping):
+    """
+    Read-only {file: {chnl: {'SPEAKER': [...], 'LEXEME': [...]}}} view of an
+    RTTM file that keeps only byte offsets in memory.
+
+    The index is built in one pass and stores, for every recording, the byte
+    spans of its lines (a single span when the file is sorted by recording).
+    Looking up a recording seeks to its spans and parses only those lines, so
+    memory is bounded by the largest recording instead of the whole file.
+    Row types not listed in `types` are dropped while parsing, and with
+    columnar=True SPEAKER rows are returned as a SegmentTable (LEXEME rows
+    too, when types holds only SPEAKER and LEXEME).
+    """
+
+    def __init__(self, file_path: str, types: Sequence[str] = RTTM_TYPES, columnar: bool = False):
+        if not is_plain_file(file_path):
+            raise ValueError(f"{file_path} is compressed or piped and cannot be indexed; load it with load_rttm_fast")
+        self.file_path = file_path
+        self.types = tuple(types)
+        self.columnar = columnar
+        self.spans = {} # {file: [[start, end], ...]}
+        offset = 0
+        last_file = None
+        with open(file_path, 'rb') as f:
+            for block in _iter_blocks(f):
+                for line in block.splitlines(True):
+                    start = offset
+                    offset += len(line)
+                    parts = line.split()
+                    if len(parts) < 9 or parts[0][:1] in (b';', b'#'):
+                        continue
+                    file = parts[1].decode()
+                    spans = self.spans.get(file)
+                    if spans is None:
+                        self.spans[file] = [[start, offset]]
+                    elif file == last_file and spans[-1][1] == start:
+                        spans[-1][1] = offset
+                    else:
+                        spans.append([start, offset])
+                    last_file = file
+
+    @property
+    def is_sorted(self) -> bool:
+        """True when every recording occupies one contiguous block of lines."""
+        return all(len(spans) == 1 for spans in self.spans.values())
+
+    def __getitem__(self, file: str) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        if self.columnar and self.types in (('SPEAKER',), ('SPEAKER', 'LEXEME')):
+            # Only SPEAKER (and LEXEME) rows are needed: use the block parser.
+            columns = {}
+            words = {} if 'LEXEME' in self.types else None
+            with open(self.file_path, 'rb') as f:
+                for start, end in self.spans[file]:
+                    f.seek(start)
+                    _scan_speaker_rows(f.read(end - start), columns, words)
+            return _tables_from_columns(columns, words=words).get(file, {})
+
+        recording = {}
+        with open(self.file_path, 'rb') as f:
+            for start, end in self.spans[file]:
+                f.seek(start)
+                for line in f.read(end - start).decode().splitlines():
+                    fields = _parse_rttm_fields(line)
+                    if fields is not None:
+                        _add_fields(recording, fields, self.types, self.columnar)
+        return recording
+
+    def __contains__(self, file) -> bool:
+        # Mapping's default would parse the recording through __getitem__.
+        return file in self.spans
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.spans)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+def iter_rttm(file_path: str, presorted: bool = False, types: Sequence[str] = RTTM_TYPES,
+              columnar: bool = False) -> Iterator[Tuple[str, Dict[str, Dict[str, Any]]]]:
+    """
+    Yield (file, {chnl: {'SPEAKER': [...], 'LEXEME': [...]}}) one recording at a time.
+
+    If presorted is True the RTTM is streamed directly and must keep the lines of
+    each recording contiguous (a ValueError is raised otherwise); recordings are
+    yielded in file order. Otherwise a one-pass byte-offset index is built first
+    and recordings are yielded sorted by file id.
+    """
+    if not presorted:
+        if not is_plain_file(file_path):
+            # Compressed or piped input cannot be indexed: read it all.
+            data = {}
+            with open_input(file_path, text=True) as f:
+                for fields in filter(None, map(_parse_rttm_fields, f)):
+                    _add_fields(data.setdefault(fields[1], {}), fields, types, columnar)
+            for file in sorted(data):
+                yield file, data[file]
+            return
+        index = RttmIndex(file_path, types, columnar)
+        for file in sorted(index):
+            yield file, index[file]
+        return
+
+    seen = set()
+    current_file = None
+    recording = {}
+    with open_input(file_path, text=True) as f:
+        for line in f:
+            fields = _parse_rttm_fields(line)
+            if fields is None:
+                continue
+            file = fields[1]
+            if file != current_file:
+                if current_file is not None:
+                    yield current_file, recording
+                if file in seen:
+                    raise ValueError(f"{file_path} is not grouped by recording: {file} appears in several blocks")
+                current_file = file
+                seen.add(current_file)
+                recording = {}
+            _add_fields(recording, fields, types, columnar)
+    if current_file is not None:
+        yield current_file, recording
+
+def is_rttm_collection(path: str) -> bool:
+    """True for a directory of RTTM files or a list file (.lst/.list) naming them."""
+    return os.path.isdir(path) or path.endswith(LIST_SUFFIXES)
+
+def rttm_paths(path: str) -> Dict[str, str]:
+    """
+    {recording id: RTTM path} of a directory (searched recursively for
+    *.rttm, also compressed as *.rttm.gz/.bz2/.xz) or of a list file with one
+    path per line (relative paths are resolved against the list file's
+    directory). The recording id is the file name without its extensions.
+    """
+    if os.path.isdir(path):
+        found = []
+        suffixes = (RTTM_SUFFIX,) + tuple(RTTM_SUFFIX + suffix for suffix in COMPRESSED_SUFFIXES)
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            found.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(suffixes))
+    else:
+        base = os.path.dirname(path)
+        with open(path) as f:
+            lines = (line.strip() for line in f)
+            found = [os.path.join(base, line) for line in lines if line and not line.startswith(('#', ';'))]
+    paths = {}
+    for file_path in found:
+        file = os.path.basename(file_path)
+        if file.endswith(COMPRESSED_SUFFIXES):
+            file = os.path.splitext(file)[0]
+        if file.endswith(RTTM_SUFFIX):
+            file = file[:-len(RTTM_SUFFIX)]
+        if file in paths:
+            raise ValueError(f"{path}: recording {file} is given by both {paths[file]} and {file_path}")
+        paths[file] = file_path
+    return paths
+
+class RttmFiles(Mapping):
+    """
+    Read-only {file: {chnl: {'SPEAKER': SegmentTable}}} view of one RTTM
+    file per recording, from a directory or a list file (see rttm_paths).
+
+    A recording is read and parsed when it is looked up. After
+    `prefetch(order)`, a small thread pool reads the next `depth` recordings
+    of `order` ahead of the lookups, so filesystem latency overlaps with
+    scoring while at most `depth` parsed recordings wait in memory.
+    Lookups out of that order are read directly. With words, LEXEME rows
+    are kept as a SegmentTable too.
+    """
+
+    def __init__(self, path: str, depth: int = DEFAULT_PREFETCH, threads: int = PREFETCH_THREADS,
+                 words: bool = False):
+        self.path = path
+        self.words = words
+        self.paths = rttm_paths(path)
+        self.depth = depth
+        self.threads = threads
+        self._executor = None
+        self._order = iter(())
+        self._window = deque() # (file, future) being read ahead, in lookup order
+        self._pending = set() # files in _window
+
+    def _read(self, file: str) -> Dict[str, Dict[str, Any]]:
+        with open_input(self.paths[file]) as f:
+            data = parse_rttm_fast(f.read(), words=self.words)
+        if not data:
+            return {}
+        if file in data:
+            recording = data.pop(file)
+        elif len(data) == 1:
+            # The file id inside differs from the file name; the name wins.
+            recording = data.popitem()[1]
+        else:
+            raise ValueError(f"{self.paths[file]} holds several recordings: {', '.join(sorted(data))}")
+        return recording
+
+    def prefetch(self, order: Iterable[str]):
+        """Start reading the recordings of `order` (in that order) ahead of their lookup."""
+        self.close()
+        if self.depth <= 0:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(self.threads, self.depth)))
+        self._order = (file for file in order if file in self.paths)
+        self._fill()
+
+    def _fill(self):
+        while len(self._window) < self.depth:
+            file = next(self._order, None)
+            if file is None:
+                return
+            self._window.append((file, self._executor.submit(self._read, file)))
+            self._pending.add(file)
+
+    def close(self):
+        """Stop prefetching and drop the recordings read ahead."""
+        for _, future in self._window:
+            future.cancel()
+        self._window.clear()
+        self._pending.clear()
+        self._order = iter(())
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __getitem__(self, file: str) -> Dict[str, Dict[str, Any]]:
+        if file not in self.paths:
+            raise KeyError(file)
+        if file not in self._pending:
+            return self._read(file)
+        # Recordings ahead of this one in the window were skipped by the caller.
+        while True:
+            key, future = self._window.popleft()
+            self._pending.discard(key)
+            if key == file:
+                break
+            future.cancel()
+        self._fill()
+        return future.result()
+
+    def __contains__(self, file) -> bool:
+        return file in self.paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
 def load_uem(file_path: str) -> Dict[str, Dict[str, List[Segment]]]:
     # UEM format: FILE CHNL TBEG TEND
     data = {}
-    with open(file_path, 'r') as f:
+    with open_input(file_path, text=True) as f:
         for line in f:
             line = line.strip()
             if not line or line.startswith(';') or line.startswith('#'):
                 continue
-            parts = re.split(r'\s+', line)
+            parts = line.split()
             if len(parts) < 4:
                 continue
             
@@ -1,227 +1,256 @@
-import sys
+"""
+Linear sum assignment solver.
 
-def linear_sum_assignment(cost_matrix):
+Implements the shortest augmenting path variant of the Jonker-Volgenant
+algorithm (as described by Crouse, "On implementing 2D rectangular assignment
+algorithms", 2016). Rectangular matrices are handled natively without padding,
+and the whole solve is O(n^2 m) for an n x m matrix with n <= m.
+
+NumPy is used to vectorize the inner column scan for large matrices when it is
+importable; otherwise a pure Python implementation is used.
+`max_weight_matching` runs the same algorithm over a sparse graph.
+"""
+import heapq
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+INF = float('inf')
+
+# Below this number of columns the pure Python scan beats numpy call overhead.
+NUMPY_MIN_COLS = 64
+
+
+def linear_sum_assignment(cost_matrix) -> Tuple[List[int], List[int]]:
     """
-    Solve the linear sum assignment problem using the Hungarian algorithm (Munkres algorithm).
+    Solve the linear sum assignment problem.
     Minimizes the total cost.
-    Input: cost_matrix (list of lists of numbers)
-    Output: row_ind, col_ind (lists of indices)
+    Input: cost_matrix (list of lists of numbers, or a 2-D numpy array)
+    Output: row_ind, col_ind (lists of indices, sorted by row index)
     """
-    C = [row[:] for row in cost_matrix]
-    n_rows = len(C)
-    n_cols = len(C[0])
-    
-    # Ensure square matrix by padding with zeros if necessary (or large values for min cost?)
-    # For min cost, padding with 0 might attract assignments?
-    # If we want to force assignment of all rows (if rows <= cols), we want true min cost.
-    # If we pad with 0s, the algorithm might pick 0s.
-    # Scipy linear_sum_assignment handles rectangular.
-    # If rows > cols, we can transpose.
-    
-    transposed = False
-    if n_rows > n_cols:
-        C = [[C[r][c] for r in range(n_rows)] for c in range(n_cols)]
+    n_rows = len(cost_matrix)
+    if n_rows == 0:
+        return [], []
+    n_cols = len(cost_matrix[0])
+    if n_cols == 0:
+        return [], []
+
+    # The solver assigns every row, so it needs n_rows <= n_cols.
+    transposed = n_rows > n_cols
+    if transposed:
+        cost = [list(map(float, col)) for col in zip(*cost_matrix)]
         n_rows, n_cols = n_cols, n_rows
-        transposed = True
-        
-    # Now n_rows <= n_cols
-    
-    # We can pad columns to make it square n_cols x n_cols
-    # Padding with 0s is safe if we simply ignore the assignments to dummy columns later?
-    # But 0s might be preferred over real costs.
-    # If costs are negative (for max overlap, we negated them), valid costs are negative.
-    # 0 is strictly worse than negative (good).
-    # If original costs were positive (minimization), we'd pad with 0?
-    # No, for minimization, 0 is best.
-    # We are doing minimization (of negative overlap).
-    # Costs are like -10.0, -5.0 etc.
-    # So 0 is "high cost" (no overlap).
-    # So padding with 0 is essentially "no overlap cost".
-    # This works.
-    
-    # Use a simple implementation of Munkres for square matrix
-    # Based on a standard implementation structure
-    
-    # Make square
-    size = n_cols
-    for row in C:
-        row.extend([0] * (size - len(row)))
-    while len(C) < size:
-        C.append([0] * size)
-        
-    # Subtract row mins
-    for r in range(size):
-        min_val = min(C[r])
-        for c in range(size):
-            C[r][c] -= min_val
-            
-    # Subtract col mins
-    for c in range(size):
-        min_val = min(C[r][c] for r in range(size))
-        for r in range(size):
-            C[r][c] -= min_val
-            
-    # Star zeros
-    stars = {} # (r, c)
-    rows_covered = [False] * size
-    cols_covered = [False] * size
-    
-    for r in range(size):
-        for c in range(size):
-            if C[r][c] == 0 and not rows_covered[r] and not cols_covered[c]:
-                stars[(r, c)] = True
-                rows_covered[r] = True
-                cols_covered[c] = True
-    
-    rows_covered = [False] * size
-    cols_covered = [False] * size
-    
-    prime_locations = {} # (r, c)
-    
-    def cover_starred_cols():
-        covered_count = 0
-        for r, c in stars.keys():
-            cols_covered[c] = True
-        for c in range(size):
-            if cols_covered[c]: score = 1
-        return sum(cols_covered)
-
-    while True:
-        # Step 1: Cover columns of starred zeros
-        # If all columns covered, we are done
-        count = 0
-        cols_covered = [False] * size
-        for (r, c) in stars.keys():
-            cols_covered[c] = True
-        
-        if sum(cols_covered) == size:
-            break
-            
-        # Step 2: Prime some uncovered zero
+    else:
+        cost = [list(map(float, row)) for row in cost_matrix]
+
+    if np is not None and n_cols >= NUMPY_MIN_COLS:
+        col4row = _solve_numpy(np.asarray(cost, dtype=float))
+    else:
+        col4row = _solve(cost, n_rows, n_cols)
+
+    if transposed:
+        # Rows of the solved problem are the original columns.
+        pairs = sorted((r, c) for c, r in enumerate(col4row))
+        return [p[0] for p in pairs], [p[1] for p in pairs]
+    return list(range(n_rows)), col4row
+
+
+def _solve(cost: List[List[float]], n_rows: int, n_cols: int) -> List[int]:
+    u = [0.0] * n_rows
+    v = [0.0] * n_cols
+    path = [-1] * n_cols
+    col4row = [-1] * n_rows
+    row4col = [-1] * n_cols
+
+    for cur_row in range(n_rows):
+        shortest = [INF] * n_cols
+        remaining = list(range(n_cols - 1, -1, -1))
+        num_remaining = n_cols
+        visited_rows = []
+        visited_cols = []
+        min_val = 0.0
+        sink = -1
+        i = cur_row
+
+        # Dijkstra-like search for the shortest augmenting path.
+        while sink == -1:
+            visited_rows.append(i)
+            row = cost[i]
+            ui = u[i]
+            index = -1
+            lowest = INF
+            for it in range(num_remaining):
+                j = remaining[it]
+                r = min_val + row[j] - ui - v[j]
+                if r < shortest[j]:
+                    path[j] = i
+                    shortest[j] = r
+                sj = shortest[j]
+                if sj < lowest or (sj == lowest and row4col[j] == -1):
+                    lowest = sj
+                    index = it
+
+            min_val = lowest
+            if min_val == INF:
+                raise ValueError('cost matrix is infeasible')
+
+            j = remaining[index]
+            if row4col[j] == -1:
+                sink = j
+            else:
+                i = row4col[j]
+            visited_cols.append(j)
+            num_remaining -= 1
+            remaining[index] = remaining[num_remaining]
+
+        # Update dual variables.
+        u[cur_row] += min_val
+        for i in visited_rows:
+            if i != cur_row:
+                u[i] += min_val - shortest[col4row[i]]
+        for j in visited_cols:
+            v[j] -= min_val - shortest[j]
+
+        # Augment along the path.
+        j = sink
         while True:
-            # Find an uncovered zero
-            zero_loc = None
-            for r in range(size):
-                if not rows_covered[r]:
-                    for c in range(size):
-                        if not cols_covered[c] and abs(C[r][c]) < 1e-9:
-                            zero_loc = (r, c)
-                            break
-                if zero_loc: break
-            
-            if not zero_loc:
-                # Step 4: Update matrix
-                min_uncovered = float('inf')
-                for r in range(size):
-                    if not rows_covered[r]:
-                        for c in range(size):
-                            if not cols_covered[c]:
-                                if C[r][c] < min_uncovered:
-                                    min_uncovered = C[r][c]
-                
-                if min_uncovered == float('inf'):
-                    # Should not happen
-                    return [], []
-                    
-                for r in range(size):
-                    if rows_covered[r]:
-                        for c in range(size):
-                            C[r][c] += min_uncovered
-                for c in range(size):
-                    if not cols_covered[c]:
-                        for r in range(size):
-                            C[r][c] -= min_uncovered
-                            
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == cur_row:
+                break
+
+    return col4row
+
+
+def _solve_numpy(cost) -> List[int]:
+    n_rows, n_cols = cost.shape
+    u = np.zeros(n_rows)
+    v = np.zeros(n_cols)
+    path = np.full(n_cols, -1, dtype=np.intp)
+    col4row = np.full(n_rows, -1, dtype=np.intp)
+    row4col = np.full(n_cols, -1, dtype=np.intp)
+
+    for cur_row in range(n_rows):
+        shortest = np.full(n_cols, INF)
+        remaining = np.ones(n_cols, dtype=bool)
+        visited_rows = []
+        min_val = 0.0
+        sink = -1
+        i = cur_row
+
+        while sink == -1:
+            visited_rows.append(i)
+            reduced = min_val + cost[i] - u[i] - v
+            improved = remaining & (reduced < shortest)
+            path[improved] = i
+            shortest[improved] = reduced[improved]
+
+            candidates = np.where(remaining, shortest, INF)
+            lowest = candidates.min()
+            if lowest == INF:
+                raise ValueError('cost matrix is infeasible')
+            ties = np.flatnonzero(candidates == lowest)
+            free = ties[row4col[ties] == -1]
+            j = int(free[0]) if len(free) else int(ties[0])
+
+            min_val = lowest
+            if row4col[j] == -1:
+                sink = j
             else:
-                # Prime it
-                prime_locations[zero_loc] = True
-                r, c = zero_loc
-                
-                # Check if there is a starred zero in this row
-                starred_col = None
-                for sc in range(size):
-                    if (r, sc) in stars:
-                        starred_col = sc
-                        break
-                
-                if starred_col is not None:
-                    rows_covered[r] = True
-                    cols_covered[starred_col] = False
-                else:
-                    # Step 3: Make path
-                    path = [zero_loc]
-                    while True:
-                        # Find starred zero in this column
-                        last_c = path[-1][1]
-                        starred_row = None
-                        for sr in range(size):
-                            if (sr, last_c) in stars:
-                                starred_row = sr
-                                break
-                        
-                        if starred_row is None:
-                            break
-                            
-                        path.append((starred_row, last_c))
-                        
-                        # Find primed zero in this row
-                        primed_col = None
-                        for pc in range(size):
-                            if (starred_row, pc) in prime_locations:
-                                primed_col = pc
-                                break
-                        path.append((starred_row, primed_col))
-                    
-                    # Unstar starred, star primed
-                    for r_p, c_p in path:
-                        if (r_p, c_p) in stars:
-                            del stars[(r_p, c_p)]
-                        else:
-                            stars[(r_p, c_p)] = True
-                            
-                    # Clear covers and primes
-                    rows_covered = [False] * size
-                    cols_covered = [False] * size
-                    prime_locations = {}
-                    break # Go back to Step 1
-
-    # Assignments
-    row_ind = []
-    col_ind = []
-    
-    # Sort by row index
-    for r, c in stars.keys():
-        if r < n_rows and c < n_cols:
-            if transposed:
-                row_ind.append(c)
-                col_ind.append(r)
+                i = int(row4col[j])
+            remaining[j] = False
+
+        u[cur_row] += min_val
+        others = [r for r in visited_rows if r != cur_row]
+        if others:
+            others = np.asarray(others, dtype=np.intp)
+            u[others] += min_val - shortest[col4row[others]]
+        visited_cols = ~remaining
+        v[visited_cols] -= min_val - shortest[visited_cols]
+
+        j = sink
+        while True:
+            i = int(path[j])
+            row4col[j] = i
+            col4row[i], j = j, int(col4row[i])
+            if i == cur_row:
+                break
+
+    return [int(c) for c in col4row]
+
+
+def max_weight_matching(n_rows: int, n_cols: int,
+                        edges: Sequence[Sequence[Tuple[int, float]]]) -> List[Tuple[int, int]]:
+    """
+    Maximum weight bipartite matching over a sparse graph.
+    Input: edges[i] lists the (column, weight) pairs of row i; weights must be
+    positive and missing pairs cannot be matched.
+    Output: matched (row, column) pairs, sorted by row index.
+
+    This is the shortest augmenting path solver above with a binary heap
+    instead of a dense column scan, so each augmentation only touches the
+    edges of the rows it visits. Every row may also stay unmatched, which is
+    modelled as a private zero-cost column, so the problem is always feasible.
+    """
+    n_all = n_cols + n_rows  # column n_cols + i leaves row i unmatched
+    adj = [[(j, -w) for j, w in row] + [(n_cols + i, 0.0)] for i, row in enumerate(edges)]
+    u = [0.0] * n_rows
+    v = [0.0] * n_all
+    path = [-1] * n_all
+    col4row = [-1] * n_rows
+    row4col = [-1] * n_all
+
+    for cur_row in range(n_rows):
+        shortest = {}
+        final = set()
+        heap = []
+        visited_rows = []
+        visited_cols = []
+        min_val = 0.0
+        sink = -1
+        i = cur_row
+
+        while sink == -1:
+            visited_rows.append(i)
+            ui = u[i]
+            for j, c in adj[i]:
+                if j in final:
+                    continue
+                r = min_val + c - ui - v[j]
+                if r < shortest.get(j, INF):
+                    shortest[j] = r
+                    path[j] = i
+                    # Among equally short columns prefer unassigned ones.
+                    heapq.heappush(heap, (r, row4col[j] != -1, j))
+            while True:
+                r, _, j = heapq.heappop(heap)
+                if j not in final and r == shortest[j]:
+                    break
+            final.add(j)
+            visited_cols.append(j)
+            min_val = r
+            if row4col[j] == -1:
+                sink = j
             else:
-                row_ind.append(r)
-                col_ind.append(c)
-                
-    # Sort result
-    if transposed:
-        # Sort based on "original rows" which are now col_ind?
-        # Wait, if transposed: original rows matching original cols
-        # input was n_orig_row > n_orig_col
-        # We transposed to n_new_row < n_new_col
-        # stars are (r_new, c_new)
-        # c_new corresponds to original rows
-        # r_new corresponds to original cols
-        # we swapped them
-        # so output lists are:
-        # row_ind (original cols) -> col_ind (original rows) which is backward
-        # we want Matches for Original Rows.
-        # But `linear_sum_assignment` returns (row_indices, col_indices) such that cost is minimized.
-        # It returns essentially a set of pairs.
-        # We want to return sorted by row index?
-        # Scipy returns sorted row_ind and corresponding col_ind.
-        zipped = sorted(zip(row_ind, col_ind))
-        row_ind = [z[0] for z in zipped]
-        col_ind = [z[1] for z in zipped]
-    else:
-        zipped = sorted(zip(row_ind, col_ind))
-        row_ind = [z[0] for z in zipped]
-        col_ind = [z[1] for z in zipped]
-        
-    return row_ind, col_ind
+                i = row4col[j]
+
+        u[cur_row] += min_val
+        for i in visited_rows:
+            if i != cur_row:
+                u[i] += min_val - shortest[col4row[i]]
+        for j in visited_cols:
+            v[j] -= min_val - shortest[j]
+
+        j = sink
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == cur_row:
+                break
+
+    return [(i, j) for i, j in enumerate(col4row) if j < n_cols]
@@ -0,0 +1,301 @@
+"""
+NumPy-vectorized scoring backend.
+
+Segment boundaries are collected into one sorted float array per recording and
+speaker activity is represented as a boolean matrix over the resulting
+elementary intervals, so that UEM filtering, collars, overlap exclusion, all
+scoring statistics and the ref x sys overlap matrix reduce to vectorized
+reductions. Results match the pure Python backend in `mdeval.scoring` up to
+floating point summation order.
+"""
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import profiling
+from .breakdown import SpeakerActivity
+from .overlap import OverlapMatrix
+from .segments import SegmentTable, SpeakerData, speaker_names
+from .utils import Segment
+
+EPSILON = 1e-8
+# Largest speaker x interval matrix to build for one recording. Beyond it
+# (e.g. over-clustered hypotheses with thousands of speakers) the dense arrays
+# cost far more memory than the Python sweep, which scoring then uses instead.
+MAX_DENSE_CELLS = 1 << 24
+
+
+def _n_segments(data: SpeakerData) -> int:
+    if isinstance(data, SegmentTable):
+        return len(data)
+    return sum(len(segs) for segs in data.values())
+
+
+def dense_cells(ref_data: SpeakerData, sys_data: SpeakerData, n_uem: int, n_collars: int = 0) -> int:
+    """Upper bound on the speaker x interval cells of scoring ref_data against sys_data."""
+    n_ref = _n_segments(ref_data)
+    width = 2 * (n_uem + n_ref * (1 + 2 * n_collars) + _n_segments(sys_data)) + 2
+    return (len(speaker_names(ref_data)) + len(speaker_names(sys_data)) + 1) * width
+
+
+class SpeakerArrays:
+    """Flat tbeg/tend/speaker-index arrays for a SegmentTable or {spkr: [segment dict]} mapping."""
+
+    def __init__(self, data: SpeakerData, positive_only: bool = True):
+        if not isinstance(data, SegmentTable):
+            data = SegmentTable.from_speaker_dict(data)
+        self.names = list(data.speakers)
+        self.tbeg, self.tend, self.index = data.numpy()
+        if positive_only:
+            positive = self.tend > self.tbeg
+            self.tbeg = self.tbeg[positive]
+            self.tend = self.tend[positive]
+            self.index = self.index[positive]
+        self.index = self.index.astype(np.intp)
+
+
+def _coverage(width, n_rows, beg_pos, end_pos, index):
+    """Count of segments covering each elementary interval, per row."""
+    flat = np.concatenate([index * width + beg_pos, index * width + end_pos])
+    steps = np.concatenate([np.ones(len(beg_pos)), -np.ones(len(end_pos))])
+    cells, inverse = np.unique(flat, return_inverse=True)
+    delta = np.zeros(n_rows * width, dtype=np.int32)
+    delta[cells] = np.bincount(inverse, weights=steps)
+    counts = np.cumsum(delta.reshape(n_rows, width), axis=1, dtype=np.int32)
+    return counts[:, :width - 1]
+
+
+def _unique_positions(parts):
+    """Sorted unique time points of parts, and the position of every input point."""
+    if sum(len(p) for p in parts) == 0:
+        parts = parts + [np.zeros(1)]
+    bounds, pos = np.unique(np.concatenate(parts), return_inverse=True)
+    offsets = np.cumsum([0] + [len(p) for p in parts])
+    return bounds, [pos[offsets[k]:offsets[k + 1]] for k in range(len(parts))]
+
+
+class ReferencePartition:
+    """
+    Reference side of a recording: sorted UEM, collar and REF boundaries with
+    the evaluated/scored flags and REF activity of every interval between them.
+
+    Built once per recording; `merge` splits it at a system's boundaries to
+    give the full elementary Partition for that system.
+    """
+
+    def __init__(self, ref_data: SpeakerData, uem_eval: List[Segment],
+                 collar: float = 0.0, ignore_overlap: bool = False):
+        if not isinstance(ref_data, SegmentTable):
+            ref_data = SegmentTable.from_speaker_dict(ref_data)
+        ref = SpeakerArrays(ref_data)
+        self.ref_names = ref.names
+
+        uem = [s for s in uem_eval if s.tdur > EPSILON]
+        uem_beg = np.asarray([s.tbeg for s in uem], dtype=float)
+        uem_end = np.asarray([s.tend for s in uem], dtype=float)
+
+        parts = [uem_beg, uem_end, ref.tbeg, ref.tend]
+        if collar > 0:
+            # Collars surround every REF boundary, including zero-length segments.
+            all_ref = SpeakerArrays(ref_data, positive_only=False)
+            marks = np.concatenate([all_ref.tbeg, all_ref.tend])
+            parts.extend([marks - collar, marks + collar])
+        bounds, pos = _unique_positions(parts)
+        width = len(bounds)
+
+        self.bounds = bounds
+        self.in_eval = _coverage(width, 1, pos[0], pos[1], np.zeros(len(uem_beg), dtype=np.intp))[0] > 0
+        ref_cnt = _coverage(width, len(ref.names), pos[2], pos[3], ref.index)
+        self.scored = self.in_eval.copy()
+        if ignore_overlap:
+            self.scored &= ref_cnt.sum(axis=0) < 2
+        if collar > 0:
+            in_collar = _coverage(width, 1, pos[4], pos[5], np.zeros(len(pos[4]), dtype=np.intp))[0] > 0
+            self.scored &= ~in_collar
+        self.ref_act = ref_cnt > 0
+
+    def merge(self, sys_data: SpeakerData) -> 'Partition':
+        sys = SpeakerArrays(sys_data)
+        bounds, pos = _unique_positions([self.bounds, sys.tbeg, sys.tend])
+        width = len(bounds)
+        if width < 2:
+            bounds = np.append(bounds, bounds[-1])
+            width = 2
+
+        # Reference interval containing each elementary interval; intervals
+        # before the first or after the last reference boundary map to an
+        # extra all-False column.
+        n_ref_intervals = len(self.bounds) - 1
+        owner = np.searchsorted(pos[0], np.arange(width - 1), side='right') - 1
+        owner[(owner < 0) | (owner >= n_ref_intervals)] = max(n_ref_intervals, 0)
+        pad = lambda a: np.concatenate([a, np.zeros(a.shape[:-1] + (1,), dtype=bool)], axis=-1)
+
+        sys_cnt = _coverage(width, len(sys.names), pos[1], pos[2], sys.index)
+        return Partition(np.diff(bounds), pad(self.in_eval[:n_ref_intervals])[owner],
+                         pad(self.scored[:n_ref_intervals])[owner],
+                         self.ref_names, pad(self.ref_act[:, :n_ref_intervals])[:, owner],
+                         sys.names, sys_cnt > 0)
+
+
+class Partition:
+    """
+    Elementary intervals of a recording with constant UEM, no-score and
+    speaker state.
+
+    Attributes:
+        dur: duration of every interval.
+        dur_eval: like dur, but with tiny intervals folded for the evaluation UEM.
+        in_eval: intervals inside the evaluation UEM.
+        scored: intervals inside the scoring UEM (after overlap and collar exclusion).
+        ref_act, sys_act: boolean speaker x interval activity matrices.
+    """
+
+    def __init__(self, dur, in_eval, scored, ref_names, ref_act, sys_names, sys_act):
+        keep = dur > EPSILON
+        if not keep.all():
+            # Like create_speaker_segs, hand the duration of tiny intervals to
+            # the interval that follows them.
+            n = len(dur)
+            nxt = np.where(keep, np.arange(n), n)
+            owner = np.minimum.accumulate(nxt[::-1])[::-1]
+            dur_eval = self._fold(dur, owner, in_eval)
+            dur = self._fold(dur, owner, scored)
+        else:
+            dur_eval = dur
+
+        self.in_eval = in_eval & keep
+        self.scored = scored & keep
+        self.dur = dur
+        self.dur_eval = dur_eval
+        self.ref_names = ref_names
+        self.ref_act = ref_act
+        self.sys_names = sys_names
+        self.sys_act = sys_act
+
+    @staticmethod
+    def _fold(dur, owner, mask):
+        valid = (owner < len(dur)) & mask
+        return np.bincount(owner[valid], weights=dur[valid], minlength=len(dur))
+
+
+def score(ref_data: SpeakerData, sys_data: SpeakerData,
+          uem_eval: List[Segment], collar: float, ignore_overlap: bool,
+          stats: Dict, map_fn, activity: Optional[SpeakerActivity] = None) -> Dict[str, str]:
+    """
+    Vectorized equivalent of `score_speaker_diarization`.
+    Updates stats (and activity, if given) in place and returns the speaker map.
+    """
+    with profiling.stage('partition') as st:
+        part = ReferencePartition(ref_data, uem_eval, collar, ignore_overlap).merge(sys_data)
+        if st:
+            st.count(segments=len(part.dur))
+    return score_partition(part, stats, map_fn, activity)
+
+
+def score_partition(part: Partition, stats: Dict, map_fn, activity: Optional[SpeakerActivity] = None) -> Dict[str, str]:
+    """Accumulate stats over a Partition and return the speaker map."""
+    with profiling.stage('reduce'):
+        spkr_overlap = _reduce(part, stats, activity)
+    with profiling.stage('map_speakers') as st:
+        if st:
+            st.count(matrix_cells=len(part.ref_names) * len(part.sys_names))
+        spkr_map = map_fn(spkr_overlap)
+    stats['SPEAKER_ERROR'] -= spkr_overlap.mapped_overlap(spkr_map)
+    return spkr_map
+
+
+def _reduce(part: Partition, stats: Dict, activity: Optional[SpeakerActivity] = None) -> OverlapMatrix:
+    """
+    Add every statistic but the mapped overlap to stats (SPEAKER_ERROR gets
+    the matched time), fill activity if given, and return the ref x sys overlap.
+    """
+    n_ref_all = part.ref_act.sum(axis=0)
+    stats['EVAL_SPEECH'] += float(part.dur_eval[part.in_eval & (n_ref_all > 0)].sum())
+
+    scored = part.scored
+    dur = part.dur[scored]
+    ref_act = part.ref_act[:, scored]
+    sys_act = part.sys_act[:, scored]
+    stats['SCORED_TIME'] = float(dur.sum())
+
+    n_ref = n_ref_all[scored]
+    n_sys = sys_act.sum(axis=0)
+    has_ref = n_ref > 0
+    has_sys = n_sys > 0
+
+    stats['SCORED_SPEECH'] += float(dur[has_ref].sum())
+    stats['MISSED_SPEECH'] += float(dur[has_ref & ~has_sys].sum())
+    stats['FALARM_SPEECH'] += float(dur[has_sys & ~has_ref].sum())
+    stats['SCORED_SPEAKER'] += float(np.dot(dur, n_ref))
+    stats['MISSED_SPEAKER'] += float(np.dot(dur, np.maximum(n_ref - n_sys, 0)))
+    stats['FALARM_SPEAKER'] += float(np.dot(dur, np.maximum(n_sys - n_ref, 0)))
+
+    stats['SPEAKER_ERROR'] += float(np.dot(dur, np.minimum(n_ref, n_sys)))
+
+    overlap = np.dot(ref_act * dur, sys_act.T)
+    rows, cols = np.nonzero(overlap > 0)
+    spkr_overlap = OverlapMatrix.from_triplets(part.ref_names, part.sys_names, rows.tolist(),
+                                               cols.tolist(), overlap[rows, cols].tolist())
+    if activity is not None:
+        activity.overlap = spkr_overlap
+        activity.ref_time = array('d', np.dot(ref_act, dur).tolist())
+        activity.ref_missed = array('d', np.dot(ref_act, np.where(has_sys, 0.0, dur)).tolist())
+        activity.sys_time = array('d', np.dot(sys_act, dur).tolist())
+        activity.sys_falarm = array('d', np.dot(sys_act, np.where(has_ref, 0.0, dur)).tolist())
+    return spkr_overlap
+
+
+class SettingsPartition:
+    """
+    Elementary intervals of one recording shared by several (collar,
+    ignore_overlap) settings: boundaries of the UEM, REF, SYS and the collars
+    of every requested size are sorted once, and `partition` derives each
+    setting's Partition by masking intervals.
+    """
+
+    def __init__(self, ref_data: SpeakerData, sys_data: SpeakerData,
+                 uem_eval: List[Segment], collars=(0.0,)):
+        if not isinstance(ref_data, SegmentTable):
+            ref_data = SegmentTable.from_speaker_dict(ref_data)
+        ref = SpeakerArrays(ref_data)
+        sys = SpeakerArrays(sys_data)
+
+        uem = [s for s in uem_eval if s.tdur > EPSILON]
+        uem_beg = np.asarray([s.tbeg for s in uem], dtype=float)
+        uem_end = np.asarray([s.tend for s in uem], dtype=float)
+
+        parts = [uem_beg, uem_end, ref.tbeg, ref.tend, sys.tbeg, sys.tend]
+        self.collars = sorted(set(c for c in collars if c > 0))
+        if self.collars:
+            all_ref = SpeakerArrays(ref_data, positive_only=False)
+            marks = np.concatenate([all_ref.tbeg, all_ref.tend])
+            for collar in self.collars:
+                parts.extend([marks - collar, marks + collar])
+        bounds, pos = _unique_positions(parts)
+        width = len(bounds)
+        if width < 2:
+            bounds = np.append(bounds, bounds[-1])
+            width = 2
+
+        def cover(beg, end):
+            return _coverage(width, 1, beg, end, np.zeros(len(beg), dtype=np.intp))[0] > 0
+
+        self.dur = np.diff(bounds)
+        self.in_eval = cover(pos[0], pos[1])
+        ref_cnt = _coverage(width, len(ref.names), pos[2], pos[3], ref.index)
+        self.overlap = ref_cnt.sum(axis=0) >= 2
+        self.in_collar = [cover(pos[6 + 2 * k], pos[7 + 2 * k]) for k in range(len(self.collars))]
+        self.ref_names = ref.names
+        self.ref_act = ref_cnt > 0
+        self.sys_names = sys.names
+        self.sys_act = _coverage(width, len(sys.names), pos[4], pos[5], sys.index) > 0
+
+    def partition(self, collar: float = 0.0, ignore_overlap: bool = False) -> Partition:
+        scored = self.in_eval.copy()
+        if ignore_overlap:
+            scored &= ~self.overlap
+        if collar > 0:
+            scored &= ~self.in_collar[self.collars.index(collar)]
+        return Partition(self.dur, self.in_eval, scored, self.ref_names, self.ref_act,
+                         self.sys_names, self.sys_act)
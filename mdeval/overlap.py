@@ -0,0 +1,152 @@
+"""
+Sparse ref x sys speaker overlap accumulator.
+
+`OverlapMatrix` collects the time every REF speaker overlaps every SYS speaker
+by integer speaker id. Instead of adding each interval's duration to every
+active (ref, sys) pair, it keeps a running clock of the time added so far and
+only touches the pairs that start or stop overlapping: a pair is charged
+-clock when it becomes active and +clock when it stops. A sweep in which one
+speaker changes per boundary then costs O(n_ref + n_sys) per boundary rather
+than O(n_ref * n_sys) per interval. Intervals with only a few active pairs
+are still charged directly.
+
+When the speaker counts are small the sums live in one flat `array('d')`;
+otherwise (ref, sys, value) COO triplets are appended to typed arrays and
+reduced once when the matrix is read. The speaker mapping and per-speaker
+reports read the same object.
+"""
+from array import array
+from typing import Dict, Iterable, Iterator, Sequence, Tuple
+
+# Use a flat dense array up to this many ref x sys cells.
+DENSE_MAX_CELLS = 1 << 16
+# Intervals with at most this many active pairs are charged directly.
+DIRECT_MAX_PAIRS = 4
+
+
+class OverlapMatrix:
+    """
+    Overlap durations between `ref_names[i]` and `sys_names[j]`, indexed by
+    (i, j). Only positive overlaps are reported.
+    """
+    __slots__ = ('ref_names', 'sys_names', '_ref_ids', '_sys_ids', '_n_sys', '_dense',
+                 '_rows', '_cols', '_vals', '_sums', '_clock', '_refs', '_syss')
+
+    def __init__(self, ref_names: Sequence[str], sys_names: Sequence[str]):
+        self.ref_names = list(ref_names)
+        self.sys_names = list(sys_names)
+        self._ref_ids = {name: i for i, name in enumerate(self.ref_names)}
+        self._sys_ids = {name: j for j, name in enumerate(self.sys_names)}
+        self._n_sys = len(self.sys_names)
+        n_cells = len(self.ref_names) * self._n_sys
+        self._dense = array('d', bytes(8 * n_cells)) if n_cells <= DENSE_MAX_CELLS else None
+        self._rows = array('i')
+        self._cols = array('i')
+        self._vals = array('d')
+        self._sums = {} # reduced sparse triplets: {(i, j): overlap}
+        self._clock = 0.0 # total duration added so far
+        self._refs = frozenset() # speakers active in the last add
+        self._syss = frozenset()
+
+    @classmethod
+    def from_triplets(cls, ref_names: Sequence[str], sys_names: Sequence[str],
+                      rows: Iterable[int], cols: Iterable[int], vals: Iterable[float]) -> 'OverlapMatrix':
+        matrix = cls(ref_names, sys_names)
+        for i, j, v in zip(rows, cols, vals):
+            matrix._charge((i,), (j,), v)
+        return matrix
+
+    def _charge(self, ref_ids: Iterable[int], sys_ids: Iterable[int], value: float):
+        """Add value to every pair in ref_ids x sys_ids."""
+        if self._dense is not None:
+            data = self._dense
+            n_sys = self._n_sys
+            for i in ref_ids:
+                base = i * n_sys
+                for j in sys_ids:
+                    data[base + j] += value
+            return
+        sys_ids = list(sys_ids)
+        n = len(sys_ids)
+        for i in ref_ids:
+            self._rows.extend([i] * n)
+            self._cols.extend(sys_ids)
+            self._vals.extend([value] * n)
+
+    def add(self, ref_ids: Sequence[int], sys_ids: Sequence[int], dur: float):
+        """Add dur to every (ref, sys) pair of the given ids."""
+        if len(ref_ids) * len(sys_ids) <= DIRECT_MAX_PAIRS:
+            # Few pairs: charging them directly is cheaper than diffing.
+            if self._refs:
+                self._close()
+            self._charge(ref_ids, sys_ids, dur)
+            return
+        refs = frozenset(ref_ids)
+        syss = frozenset(sys_ids)
+        old_refs = self._refs
+        old_syss = self._syss
+        if refs != old_refs or syss != old_syss:
+            clock = self._clock
+            # Close pairs that stop overlapping, open the ones that start.
+            self._charge(old_refs - refs, old_syss, clock)
+            self._charge(old_refs & refs, old_syss - syss, clock)
+            self._charge(refs - old_refs, syss, -clock)
+            self._charge(refs & old_refs, syss - old_syss, -clock)
+            self._refs = refs
+            self._syss = syss
+        self._clock += dur
+
+    def _close(self):
+        # Close all open pairs at the current clock.
+        self._charge(self._refs, self._syss, self._clock)
+        self._refs = frozenset()
+        self._syss = frozenset()
+
+    def _settle(self):
+        if self._refs:
+            self._close()
+        if self._vals:
+            sums = self._sums
+            for key, v in zip(zip(self._rows, self._cols), self._vals):
+                sums[key] = sums.get(key, 0.0) + v
+            self._rows = array('i')
+            self._cols = array('i')
+            self._vals = array('d')
+
+    def items(self) -> Iterator[Tuple[int, int, float]]:
+        """Yield (ref id, sys id, overlap) for every positive overlap."""
+        self._settle()
+        if self._dense is not None:
+            n_sys = self._n_sys
+            for k, v in enumerate(self._dense):
+                if v > 0:
+                    yield k // n_sys, k % n_sys, v
+            return
+        for (i, j), v in self._sums.items():
+            if v > 0:
+                yield i, j, v
+
+    def get(self, ref: str, sys: str) -> float:
+        """Overlap of two speakers by name (0.0 if unknown)."""
+        i = self._ref_ids.get(ref)
+        j = self._sys_ids.get(sys)
+        if i is None or j is None:
+            return 0.0
+        self._settle()
+        if self._dense is not None:
+            return self._dense[i * self._n_sys + j]
+        return self._sums.get((i, j), 0.0)
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """{ref: {sys: overlap}} of the positive overlaps."""
+        result = {}
+        for i, j, v in self.items():
+            result.setdefault(self.ref_names[i], {})[self.sys_names[j]] = v
+        return result
+
+    def mapped_overlap(self, spkr_map: Dict[str, str]) -> float:
+        """Total overlap of the mapped (ref, sys) pairs."""
+        return sum(self.get(r, s) for r, s in spkr_map.items())
+
+    def __repr__(self):
+        return f"OverlapMatrix({len(self.ref_names)} ref x {len(self.sys_names)} sys)"
@@ -0,0 +1,206 @@
+"""
+Built-in timing instrumentation for the scoring stages.
+
+Scoring code marks its stages with `stage(name)`:
+
+    with profiling.stage('sweep') as st:
+        ...
+        if st:
+            st.count(segments=n)
+
+Nothing is recorded unless a profile is active. Without one, `stage` returns
+a shared no-op object, so instrumented code pays for a function call per stage
+and per recording, never per segment. To profile, run the code inside
+`profile()` (or pass --profile on the command line):
+
+    with profiling.profile() as prof:
+        score_speaker_diarization(...)
+    print(prof.to_json())
+
+Each stage accumulates its call count, wall time and counters globally and
+under the recording being scored (see `recording`). Counters are summed over
+calls, except those in PEAK_KEYS, which keep their maximum. Stage times are
+inclusive, so a stage nested inside another is counted in both.
+"""
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+_active = None # the Profile being recorded, if any
+
+# Counters combined by maximum rather than by sum.
+PEAK_KEYS = ('matrix_cells',)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def count(self, **counts):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def _new_stage() -> Dict[str, Any]:
+    return {'calls': 0, 'seconds': 0.0}
+
+
+def _add(stages: Dict[str, Dict[str, Any]], name: str, values: Dict[str, Any]):
+    entry = stages.get(name)
+    if entry is None:
+        entry = stages[name] = _new_stage()
+    for key, value in values.items():
+        if key in PEAK_KEYS:
+            entry[key] = max(entry.get(key, value), value)
+        else:
+            entry[key] = entry.get(key, 0) + value
+
+
+class _Stage:
+    __slots__ = ('profile', 'name', 'start')
+
+    def __init__(self, profile: 'Profile', name: str):
+        self.profile = profile
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.record(self.name, {'calls': 1, 'seconds': time.perf_counter() - self.start})
+        return False
+
+    def __bool__(self):
+        return True
+
+    def count(self, **counts):
+        self.profile.record(self.name, counts)
+
+
+class Profile:
+    """
+    Stage statistics of one profiling run.
+
+    Attributes:
+        stages: {stage: {'calls', 'seconds', counters...}} over all recordings.
+        recordings: {file: {'seconds': total, 'stages': {stage: {...}}}}.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.recordings = {}
+        self.current = None # file id of the recording being scored
+        self.start = time.perf_counter()
+        self.wall_seconds = 0.0
+
+    def record(self, name: str, values: Dict[str, Any]):
+        _add(self.stages, name, values)
+        if self.current is not None:
+            _add(self.recordings[self.current]['stages'], name, values)
+
+    def merge(self, data: Dict[str, Any]):
+        """Add the stages and recordings of another profile's to_dict()."""
+        for name, values in data['stages'].items():
+            _add(self.stages, name, values)
+        for file, rec in data['recordings'].items():
+            entry = self.recordings.setdefault(file, {'seconds': 0.0, 'stages': {}})
+            entry['seconds'] += rec['seconds']
+            for name, values in rec['stages'].items():
+                _add(entry['stages'], name, values)
+
+    def slowest_recordings(self, n: int = 10):
+        """[(file, seconds, slowest stage)] of the n slowest recordings."""
+        ranked = sorted(self.recordings.items(), key=lambda item: -item[1]['seconds'])[:n]
+        return [(file, rec['seconds'], max(rec['stages'], key=lambda s: rec['stages'][s]['seconds'], default=None))
+                for file, rec in ranked]
+
+    def to_dict(self) -> Dict[str, Any]:
+        by_time = lambda stages: dict(sorted(stages.items(), key=lambda item: -item[1]['seconds']))
+        return {
+            'wall_seconds': self.wall_seconds or time.perf_counter() - self.start,
+            'stages': by_time(self.stages),
+            'slowest_recordings': [{'recording': file, 'seconds': seconds, 'slowest_stage': name}
+                                   for file, seconds, name in self.slowest_recordings()],
+            'recordings': {file: {'seconds': rec['seconds'], 'stages': by_time(rec['stages'])}
+                           for file, rec in sorted(self.recordings.items())},
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+def active() -> Optional[Profile]:
+    """The Profile being recorded, or None."""
+    return _active
+
+
+def stage(name: str):
+    """Context manager timing one call of a stage (a no-op when not profiling)."""
+    if _active is None:
+        return _NULL_STAGE
+    return _Stage(_active, name)
+
+
+class _Recording:
+    __slots__ = ('profile', 'file', 'outer', 'start')
+
+    def __init__(self, profile: Profile, file: str):
+        self.profile = profile
+        self.file = file
+        self.outer = None
+        self.start = 0.0
+
+    def __enter__(self):
+        prof = self.profile
+        self.outer = prof.current
+        prof.current = self.file
+        prof.recordings.setdefault(self.file, {'seconds': 0.0, 'stages': {}})
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        prof = self.profile
+        if self.outer is None:
+            prof.recordings[self.file]['seconds'] += time.perf_counter() - self.start
+        prof.current = self.outer
+        return False
+
+
+def recording(file: str):
+    """Context manager attributing the stages run inside it to recording `file`."""
+    if _active is None:
+        return _NULL_STAGE
+    return _Recording(_active, file)
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    """Record stage statistics of the code run inside the block."""
+    global _active
+    outer = _active
+    prof = _active = Profile()
+    try:
+        yield prof
+    finally:
+        prof.wall_seconds = time.perf_counter() - prof.start
+        _active = outer
+
+
+def call_profiled(fn: Callable, arg):
+    """Run fn(arg) under a fresh profile; returns (result, profile dict). For worker processes."""
+    with profile() as prof:
+        result = fn(arg)
+    return result, prof.to_dict()
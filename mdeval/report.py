@@ -0,0 +1,67 @@
+"""
+Machine-readable score reports.
+
+`ReportWriter` writes one record per scored recording (and per system and
+collar) plus summary records, as JSON Lines, CSV or TSV. Records carry the
+raw time statistics rather than only percentages, so reports of sharded runs
+can be summed without re-scoring. Records are written as soon as they are
+produced, through the stream's own buffering.
+"""
+import csv
+import json
+from typing import Any, Dict, Optional, Sequence, TextIO, Tuple
+
+FORMATS = ('text', 'json', 'csv', 'tsv')
+KEY_FIELDS = ('file', 'chnl', 'system', 'collar')
+SUMMARY_FILE = 'ALL'
+
+
+def der_percent(stats: Dict[str, float]) -> float:
+    scored = stats['SCORED_SPEAKER']
+    if not scored:
+        return 0.0
+    return 100 * (stats['MISSED_SPEAKER'] + stats['FALARM_SPEAKER'] + stats['SPEAKER_ERROR']) / scored
+
+
+class ReportWriter:
+    """
+    Writes records with the fields KEY_FIELDS + stat_keys + ('DER',) to
+    `stream` in one of the machine-readable FORMATS. Summary records use
+    file 'ALL' and an empty channel.
+    """
+
+    def __init__(self, fmt: str, stream: TextIO, stat_keys: Sequence[str]):
+        if fmt not in FORMATS or fmt == 'text':
+            raise ValueError(f"Unknown report format: {fmt}")
+        self.fmt = fmt
+        self.stream = stream
+        self.stat_keys = tuple(stat_keys)
+        self.fields = KEY_FIELDS + self.stat_keys + ('DER',)
+        self._csv = None
+        if fmt != 'json':
+            self._csv = csv.writer(stream, delimiter=',' if fmt == 'csv' else '\t', lineterminator='\n')
+            self._csv.writerow(self.fields)
+
+    def record(self, file: str, chnl: str, system: str, collar: float, stats: Dict[str, float],
+               interval: Optional[Tuple[float, float, float]] = None, details: Optional[Dict[str, Any]] = None):
+        """
+        Write one record. interval is a (low, high, confidence) DER interval
+        and details extra fields such as a speaker breakdown (JSON only).
+        """
+        values = [file, chnl, system, collar] + [stats.get(k, 0) for k in self.stat_keys] + [der_percent(stats)]
+        if self._csv is not None:
+            self._csv.writerow(values)
+            return
+        record = dict(zip(self.fields, values))
+        if interval is not None:
+            record['DER_INTERVAL'] = list(interval)
+        if details:
+            record.update(details)
+        self.stream.write(json.dumps(record) + '\n')
+
+    def summary(self, system: str, collar: float, stats: Dict[str, float],
+                interval: Optional[Tuple[float, float, float]] = None, details: Optional[Dict[str, Any]] = None):
+        self.record(SUMMARY_FILE, '', system, collar, stats, interval, details)
+
+    def close(self):
+        self.stream.flush()
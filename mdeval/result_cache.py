@@ -0,0 +1,144 @@
+"""
+Persistent, content-addressed cache of per-recording scoring results.
+
+Each entry is keyed by a SHA-1 over the recording's REF segments and words,
+SYS segments, UEM and scoring options, and stores the (stats, spkr_map) pair
+returned by `score_speaker_diarization`. Re-scoring a test set after a model
+change then only scores the recordings whose inputs changed.
+
+Entries live in a single SQLite file. Every lookup refreshes the entry's
+last-use time, and the least recently used entries are evicted once the
+stored results exceed the size bound.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .segments import SegmentTable, SpeakerData
+from .utils import Segment
+from .words import words_table
+
+# Bump when scoring changes in a way that invalidates stored results.
+RESULT_FORMAT = 2
+DEFAULT_MAX_BYTES = 256 << 20
+CACHE_FILE = 'results.sqlite'
+
+
+def default_cache_dir() -> str:
+    """$MDEVAL_CACHE_DIR, else $XDG_CACHE_HOME/mdeval, else ~/.cache/mdeval."""
+    path = os.environ.get('MDEVAL_CACHE_DIR')
+    if path:
+        return path
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'mdeval')
+
+
+def _hash_speakers(digest, data: SpeakerData):
+    if not isinstance(data, SegmentTable):
+        data = SegmentTable.from_speaker_dict(data)
+    names = '\n'.join(data.speakers).encode()
+    digest.update(struct.pack('<QQ', len(names), len(data)))
+    digest.update(names)
+    digest.update(data.tbeg.tobytes())
+    digest.update(data.tend.tobytes())
+    digest.update(data.spkr.tobytes())
+
+
+def result_key(ref_data: SpeakerData, sys_data: SpeakerData, uem_eval: List[Segment],
+               collar: float, ignore_overlap: bool, backend: str, words=None) -> str:
+    """Content hash of everything a recording's scoring result depends on, including REF words."""
+    digest = hashlib.sha1()
+    digest.update(struct.pack('<IdB', RESULT_FORMAT, collar, bool(ignore_overlap)))
+    digest.update(backend.encode() + b'\0')
+    digest.update(struct.pack('<Q', len(uem_eval)))
+    for seg in uem_eval:
+        digest.update(struct.pack('<dd', seg.tbeg, seg.tend))
+    _hash_speakers(digest, ref_data)
+    _hash_speakers(digest, sys_data)
+    if words:
+        _hash_speakers(digest, words_table(words))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Size-bounded LRU store of {key: (stats, spkr_map)} in `cache_dir`.
+
+    Opening raises OSError or sqlite3.Error when the cache cannot be created.
+    If writes fail later (read-only or locked database), lookups keep working
+    and new results are simply not stored.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.cache_dir, CACHE_FILE))
+        self._db.execute('CREATE TABLE IF NOT EXISTS results ('
+                         'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                         'size INTEGER NOT NULL, last_used REAL NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)')
+        self._db.commit()
+        self.writable = True
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict, Dict[str, str]]]:
+        row = self._db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._write('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+        stats, spkr_map = json.loads(row[0])
+        return stats, spkr_map
+
+    def put(self, key: str, stats: Dict, spkr_map: Dict[str, str]):
+        value = json.dumps([stats, spkr_map])
+        self._write('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', (key, value, len(value), time.time()))
+
+    def _write(self, sql: str, params):
+        if not self.writable:
+            return
+        try:
+            self._db.execute(sql, params)
+        except sqlite3.Error:
+            # Read-only or locked database: keep scoring without storing.
+            self.writable = False
+
+    def total_bytes(self) -> int:
+        return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0 or not self.writable:
+            return
+        freed = 0
+        stale = []
+        for key, size in self._db.execute('SELECT key, size FROM results ORDER BY last_used'):
+            if freed >= excess:
+                break
+            stale.append((key,))
+            freed += size
+        self._db.executemany('DELETE FROM results WHERE key = ?', stale)
+
+    def close(self):
+        """Evict down to the size bound and persist pending changes."""
+        try:
+            self.evict()
+            self._db.commit()
+        except sqlite3.Error:
+            pass # results are already reported; only the cache update is lost
+        finally:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
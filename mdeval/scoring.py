@@ -1,39 +1,177 @@
-from typing import Dict, List, Any, Tuple, Optional
+import warnings
+from typing import Dict, Iterable, List, Any, Tuple, Optional, Union
 
+from . import profiling
+from .breakdown import SpeakerActivity
+from .intervals import IntervalSet
 from .utils import Segment
-from .munkres import linear_sum_assignment
+from .words import SpeakerTimeline, score_words
+from .munkres import linear_sum_assignment, max_weight_matching
+from .overlap import OverlapMatrix
+from .segments import SpeakerData, iter_segments, iter_segment_ids, segment_times, speaker_names
 
-def map_speakers(spkr_overlap: Dict[str, Dict[str, float]]) -> Dict[str, str]:
+try:
+    from . import numpy_scoring
+except ImportError:  # numpy is optional
+    numpy_scoring = None
+
+BACKENDS = ('auto', 'python', 'numpy')
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Pick the scoring backend. 'auto' (or None) selects 'numpy' when NumPy is
+    importable and falls back to the dependency-free 'python' backend.
+    """
+    if backend is None or backend == 'auto':
+        return 'numpy' if numpy_scoring is not None else 'python'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown scoring backend: {backend}")
+    if backend == 'numpy' and numpy_scoring is None:
+        raise ImportError("The 'numpy' scoring backend requires NumPy to be installed")
+    return backend
+
+def _use_numpy(backend, ref_data, sys_data, uem_eval, collars=()) -> bool:
+    """
+    Whether to score a recording with NumPy: the backend resolves to 'numpy'
+    and its dense arrays stay within numpy_scoring.MAX_DENSE_CELLS. Larger
+    recordings take the Python sweep, whose memory grows with the segments.
+    """
+    if resolve_backend(backend) != 'numpy':
+        return False
+    n_collars = len(set(c for c in collars if c > 0))
+    cells = numpy_scoring.dense_cells(ref_data, sys_data, len(uem_eval), n_collars)
+    return cells <= numpy_scoring.MAX_DENSE_CELLS
+
+# Components with more cells than this are matched with the sparse solver.
+SPARSE_MIN_CELLS = 1024
+
+def map_speakers(spkr_overlap: Union[OverlapMatrix, Dict[str, Dict[str, float]]]) -> Dict[str, str]:
     """
     Find optimal mapping between ref and sys speakers to maximize overlap duration.
-    Uses Hungarian algorithm (scipy.optimize.linear_sum_assignment).
+
+    The ref/sys overlap graph is split into connected components that are
+    solved independently. Components with one speaker on either side, or in
+    which every ref speaker's best sys speaker is distinct, are resolved
+    directly; small components use the dense Hungarian solver and large ones
+    the sparse matcher. Only pairs with positive overlap are returned, since
+    pairing speakers that never overlap does not change any statistic.
     """
-    if not spkr_overlap:
-        return {}
+    if isinstance(spkr_overlap, OverlapMatrix):
+        spkr_overlap = spkr_overlap.to_dict()
+    # If the best sys speakers of all ref speakers are distinct, no
+    # decomposition is needed.
+    mapping = _map_row_maxima(sorted(spkr_overlap), spkr_overlap)
+    if mapping is not None:
+        return mapping
+
+    components = _overlap_components(spkr_overlap)
+    mapping = {}
+    for refs, syss in components:
+        if len(refs) == 1 or len(syss) == 1:
+            pairs = _map_star(refs, syss, spkr_overlap)
+        else:
+            pairs = _map_row_maxima(refs, spkr_overlap)
+            if pairs is None:
+                if len(refs) * len(syss) > SPARSE_MIN_CELLS:
+                    pairs = _map_sparse(refs, syss, spkr_overlap)
+                else:
+                    pairs = _map_dense(refs, syss, spkr_overlap)
+        mapping.update(pairs)
+    return mapping
+
+def _overlap_components(spkr_overlap: Dict[str, Dict[str, float]]):
+    """Connected components [(sorted refs, sorted syss)] of the positive-overlap graph."""
+    refs = [r for r, row in spkr_overlap.items() if any(o > 0 for o in row.values())]
+    sys_ids = {}
+    parent = list(range(len(refs)))
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    # Union each ref speaker with the sys speakers it overlaps; sys speakers
+    # get ids after the ref speakers.
+    for i, r in enumerate(refs):
+        for s, overlap in spkr_overlap[r].items():
+            if overlap > 0:
+                j = sys_ids.get(s)
+                if j is None:
+                    j = sys_ids[s] = len(parent)
+                    parent.append(j)
+                a = find(i)
+                b = find(j)
+                if a != b:
+                    parent[a] = b
+
+    groups = {}
+    for i, r in enumerate(refs):
+        groups.setdefault(find(i), ([], []))[0].append(r)
+    for s, j in sys_ids.items():
+        groups[find(j)][1].append(s)
+    return sorted((sorted(refs), sorted(syss)) for refs, syss in groups.values())
 
-    ref_spkrs = sorted(list(spkr_overlap.keys()))
-    sys_spkrs = set()
-    for r in ref_spkrs:
-        sys_spkrs.update(spkr_overlap[r].keys())
-    sys_spkrs = sorted(list(sys_spkrs))
+def _map_star(refs, syss, spkr_overlap):
+    # One speaker on one side: it maps to its largest overlap.
+    if len(refs) == 1:
+        row = spkr_overlap[refs[0]]
+        return {refs[0]: min(syss, key=lambda s: (-row.get(s, 0.0), s))}
+    return {min(refs, key=lambda r: (-spkr_overlap[r].get(syss[0], 0.0), r)): syss[0]}
 
-    if not ref_spkrs or not sys_spkrs:
-        return {}
+def _map_row_maxima(refs, spkr_overlap):
+    """
+    Map every ref speaker to its best sys speaker if those are all distinct;
+    that reaches the sum of row maxima and is therefore optimal. Else None.
+    """
+    pairs = {}
+    taken = set()
+    for r in refs:
+        row = spkr_overlap[r]
+        if not row:
+            continue
+        best = min(row, key=lambda s: (-row[s], s))
+        if row[best] <= 0:
+            continue
+        if best in taken:
+            return None
+        taken.add(best)
+        pairs[r] = best
+    return pairs
 
+def _map_dense(refs, syss, spkr_overlap):
     # Cost matrix: negative overlap (since we want to maximize overlap)
-    cost_matrix = [[0.0] * len(sys_spkrs) for _ in range(len(ref_spkrs))]
-    for i, r in enumerate(ref_spkrs):
-        for j, s in enumerate(sys_spkrs):
-            cost_matrix[i][j] = -spkr_overlap[r].get(s, 0.0)
+    cost_matrix = [[0.0] * len(syss) for _ in range(len(refs))]
+    for i, r in enumerate(refs):
+        row = spkr_overlap[r]
+        for j, s in enumerate(syss):
+            cost_matrix[i][j] = -row.get(s, 0.0)
 
     # Solve bipartite matching
-    row_ind, col_ind = linear_sum_assignment(cost_matrix)
+    with profiling.stage('assignment') as st:
+        if st:
+            st.count(matrix_cells=len(refs) * len(syss))
+        row_ind, col_ind = linear_sum_assignment(cost_matrix)
+    return {refs[i]: syss[j] for i, j in zip(row_ind, col_ind) if cost_matrix[i][j] < 0}
 
-    mapping = {}
-    for r_idx, s_idx in zip(row_ind, col_ind):
-        mapping[ref_spkrs[r_idx]] = sys_spkrs[s_idx]
-
-    return mapping
+def _map_sparse(refs, syss, spkr_overlap):
+    # Match from the smaller side; the solver does one augmentation per row.
+    col_index = {s: j for j, s in enumerate(syss)}
+    edges = [[(col_index[s], o) for s, o in spkr_overlap[r].items() if o > 0] for r in refs]
+    with profiling.stage('assignment') as st:
+        if st:
+            st.count(matrix_cells=len(refs) * len(syss))
+        if len(refs) <= len(syss):
+            pairs = max_weight_matching(len(refs), len(syss), edges)
+            return {refs[i]: syss[j] for i, j in pairs}
+        by_col = [[] for _ in syss]
+        for i, row in enumerate(edges):
+            for j, o in row:
+                by_col[j].append((i, o))
+        pairs = max_weight_matching(len(syss), len(refs), by_col)
+        return {refs[i]: syss[j] for j, i in pairs}
 
 def create_speaker_segs(uem_score, ref_data, sys_data):
     events = []
@@ -44,18 +182,16 @@ def create_speaker_segs(uem_score, ref_data, sys_data):
             events.append({'TYPE': 'UEM', 'EVENT': 'END', 'TIME': uem.tend})
     
     # Ref events
-    for spkr, segs in ref_data.items():
-        for seg in segs:
-            if seg['TDUR'] > 0:
-                events.append({'TYPE': 'REF', 'SPKR': spkr, 'EVENT': 'BEG', 'TIME': seg['TBEG']})
-                events.append({'TYPE': 'REF', 'SPKR': spkr, 'EVENT': 'END', 'TIME': seg['TEND']})
+    for spkr, tbeg, tend in iter_segments(ref_data):
+        if tend > tbeg:
+            events.append({'TYPE': 'REF', 'SPKR': spkr, 'EVENT': 'BEG', 'TIME': tbeg})
+            events.append({'TYPE': 'REF', 'SPKR': spkr, 'EVENT': 'END', 'TIME': tend})
                 
     # Sys events
-    for spkr, segs in sys_data.items():
-        for seg in segs:
-            if seg['TDUR'] > 0:
-                events.append({'TYPE': 'SYS', 'SPKR': spkr, 'EVENT': 'BEG', 'TIME': seg['TBEG']})
-                events.append({'TYPE': 'SYS', 'SPKR': spkr, 'EVENT': 'END', 'TIME': seg['TEND']})
+    for spkr, tbeg, tend in iter_segments(sys_data):
+        if tend > tbeg:
+            events.append({'TYPE': 'SYS', 'SPKR': spkr, 'EVENT': 'BEG', 'TIME': tbeg})
+            events.append({'TYPE': 'SYS', 'SPKR': spkr, 'EVENT': 'END', 'TIME': tend})
 
     # Sort events
     # Sort order: time ascending. If times equal, END comes before BEG.
@@ -113,95 +249,16 @@ def create_speaker_segs(uem_score, ref_data, sys_data):
                         
     return segments
 
-def exclude_overlapping_speech(uem_data: List[Segment], ref_data: Dict[str, List[Dict]]) -> List[Segment]:
-    # Gather all speaker segments
-    spkr_events = []
-    for spkr, segs in ref_data.items():
-        for seg in segs:
-            if seg['TDUR'] > 0:
-                spkr_events.append({'EVENT': 'BEG', 'TIME': seg['TBEG']})
-                spkr_events.append({'EVENT': 'END', 'TIME': seg['TEND']})
-                
-    spkr_events.sort(key=lambda x: (x['TIME'], 1 if x['EVENT'] == 'BEG' else 0))
-    # Sort events: Time ascending. If times equal, BEG after END.
-    spkr_events.sort(key=lambda x: (x['TIME'], 1 if x['EVENT'] == 'BEG' else 0))
-    
-    # Find overlap regions (spkr_cnt >= 2)
-    overlap_regions = []
-    spkr_cnt = 0
-    tbeg_overlap = 0.0
-    
-    for event in spkr_events:
-        if event['EVENT'] == 'BEG':
-            spkr_cnt += 1
-            if spkr_cnt == 2:
-                tbeg_overlap = event['TIME']
-        else: # END
-            spkr_cnt -= 1
-            if spkr_cnt == 1:
-                # End of overlap
-                # End of overlap
-                if event['TIME'] > tbeg_overlap:
-                    overlap_regions.append({'BEG': tbeg_overlap, 'END': event['TIME']})
-                    
-    # Now exclude these regions from UEM
-    # UEM events: BEG, END
-    # Overlap "events": NSZ BEG, NSZ END.
-    # We want UEM and NOT NSZ.
-    
-    events = []
-    for uem in uem_data:
-        events.append({'TYPE': 'UEM', 'EVENT': 'BEG', 'TIME': uem.tbeg})
-        events.append({'TYPE': 'UEM', 'EVENT': 'END', 'TIME': uem.tend})
-    
-    for ov in overlap_regions:
-        events.append({'TYPE': 'NSZ', 'EVENT': 'BEG', 'TIME': ov['BEG']})
-        events.append({'TYPE': 'NSZ', 'EVENT': 'END', 'TIME': ov['END']})
-        
-    # Sort events.
-    # Sort events.
-    events.sort(key=lambda x: (x['TIME'], 1 if x['EVENT'] == 'BEG' else 0))
-    
-    new_uem = []
-    evl_cnt = 0 # UEM count
-    nsz_cnt = 0 # Overlap count
-    evaluating = False
-    tbeg = 0.0
-    epsilon = 1e-8
-    
-    effective_exclusion = 0.0
-    last_t = events[0]['TIME'] if events else 0.0
-    
-    for event in events:
-        cur_t = event['TIME']
-        if nsz_cnt > 0 and evl_cnt > 0:
-             effective_exclusion += (cur_t - last_t)
-        last_t = cur_t
-        
-        if event['TYPE'] == 'UEM':
-            evl_cnt += 1 if event['EVENT'] == 'BEG' else -1
-        else: # NSZ
-            nsz_cnt += 1 if event['EVENT'] == 'BEG' else -1
-            
-        # Decision logic
-        # Evaluating if evl_cnt > 0 and nsz_cnt == 0
-        
-        # Check transition
-        is_eval_zone = (evl_cnt > 0 and nsz_cnt == 0)
-        
-        if evaluating:
-            if not is_eval_zone:
-                if event['TIME'] > tbeg:
-                    new_uem.append(Segment(tbeg, event['TIME']))
-                evaluating = False
-        elif is_eval_zone:
-            tbeg = event['TIME']
-            evaluating = True
-            
-    return new_uem
+def exclude_overlapping_speech(uem_data: Iterable[Segment], ref_data: SpeakerData) -> List[Segment]:
+    """Remove the regions where two or more REF speakers talk from the UEM."""
+    return _exclude_overlap(IntervalSet.from_segments(uem_data), ref_data).segments()
 
-def score_speaker_diarization(file, chnl, ref_data, sys_data, uem_eval, collar=0.0, ignore_overlap=False):
-    stats = {
+def _exclude_overlap(uem: IntervalSet, ref_data: SpeakerData) -> IntervalSet:
+    tbeg, tend = segment_times(ref_data)
+    return uem.difference(IntervalSet.coverage(tbeg, tend, 2))
+
+def new_stats() -> Dict[str, float]:
+    return {
         'EVAL_TIME': 0.0,
         'EVAL_SPEECH': 0.0,
         'SCORED_TIME': 0.0,
@@ -217,130 +274,496 @@ def score_speaker_diarization(file, chnl, ref_data, sys_data, uem_eval, collar=0
         'MISSED_WORDS': 0,
         'ERROR_WORDS': 0
     }
-    
-    # Helper to sum up UEM duration
-    def sum_uem(uems):
-        return sum(s.tdur for s in uems)
 
+def sum_uem(uems: List[Segment]) -> float:
+    return sum(s.tdur for s in uems)
+
+def score_speaker_diarization(file, chnl, ref_data, sys_data, uem_eval, collar=0.0, ignore_overlap=False, backend=None,
+                              detailed=False, words=None):
+    """
+    Score one recording and return (stats, spkr_map). With detailed, return
+    (stats, spkr_map, breakdown), where breakdown holds per-speaker times,
+    the confusion matrix and JER (see SpeakerActivity.breakdown). With
+    words, the REF LEXEME rows of the recording, the *_WORDS stats are
+    counted as well (see words.score_words).
+    """
+    stats = new_stats()
     stats['EVAL_TIME'] = sum_uem(uem_eval)
-    
-    # 1. Map Speakers using full or filtered UEM
-    uem_score = uem_eval
-    if ignore_overlap:
-        uem_score = exclude_overlapping_speech(uem_score, ref_data)
-        
-    if collar > 0:
-        uem_score = apply_collars(uem_score, ref_data, collar)
-        
-    start_eval_time = sum_uem(uem_eval) # Stats track EVAL_TIME based on original UEM
+    activity = SpeakerActivity() if detailed else None
 
-    # Create segments for mapping AND final scoring
-    eval_segs = create_speaker_segs(uem_score, ref_data, sys_data)
-    
-    spkr_overlap = {} # {ref_spkr: {sys_spkr: overlap_time}}
-    
-    stats['SCORED_TIME'] = sum_uem(uem_score)
-    
-    for seg in eval_segs:
-        # Accumulate overlap for mapping
-        dur = seg['TDUR']
-        for r_spkr in seg['REF']:
-            if r_spkr not in spkr_overlap:
-                spkr_overlap[r_spkr] = {}
-            for s_spkr in seg['SYS']:
-                spkr_overlap[r_spkr][s_spkr] = spkr_overlap[r_spkr].get(s_spkr, 0.0) + dur
-
-    spkr_map = map_speakers(spkr_overlap)
-    
-    # Calculate stats
-    for seg in eval_segs:
-        dur = seg['TDUR']
-        n_ref = len(seg['REF'])
-        n_sys = len(seg['SYS'])
-        
-        if n_ref > 0:
-            stats['SCORED_SPEECH'] += dur
-        
-        if n_ref > 0 and n_sys == 0:
-            stats['MISSED_SPEECH'] += dur
-        if n_sys > 0 and n_ref == 0:
-            stats['FALARM_SPEECH'] += dur
-            
-        stats['SCORED_SPEAKER'] += dur * n_ref
-        stats['MISSED_SPEAKER'] += dur * max(n_ref - n_sys, 0)
-        stats['FALARM_SPEAKER'] += dur * max(n_sys - n_ref, 0)
-        
-        # Speaker error
-        n_map = 0
-        for r_spkr in seg['REF']:
-            mapped_sys = spkr_map.get(r_spkr)
-            if mapped_sys and mapped_sys in seg['SYS']:
-                n_map += 1
-        
-        stats['SPEAKER_ERROR'] += dur * (min(n_ref, n_sys) - n_map)
-        
-    # We need to calculate EVAL_SPEECH correctly (on original UEM).
-    # Simple way: create segs on uem_eval (without collars/overlap exclusion) just for this stat?
-    # Or just iterate ref_data and intersect with uem_eval.
-    # Since we need to be exact, let's do create_speaker_segs on uem_eval if different.
-    
-    if uem_score != uem_eval:
-        raw_segs = create_speaker_segs(uem_eval, ref_data, sys_data)
-        for seg in raw_segs:
-             if len(seg['REF']) > 0:
-                 stats['EVAL_SPEECH'] += seg['TDUR']
+    with profiling.recording(file):
+        if _use_numpy(backend, ref_data, sys_data, uem_eval, [collar]):
+            spkr_map = numpy_scoring.score(ref_data, sys_data, uem_eval, collar, ignore_overlap, stats, map_speakers,
+                                           activity)
+        else:
+            ref_names = speaker_names(ref_data)
+            sys_names = speaker_names(sys_data)
+            if detailed:
+                activity = SpeakerActivity(len(ref_names), len(sys_names))
+            acc = _Accumulator(stats, ref_names, sys_names, activity)
+            sweep_partition(uem_eval, ref_data, sys_data, collar, ignore_overlap, acc)
+            spkr_map = acc.finish()
+        if words:
+            with profiling.stage('words'):
+                uem = IntervalSet.from_segments(uem_eval)
+                stats.update(score_words(words, uem, scored_region(uem, ref_data, collar, ignore_overlap),
+                                         SpeakerTimeline(sys_data), spkr_map))
+        if not detailed:
+            return stats, spkr_map
+        with profiling.stage('breakdown'):
+            return stats, spkr_map, activity.breakdown(spkr_map, map_speakers)
+
+class _Accumulator:
+    """
+    Accumulates stats and the ref x sys overlap over elementary intervals.
+
+    Like create_speaker_segs, intervals no longer than EPSILON are folded into
+    the interval that follows them. A SpeakerActivity, if given, also
+    receives every scored interval.
+    """
+    __slots__ = ('stats', 'overlap', 'activity', 'matched_time', 'carry_eval', 'carry_scored')
+
+    def __init__(self, stats: Dict[str, float], ref_names: List[str], sys_names: List[str],
+                 activity: Optional[SpeakerActivity] = None):
+        self.stats = stats
+        self.overlap = OverlapMatrix(ref_names, sys_names)
+        self.activity = activity
+        if activity is not None:
+            activity.overlap = self.overlap
+        self.matched_time = 0.0 # sum of dur * min(n_ref, n_sys)
+        self.carry_eval = 0.0
+        self.carry_scored = 0.0
+
+    def add(self, dur: float, in_eval: bool, scored: bool, current_ref, current_sys):
+        if dur <= EPSILON:
+            if in_eval:
+                self.carry_eval += dur
+            if scored:
+                self.carry_scored += dur
+            return
+        stats = self.stats
+        n_ref = len(current_ref)
+        if in_eval and n_ref > 0:
+            stats['EVAL_SPEECH'] += dur + self.carry_eval
+        if scored:
+            dur += self.carry_scored
+            n_sys = len(current_sys)
+            stats['SCORED_TIME'] += dur
+            if n_ref > 0:
+                stats['SCORED_SPEECH'] += dur
+                if n_sys == 0:
+                    stats['MISSED_SPEECH'] += dur
+            elif n_sys > 0:
+                stats['FALARM_SPEECH'] += dur
+            stats['SCORED_SPEAKER'] += dur * n_ref
+            stats['MISSED_SPEAKER'] += dur * max(n_ref - n_sys, 0)
+            stats['FALARM_SPEAKER'] += dur * max(n_sys - n_ref, 0)
+            if n_ref and n_sys:
+                self.matched_time += dur * min(n_ref, n_sys)
+                # Accumulate overlap for mapping
+                self.overlap.add(current_ref, current_sys, dur)
+            if self.activity is not None:
+                self.activity.add(dur, current_ref, current_sys)
+        self.carry_eval = 0.0
+        self.carry_scored = 0.0
+
+    def finish(self) -> Dict[str, str]:
+        """Map speakers and add SPEAKER_ERROR. Returns the speaker map."""
+        with profiling.stage('map_speakers') as st:
+            if st:
+                st.count(matrix_cells=len(self.overlap.ref_names) * len(self.overlap.sys_names))
+            spkr_map = map_speakers(self.overlap)
+        # Speaker error: time where both sides talk, minus time the mapped pairs agree.
+        self.stats['SPEAKER_ERROR'] += self.matched_time - self.overlap.mapped_overlap(spkr_map)
+        return spkr_map
+
+EPSILON = 1e-8
+
+# Event kinds for the sweeps below.
+_UEM, _COLLAR, _REF, _SYS = range(4)
+
+def _reference_events(uem_eval: List[Segment], ref_data: SpeakerData, collar: float):
+    times = []
+    events = []
+    for uem in uem_eval:
+        if uem.tdur > EPSILON:
+            times += (uem.tbeg, uem.tend)
+            events += ((_UEM, None, 1), (_UEM, None, -1))
+    for spkr, tbeg, tend in iter_segment_ids(ref_data):
+        if collar > 0:
+            times += (tbeg - collar, tbeg + collar, tend - collar, tend + collar)
+            events += ((_COLLAR, None, 1), (_COLLAR, None, -1), (_COLLAR, None, 1), (_COLLAR, None, -1))
+        if tend > tbeg:
+            times += (tbeg, tend)
+            events += ((_REF, spkr, 1), (_REF, spkr, -1))
+    return times, events
+
+def _system_events(sys_data: SpeakerData):
+    times = []
+    events = []
+    for spkr, tbeg, tend in iter_segment_ids(sys_data):
+        if tend > tbeg:
+            times += (tbeg, tend)
+            events += ((_SYS, spkr, 1), (_SYS, spkr, -1))
+    return times, events
+
+def sweep_partition(uem_eval: List[Segment], ref_data: SpeakerData, sys_data: SpeakerData,
+                    collar: float, ignore_overlap: bool, acc: '_Accumulator'):
+    """
+    Fused single-pass sweep over one sorted array of boundary events.
+
+    Tracks the evaluation UEM, the collar and overlap no-score zones and the
+    active REF/SYS speakers at once, so the elementary segments, SCORED_TIME,
+    EVAL_SPEECH (on the original UEM) and the ref x sys overlap are all
+    accumulated without separate exclude_overlapping_speech, apply_collars and
+    create_speaker_segs passes.
+    """
+    with profiling.stage('events') as st:
+        times, events = _reference_events(uem_eval, ref_data, collar)
+        sys_times, sys_events = _system_events(sys_data)
+        times += sys_times
+        events += sys_events
+        order = sorted(range(len(times)), key=times.__getitem__)
+        if st:
+            st.count(events=len(times))
+
+    uem_cnt = 0
+    collar_cnt = 0
+    ref_segs = 0 # active REF segments, for overlap exclusion
+    current_ref = {}
+    current_sys = {}
+    last_t = None
+
+    with profiling.stage('sweep') as st:
+        for k in order:
+            time = times[k]
+            if last_t is not None and time > last_t:
+                # Close the elementary interval [last_t, time).
+                in_eval = uem_cnt > 0
+                scored = in_eval and collar_cnt == 0 and not (ignore_overlap and ref_segs >= 2)
+                acc.add(time - last_t, in_eval, scored, current_ref, current_sys)
+            last_t = time
+
+            kind, spkr, delta = events[k]
+            if kind == _REF:
+                ref_segs += delta
+                _count(current_ref, spkr, delta)
+            elif kind == _SYS:
+                _count(current_sys, spkr, delta)
+            elif kind == _UEM:
+                uem_cnt += delta
+            else:
+                collar_cnt += delta
+        if st:
+            st.count(segments=max(len(set(times)) - 1, 0))
+
+def _count(active: Dict[int, int], spkr: int, delta: int):
+    cnt = active.get(spkr, 0) + delta
+    if cnt > 0:
+        active[spkr] = cnt
     else:
-        stats['EVAL_SPEECH'] = stats['SCORED_SPEECH']
-        pass
+        active.pop(spkr, None)
 
-    return stats, spkr_map
+class ReferencePartition:
+    """
+    Reference side of a recording, partitioned once for scoring many systems.
 
-def apply_collars(uem_eval: List[Segment], ref_data: Dict[str, List[Dict]], collar: float, max_extend: float = 0.0) -> List[Segment]:
+    Sorts the UEM, collar and REF boundaries a single time and records, for
+    every reference interval, whether it is evaluated and scored and which REF
+    speakers are active. `score` then merges a system's sorted boundaries into
+    this partition with a linear two-pointer walk and returns the same
+    (stats, spkr_map) as score_speaker_diarization.
+    """
+
+    def __init__(self, ref_data: SpeakerData, uem_eval: List[Segment],
+                 collar: float = 0.0, ignore_overlap: bool = False):
+        self.eval_time = sum_uem(uem_eval)
+        self.ref_names = speaker_names(ref_data)
+        times, events = _reference_events(uem_eval, ref_data, collar)
+        order = sorted(range(len(times)), key=times.__getitem__)
+
+        self.bounds = [] # interval k spans bounds[k] .. bounds[k + 1]
+        self.intervals = [] # (in_eval, scored, active ref speakers)
+        uem_cnt = 0
+        collar_cnt = 0
+        ref_segs = 0
+        current_ref = {}
+        for k in order:
+            time = times[k]
+            if self.bounds and time > self.bounds[-1]:
+                in_eval = uem_cnt > 0
+                scored = in_eval and collar_cnt == 0 and not (ignore_overlap and ref_segs >= 2)
+                self.intervals.append((in_eval, scored, tuple(current_ref)))
+                self.bounds.append(time)
+            elif not self.bounds:
+                self.bounds.append(time)
+            kind, spkr, delta = events[k]
+            if kind == _REF:
+                ref_segs += delta
+                _count(current_ref, spkr, delta)
+            elif kind == _UEM:
+                uem_cnt += delta
+            else:
+                collar_cnt += delta
+
+    def score(self, sys_data: SpeakerData):
+        stats = new_stats()
+        stats['EVAL_TIME'] = self.eval_time
+        acc = _Accumulator(stats, self.ref_names, speaker_names(sys_data))
+
+        sys_times, sys_events = _system_events(sys_data)
+        order = sorted(range(len(sys_times)), key=sys_times.__getitem__)
+        n_sys = len(order)
+        current_sys = {}
+        j = 0
+        bounds = self.bounds
+        for k, (in_eval, scored, current_ref) in enumerate(self.intervals):
+            t = bounds[k]
+            end = bounds[k + 1]
+            # Apply system events up to the start of this interval.
+            while j < n_sys and sys_times[order[j]] <= t:
+                _, spkr, delta = sys_events[order[j]]
+                _count(current_sys, spkr, delta)
+                j += 1
+            if not in_eval:
+                acc.add(end - t, False, False, (), ())
+                continue
+            # Split the reference interval at system boundaries.
+            while j < n_sys and sys_times[order[j]] < end:
+                nxt = sys_times[order[j]]
+                if nxt > t:
+                    acc.add(nxt - t, in_eval, scored, current_ref, current_sys)
+                    t = nxt
+                _, spkr, delta = sys_events[order[j]]
+                _count(current_sys, spkr, delta)
+                j += 1
+            acc.add(end - t, in_eval, scored, current_ref, current_sys)
+
+        return stats, acc.finish()
+
+def apply_collars(uem_eval: Iterable[Segment], ref_data: SpeakerData, collar: float,
+                  max_extend: Optional[float] = None) -> List[Segment]:
     """
     Apply collars to UEM.
     Subtracts regions around reference boundaries from the UEM.
+    max_extend never had an effect and is deprecated.
     """
-    
-    events = []
-    
-    # 1. UEM Events
-    for uem in uem_eval:
-        events.append({'EVENT': 'BEG', 'TIME': uem.tbeg})
-        events.append({'EVENT': 'END', 'TIME': uem.tend})
-        
-    # 2. Collar Events (Inverted)
-    if collar > 0:
-        for spkr, segs in ref_data.items():
-            for seg in segs:
-                # Start Exclusion (END event)
-                events.append({'EVENT': 'END', 'TIME': seg['TBEG'] - collar})
-                # End Exclusion (BEG event)
-                events.append({'EVENT': 'BEG', 'TIME': seg['TBEG'] + collar})
-                
-                # Start Exclusion (END event) around TEND
-                events.append({'EVENT': 'END', 'TIME': seg['TEND'] - collar})
-                # End Exclusion (BEG event) around TEND
-                events.append({'EVENT': 'BEG', 'TIME': seg['TEND'] + collar})
-                
-    # Sort
-    # We want BEG < END.
-    events.sort(key=lambda x: (x['TIME'], 0 if x['EVENT'] == 'BEG' else 1))
-    
-    new_uem = []
-    evaluate = 0
-    tbeg = 0.0
-    epsilon = 1e-8
-    
-    for event in events:
-        time = event['TIME']
-        if event['EVENT'] == 'BEG':
-            evaluate += 1
-            if evaluate == 1:
-                tbeg = time
-        else: # END
-            evaluate -= 1
-            if evaluate == 0:
-                if time > tbeg + epsilon:
-                     new_uem.append(Segment(tbeg, time))
-                     
-    return new_uem
+    if max_extend is not None:
+        warnings.warn('apply_collars: max_extend has no effect and will be removed', DeprecationWarning,
+                      stacklevel=2)
+    return _remove_collars(IntervalSet.from_segments(uem_eval), ref_data, collar).segments()
+
+def _remove_collars(uem: IntervalSet, ref_data: SpeakerData, collar: float) -> IntervalSet:
+    if collar <= 0:
+        return uem
+    tbeg, tend = segment_times(ref_data)
+    return uem.difference(IntervalSet.around(tbeg + tend, collar))
+
+def scored_region(uem_eval: Iterable[Segment], ref_data: SpeakerData, collar: float = 0.0,
+                  ignore_overlap: bool = False) -> IntervalSet:
+    """The UEM without collars and, with ignore_overlap, REF overlap."""
+    uem = IntervalSet.from_segments(uem_eval)
+    if ignore_overlap:
+        uem = _exclude_overlap(uem, ref_data)
+    return _remove_collars(uem, ref_data, collar)
+
+def score_systems(file, chnl, ref_data, sys_list, uem_eval, collar=0.0, ignore_overlap=False, backend=None,
+                  words=None):
+    """
+    Score several system outputs against the same reference recording.
+
+    The reference side (UEM, collars, overlap exclusion and REF speaker
+    activity) is partitioned once and each system is merged into it, instead
+    of re-sorting the reference for every system. Returns one
+    (stats, spkr_map) pair per entry of sys_list, each equal to what
+    score_speaker_diarization returns for that system.
+    """
+    with profiling.recording(file):
+        with profiling.stage('partition'):
+            part = partition_reference(ref_data, uem_eval, collar, ignore_overlap, backend)
+        results = []
+        for sys_data in sys_list:
+            with profiling.stage('merge'):
+                results.append(part.score(sys_data))
+        if words:
+            with profiling.stage('words'):
+                uem = IntervalSet.from_segments(uem_eval)
+                scored = scored_region(uem, ref_data, collar, ignore_overlap)
+                for sys_data, (stats, spkr_map) in zip(sys_list, results):
+                    stats.update(score_words(words, uem, scored, SpeakerTimeline(sys_data), spkr_map))
+        return results
+
+class _NumpyReferencePartition:
+    """numpy_scoring.ReferencePartition with the score() interface of ReferencePartition."""
+
+    def __init__(self, ref_data: SpeakerData, uem_eval: List[Segment],
+                 collar: float = 0.0, ignore_overlap: bool = False):
+        self.eval_time = sum_uem(uem_eval)
+        self.args = (ref_data, uem_eval, collar, ignore_overlap)
+        self.part = numpy_scoring.ReferencePartition(ref_data, uem_eval, collar, ignore_overlap)
+        self._python = None # built for systems too large for the dense arrays
+
+    def score(self, sys_data: SpeakerData):
+        ref_data, uem_eval, collar, _ = self.args
+        if not _use_numpy('numpy', ref_data, sys_data, uem_eval, [collar]):
+            if self._python is None:
+                self._python = ReferencePartition(*self.args)
+            return self._python.score(sys_data)
+        stats = new_stats()
+        stats['EVAL_TIME'] = self.eval_time
+        spkr_map = numpy_scoring.score_partition(self.part.merge(sys_data), stats, map_speakers)
+        return stats, spkr_map
+
+def partition_reference(ref_data, uem_eval, collar=0.0, ignore_overlap=False, backend=None):
+    """
+    Partition the reference side of a recording once for the given backend.
+    The result's score(sys_data) returns (stats, spkr_map) as
+    score_speaker_diarization would, so it can be kept and reused for any
+    number of systems.
+    """
+    if _use_numpy(backend, ref_data, {}, uem_eval, [collar]):
+        return _NumpyReferencePartition(ref_data, uem_eval, collar, ignore_overlap)
+    return ReferencePartition(ref_data, uem_eval, collar, ignore_overlap)
+
+class SettingsPartition:
+    """
+    Elementary intervals of one recording shared by several scoring settings.
+
+    The boundaries of the UEM, REF, SYS and the collars of every requested
+    collar size are sorted once. Each interval records whether it is
+    evaluated, a bit mask of the collars covering it (plus one bit for REF
+    overlap) and an id for its set of active REF/SYS speakers, so
+    `score(collar, ignore_overlap)` only masks intervals instead of
+    re-sorting and re-segmenting the recording.
+    """
+
+    def __init__(self, ref_data: SpeakerData, sys_data: SpeakerData, uem_eval: List[Segment],
+                 collars=(0.0,)):
+        self.eval_time = sum_uem(uem_eval)
+        self.ref_names = speaker_names(ref_data)
+        self.sys_names = speaker_names(sys_data)
+        self.collars = sorted(set(c for c in collars if c > 0))
+        times, events = _reference_events(uem_eval, ref_data, 0.0)
+        sys_times, sys_events = _system_events(sys_data)
+        times += sys_times
+        events += sys_events
+        for k, collar in enumerate(self.collars):
+            bit = 1 << k
+            for _, tbeg, tend in iter_segments(ref_data):
+                times += (tbeg - collar, tbeg + collar, tend - collar, tend + collar)
+                events += ((_COLLAR, bit, 1), (_COLLAR, bit, -1), (_COLLAR, bit, 1), (_COLLAR, bit, -1))
+        self.overlap_bit = 1 << len(self.collars)
+
+        order = sorted(range(len(times)), key=times.__getitem__)
+        self.intervals = [] # (dur, in_eval, no-score bits, state id)
+        self.states = [] # (active ref, active sys) per state id
+        state_ids = {}
+        uem_cnt = 0
+        ref_segs = 0
+        collar_cnt = {} # {collar bit: active collars}
+        current_ref = {}
+        current_sys = {}
+        state = None
+        last_t = None
+        for k in order:
+            time = times[k]
+            if last_t is not None and time > last_t:
+                if state is None:
+                    key = (tuple(current_ref), tuple(current_sys))
+                    state = state_ids.get(key)
+                    if state is None:
+                        state = state_ids[key] = len(self.states)
+                        self.states.append(key)
+                bits = sum(collar_cnt)
+                if ref_segs >= 2:
+                    bits |= self.overlap_bit
+                self.intervals.append((time - last_t, uem_cnt > 0, bits, state))
+            last_t = time
+            kind, spkr, delta = events[k]
+            if kind == _REF:
+                ref_segs += delta
+                _count(current_ref, spkr, delta)
+                state = None
+            elif kind == _SYS:
+                _count(current_sys, spkr, delta)
+                state = None
+            elif kind == _UEM:
+                uem_cnt += delta
+            else:
+                _count(collar_cnt, spkr, delta)
+
+    def score(self, collar: float = 0.0, ignore_overlap: bool = False):
+        """Return (stats, spkr_map) for one setting, as score_speaker_diarization would."""
+        excluded = 1 << self.collars.index(collar) if collar > 0 else 0
+        if ignore_overlap:
+            excluded |= self.overlap_bit
+        has_ref = [bool(ref) for ref, _ in self.states]
+
+        # Scored time per speaker state; tiny intervals are folded into the
+        # next one as in _Accumulator.add.
+        state_time = [0.0] * len(self.states)
+        eval_speech = 0.0
+        carry_eval = 0.0
+        carry_scored = 0.0
+        for dur, in_eval, bits, state in self.intervals:
+            scored = in_eval and not bits & excluded
+            if dur <= EPSILON:
+                if in_eval:
+                    carry_eval += dur
+                if scored:
+                    carry_scored += dur
+                continue
+            if in_eval and has_ref[state]:
+                eval_speech += dur + carry_eval
+            if scored:
+                state_time[state] += dur + carry_scored
+            carry_eval = 0.0
+            carry_scored = 0.0
+
+        stats = new_stats()
+        stats['EVAL_TIME'] = self.eval_time
+        acc = _Accumulator(stats, self.ref_names, self.sys_names)
+        for (current_ref, current_sys), dur in zip(self.states, state_time):
+            if dur > 0:
+                acc.add(dur, False, True, current_ref, current_sys)
+        stats['EVAL_SPEECH'] = eval_speech
+        return stats, acc.finish()
+
+def score_settings(file, chnl, ref_data, sys_data, uem_eval, settings, backend=None, words=None):
+    """
+    Score one recording under several (collar, ignore_overlap) settings.
+
+    The recording is partitioned once for all settings; each setting then only
+    masks intervals. Returns one (stats, spkr_map) pair per setting, each
+    equal to what score_speaker_diarization returns for it.
+    """
+    settings = list(settings)
+    collars = [collar for collar, _ in settings]
+    with profiling.recording(file):
+        if _use_numpy(backend, ref_data, sys_data, uem_eval, collars):
+            with profiling.stage('partition'):
+                part = numpy_scoring.SettingsPartition(ref_data, sys_data, uem_eval, collars)
+            eval_time = sum_uem(uem_eval)
+            results = []
+            for collar, ignore_overlap in settings:
+                stats = new_stats()
+                stats['EVAL_TIME'] = eval_time
+                with profiling.stage('mask'):
+                    masked = part.partition(collar, ignore_overlap)
+                spkr_map = numpy_scoring.score_partition(masked, stats, map_speakers)
+                results.append((stats, spkr_map))
+        else:
+            with profiling.stage('partition'):
+                part = SettingsPartition(ref_data, sys_data, uem_eval, collars)
+            results = []
+            for collar, ignore_overlap in settings:
+                with profiling.stage('mask'):
+                    results.append(part.score(collar, ignore_overlap))
+        if words:
+            with profiling.stage('words'):
+                uem = IntervalSet.from_segments(uem_eval)
+                timeline = SpeakerTimeline(sys_data)
+                for (collar, ignore_overlap), (stats, spkr_map) in zip(settings, results):
+                    scored = scored_region(uem, ref_data, collar, ignore_overlap)
+                    stats.update(score_words(words, uem, scored, timeline, spkr_map))
+        return results
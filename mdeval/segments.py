@@ -0,0 +1,127 @@
+"""
+Columnar storage for speaker segments.
+
+A `SegmentTable` holds the speaker segments of one recording as parallel
+`array('d')` columns for TBEG/TEND plus interned integer speaker ids, which
+costs 20 bytes per segment instead of a per-segment dict. The scoring
+functions accept a `SegmentTable` wherever they accept the
+{spkr: [segment dict]} mapping.
+"""
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+
+class SegmentTable:
+    """
+    Speaker segments of one recording in columnar form.
+
+    Attributes:
+        tbeg, tend: array('d') of segment start and end times.
+        spkr: array('i') of speaker ids, indexing `speakers`.
+        speakers: speaker names in order of first appearance.
+    """
+    __slots__ = ('tbeg', 'tend', 'spkr', 'speakers', '_ids')
+
+    def __init__(self):
+        self.tbeg = array('d')
+        self.tend = array('d')
+        self.spkr = array('i')
+        self.speakers = []
+        self._ids = {}
+
+    @classmethod
+    def from_speaker_dict(cls, data: Dict[str, List[Dict[str, Any]]]) -> 'SegmentTable':
+        """Build a table from a {spkr: [{TBEG, TEND, ...}]} mapping."""
+        table = cls()
+        for spkr, segs in data.items():
+            spkr_id = table.speaker_id(spkr)
+            table.tbeg.extend([seg['TBEG'] for seg in segs])
+            table.tend.extend([seg['TEND'] for seg in segs])
+            table.spkr.extend([spkr_id] * len(segs))
+        return table
+
+    def speaker_id(self, name: str) -> int:
+        """Return the interned id of a speaker, registering it if needed."""
+        spkr_id = self._ids.get(name)
+        if spkr_id is None:
+            spkr_id = self._ids[name] = len(self.speakers)
+            self.speakers.append(name)
+        return spkr_id
+
+    def append(self, spkr: str, tbeg: float, tdur: float):
+        self.tbeg.append(tbeg)
+        self.tend.append(tbeg + tdur)
+        self.spkr.append(self.speaker_id(spkr))
+
+    def __len__(self) -> int:
+        return len(self.tbeg)
+
+    def rows(self) -> Iterator[Tuple[str, float, float]]:
+        """Yield (spkr, tbeg, tend) for every segment."""
+        names = self.speakers
+        for spkr_id, tbeg, tend in zip(self.spkr, self.tbeg, self.tend):
+            yield names[spkr_id], tbeg, tend
+
+    def to_speaker_dict(self) -> Dict[str, List[Dict[str, float]]]:
+        """Expand into the {spkr: [{TBEG, TDUR, TEND}]} mapping."""
+        data = {name: [] for name in self.speakers}
+        for spkr, tbeg, tend in self.rows():
+            data[spkr].append({'TBEG': tbeg, 'TDUR': tend - tbeg, 'TEND': tend})
+        return data
+
+    def numpy(self):
+        """Zero-copy NumPy views (tbeg, tend, spkr) of the columns."""
+        if np is None:
+            raise ImportError('SegmentTable.numpy() requires NumPy to be installed')
+        return (np.frombuffer(self.tbeg, dtype=np.float64),
+                np.frombuffer(self.tend, dtype=np.float64),
+                np.frombuffer(self.spkr, dtype=np.intc))
+
+    def __repr__(self):
+        return f"SegmentTable({len(self)} segments, {len(self.speakers)} speakers)"
+
+
+SpeakerData = Union[SegmentTable, Dict[str, List[Dict[str, Any]]]]
+
+
+def iter_segments(data: SpeakerData) -> Iterator[Tuple[str, float, float]]:
+    """Yield (spkr, tbeg, tend) from a SegmentTable or a {spkr: [segment dict]} mapping."""
+    if isinstance(data, SegmentTable):
+        yield from data.rows()
+        return
+    for spkr, segs in data.items():
+        for seg in segs:
+            yield spkr, seg['TBEG'], seg['TEND']
+
+
+def iter_segment_ids(data: SpeakerData) -> Iterator[Tuple[int, float, float]]:
+    """Like iter_segments, but yield speaker ids indexing speaker_names(data)."""
+    if isinstance(data, SegmentTable):
+        yield from zip(data.spkr, data.tbeg, data.tend)
+        return
+    for spkr_id, segs in enumerate(data.values()):
+        for seg in segs:
+            yield spkr_id, seg['TBEG'], seg['TEND']
+
+
+def segment_times(data: SpeakerData) -> Tuple[array, array]:
+    """(tbeg, tend) columns of all segments; a SegmentTable's own arrays are returned without copying."""
+    if isinstance(data, SegmentTable):
+        return data.tbeg, data.tend
+    tbeg = array('d')
+    tend = array('d')
+    for _, b, e in iter_segments(data):
+        tbeg.append(b)
+        tend.append(e)
+    return tbeg, tend
+
+
+def speaker_names(data: SpeakerData) -> List[str]:
+    if isinstance(data, SegmentTable):
+        return list(data.speakers)
+    return list(data.keys())
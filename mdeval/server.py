@@ -0,0 +1,329 @@
+"""
+Long-running scoring server with an in-memory reference cache.
+
+Scoring many hypotheses against a fixed reference set from the command line
+pays interpreter startup, imports and a full reference parse on every run.
+The server loads the REF RTTM (with its LEXEME rows) and UEM once, keeps every
+recording's reference partition (see `scoring.partition_reference`) and its
+scored region for word counts once they have been built, for the last few
+collar settings requested, and scores hypotheses sent over a Unix socket or a
+localhost TCP port.
+
+Protocol: newline-delimited JSON, one request per line, answered in any
+order on the same connection:
+
+    request   {"id": 1, "sys": "<RTTM text>"} or {"id": 1, "sys_path": "hyp.rttm"}
+              optional: "collar" (0.0), "single_speaker" (false), "per_file" (false)
+    response  {"id": 1, "ok": true, "stats": {...}, "der": 12.3, "recordings": 40}
+              plus "files": {file: stats} with per_file,
+              or {"id": 1, "ok": false, "error": "..."}
+
+Scoring runs on a process pool; each worker loads the references once. While
+all workers are busy, queued requests with the same options are grouped, and
+each batch is scored recording by recording, so the reference partition of a
+recording is shared by the hypotheses of the batch.
+
+Usage:
+    python -m mdeval.server -r ref.rttm [-u all.uem] (--socket PATH | --port N) [--workers N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .cli import add_stats, diarization_error, infer_uem, new_total_stats
+from .io import load_rttm_fast, load_uem, parse_rttm_fast
+from .intervals import IntervalSet
+from .scoring import BACKENDS, partition_reference, resolve_backend, scored_region
+from .words import SpeakerTimeline, score_words
+
+# Longest accepted request line (hypotheses are sent inline).
+MAX_REQUEST_BYTES = 1 << 30
+# Partitions kept per recording, one per (collar, single_speaker) setting;
+# the least recently used one is dropped beyond this.
+MAX_SETTINGS_PER_RECORDING = 4
+
+
+class ReferenceSet:
+    """REF recordings and UEMs kept in memory, with cached reference partitions."""
+
+    def __init__(self, ref_path: str, uem_path: Optional[str] = None, backend: Optional[str] = None):
+        self.ref = load_rttm_fast(ref_path, words=True)
+        self.uem = load_uem(uem_path) if uem_path else None
+        self.backend = resolve_backend(backend)
+        self._partitions = {} # {(file, chnl): {(collar, single_speaker): (partition, word regions)}}
+
+    def partition(self, file: str, chnl: str, collar: float, single_speaker: bool):
+        """
+        The reference partition of a recording and, if it has REF words, the
+        (UEM, scored region) pair they are counted against (else None).
+        """
+        settings = self._partitions.setdefault((file, chnl), {})
+        key = (collar, single_speaker)
+        entry = settings.pop(key, None)
+        if entry is None:
+            ref_segs = self.ref[file][chnl]['SPEAKER']
+            if self.uem and file in self.uem and chnl in self.uem[file]:
+                uem_eval = self.uem[file][chnl]
+            else:
+                uem_eval = infer_uem(ref_segs)
+            part = partition_reference(ref_segs, uem_eval, collar, single_speaker, self.backend)
+            regions = None
+            if self.ref[file][chnl]['LEXEME']:
+                uem = IntervalSet.from_segments(uem_eval)
+                regions = (uem, scored_region(uem, ref_segs, collar, single_speaker))
+            entry = (part, regions)
+            if len(settings) >= MAX_SETTINGS_PER_RECORDING:
+                del settings[next(iter(settings))]
+        settings[key] = entry # most recently used last
+        return entry
+
+    def score(self, sys_list: List[Dict], collar: float = 0.0, single_speaker: bool = False):
+        """
+        Score parsed SYS RTTMs ({file: {chnl: {'SPEAKER': ...}}}). Returns
+        (totals, {file: stats}) per system, equal to a CLI run on each system:
+        REF recordings missing from a system are skipped for that system.
+        """
+        results = [(new_total_stats(), {}) for _ in sys_list]
+        for file in sorted(self.ref):
+            for chnl in sorted(self.ref[file]):
+                having = [k for k, sys_data in enumerate(sys_list) if chnl in sys_data.get(file, {})]
+                if not having:
+                    continue
+                part, regions = self.partition(file, chnl, collar, single_speaker)
+                for k in having:
+                    sys_segs = sys_list[k][file][chnl]['SPEAKER']
+                    stats, spkr_map = part.score(sys_segs)
+                    if regions:
+                        stats.update(score_words(self.ref[file][chnl]['LEXEME'], *regions,
+                                                 SpeakerTimeline(sys_segs), spkr_map))
+                    totals, files = results[k]
+                    add_stats(totals, stats)
+                    add_stats(files.setdefault(file, new_total_stats()), stats)
+        return results
+
+
+_references = None # this worker's ReferenceSet
+
+
+def _init_worker(ref_path: str, uem_path: Optional[str], backend: Optional[str]):
+    global _references
+    _references = ReferenceSet(ref_path, uem_path, backend)
+
+
+def _options(request: Dict[str, Any]):
+    """The (collar, single_speaker) scoring options of a request."""
+    collar = request.get('collar', 0.0)
+    if isinstance(collar, bool) or not isinstance(collar, (int, float)) or not 0 <= collar < float('inf'):
+        raise ValueError(f"'collar' must be a non-negative number, got {collar!r}")
+    single_speaker = request.get('single_speaker', False)
+    if not isinstance(single_speaker, bool):
+        raise ValueError(f"'single_speaker' must be true or false, got {single_speaker!r}")
+    return float(collar), single_speaker
+
+
+def _load_sys(request: Dict[str, Any]):
+    for field in ('sys', 'sys_path'):
+        if field in request and not isinstance(request[field], str):
+            raise ValueError(f"'{field}' must be a string")
+    if 'sys' in request:
+        return parse_rttm_fast(request['sys'].encode())
+    if 'sys_path' in request:
+        with open(request['sys_path'], 'rb') as f:
+            return parse_rttm_fast(f.read())
+    raise ValueError("request needs 'sys' or 'sys_path'")
+
+
+def _score_batch(requests: List[Dict[str, Any]], collar: float, single_speaker: bool) -> List[Dict[str, Any]]:
+    """Score requests sharing the same options; returns one response per request."""
+    responses = [None] * len(requests)
+    parsed = []
+    for k, request in enumerate(requests):
+        try:
+            parsed.append((k, _load_sys(request)))
+        except (OSError, ValueError) as e:
+            responses[k] = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            # A malformed hypothesis only fails its own request.
+            responses[k] = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+    results = _references.score([sys_data for _, sys_data in parsed], collar, single_speaker)
+    for (k, _), (totals, files) in zip(parsed, results):
+        response = {'ok': True, 'stats': totals, 'der': diarization_error(totals)[3], 'recordings': len(files)}
+        if requests[k].get('per_file'):
+            response['files'] = files
+        responses[k] = response
+    return responses
+
+
+class ScoringServer:
+    """
+    Asyncio front end: accepts requests, batches them and scores them on a
+    pool of `workers` processes (0 scores on a thread of this process).
+    """
+
+    def __init__(self, ref_path: str, uem_path: Optional[str] = None, backend: Optional[str] = None,
+                 workers: int = 1, max_batch: int = 64):
+        init_args = (ref_path, uem_path, backend)
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args)
+        else:
+            _init_worker(*init_args)
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.workers = max(workers, 1)
+        self.max_batch = max_batch
+        self._queue = None
+        self._slots = None
+
+    async def start(self, socket_path: Optional[str] = None, host: str = '127.0.0.1', port: int = 0):
+        """Start listening and return the asyncio server."""
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        asyncio.ensure_future(self._dispatch())
+        if socket_path:
+            return await asyncio.start_unix_server(self._handle, path=socket_path, limit=MAX_REQUEST_BYTES)
+        return await asyncio.start_server(self._handle, host, port, limit=MAX_REQUEST_BYTES)
+
+    async def serve(self, socket_path: Optional[str] = None, host: str = '127.0.0.1', port: int = 0,
+                    ready=None):
+        """Serve until cancelled; ready(address) is called once listening."""
+        server = await self.start(socket_path, host, port)
+        if ready is not None:
+            ready(socket_path or server.sockets[0].getsockname()[:2])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown()
+
+    async def _dispatch(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            pending = [await self._queue.get()]
+            # Wait for a free worker; requests arriving meanwhile join the batch.
+            await self._slots.acquire()
+            held = True # a slot not handed to _run yet
+            try:
+                while len(pending) < self.max_batch and not self._queue.empty():
+                    pending.append(self._queue.get_nowait())
+                groups = {}
+                for request, key, future in pending:
+                    groups.setdefault(key, []).append((request, future))
+                for n, (key, group) in enumerate(groups.items()):
+                    if n > 0:
+                        await self._slots.acquire()
+                        held = True
+                    asyncio.ensure_future(self._run(loop, key, group))
+                    held = False
+            except Exception as e:
+                # Fail the requests not handed to a worker and keep serving.
+                if held:
+                    self._slots.release()
+                for _, _, future in pending:
+                    if not future.done():
+                        future.set_result({'ok': False, 'error': f"{type(e).__name__}: {e}"})
+
+    async def _run(self, loop, key, group):
+        try:
+            responses = await loop.run_in_executor(self.executor, _score_batch, [r for r, _ in group], *key)
+        except Exception as e:
+            responses = [{'ok': False, 'error': f"{type(e).__name__}: {e}"}] * len(group)
+        finally:
+            self._slots.release()
+        for (_, future), response in zip(group, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def _handle(self, reader, writer):
+        tasks = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                tasks.append(asyncio.ensure_future(self._respond(line, writer)))
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def _respond(self, line: bytes, writer):
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('request must be a JSON object')
+            options = _options(request)
+        except ValueError as e:
+            request_id = request.get('id') if isinstance(request, dict) else None
+            response = {'id': request_id, 'ok': False, 'error': f"invalid request: {e}"}
+        else:
+            future = asyncio.get_event_loop().create_future()
+            await self._queue.put((request, options, future))
+            response = dict(await future, id=request.get('id'))
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+
+class ScoringClient:
+    """Blocking client for a ScoringServer, one request at a time."""
+
+    def __init__(self, socket_path: Optional[str] = None, host: str = '127.0.0.1', port: Optional[int] = None):
+        if socket_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(socket_path)
+        else:
+            self._sock = socket.create_connection((host, port))
+        self._file = self._sock.makefile('rwb')
+        self._next_id = 0
+
+    def score(self, sys: Optional[str] = None, sys_path: Optional[str] = None, collar: float = 0.0,
+              single_speaker: bool = False, per_file: bool = False) -> Dict[str, Any]:
+        """Score RTTM text or a path readable by the server; returns the response dict."""
+        self._next_id += 1
+        request = {'id': self._next_id, 'collar': collar, 'single_speaker': single_speaker, 'per_file': per_file}
+        if sys is not None:
+            request['sys'] = sys
+        else:
+            request['sys_path'] = os.path.abspath(sys_path)
+        self._file.write(json.dumps(request).encode() + b'\n')
+        self._file.flush()
+        return json.loads(self._file.readline())
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve md-eval scoring against a fixed reference set')
+    parser.add_argument('-r', '--ref', required=True, help='Reference RTTM file')
+    parser.add_argument('-u', '--uem', help='UEM file (Evaluation Partition)')
+    parser.add_argument('--socket', help='Listen on this Unix socket path')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP host when --socket is not given (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port when --socket is not given (default: 8765)')
+    parser.add_argument('--workers', type=int, default=1, help='Scoring worker processes (0 = score in the server process)')
+    parser.add_argument('--backend', choices=BACKENDS, default='auto', help="Scoring backend ('auto' uses NumPy when installed)")
+    args = parser.parse_args()
+
+    server = ScoringServer(args.ref, args.uem, args.backend, args.workers)
+    ready = lambda address: print(f"Listening on {address}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.socket, args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
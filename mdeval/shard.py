@@ -0,0 +1,191 @@
+"""
+Sharded scoring with mergeable partial results.
+
+`--shard i/N` scores only the REF recordings whose file id hashes to shard i
+(1-based) of N. The hash is a CRC-32 of the file id, so every machine agrees
+on the split without any coordination. With `--partial PATH`, the run also
+writes its per-recording results to a partial result file, and `mdeval merge`
+combines any number of partials into the report of a single run.
+
+A partial is a JSON Lines file: a header with the scoring options, one line
+per recording with its stats and speaker maps for every system and collar, in
+sorted (file, chnl) order, and a footer with the recording count. Partials
+are written under a temporary name and renamed once complete, so a shared
+directory never holds a half-written partial. Merging streams the sorted
+partials through a k-way merge, so its cost is reading the files, and the
+totals are summed in the same recording order as a single run, which makes
+them bitwise identical.
+"""
+import heapq
+import json
+import os
+import zlib
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+PARTIAL_FORMAT = 'mdeval-partial'
+PARTIAL_VERSION = 1
+
+# Header fields that must agree between partials being merged.
+_MERGE_KEYS = ('stat_keys', 'collars', 'single_speaker', 'shard_count')
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse 'i/N' into (i, N) with 1 <= i <= N."""
+    try:
+        index, count = (int(v) for v in value.split('/'))
+    except ValueError:
+        raise ValueError(f"invalid shard: {value} (expected i/N)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard: {value} (expected 1 <= i <= N)")
+    return index, count
+
+
+def shard_of(file: str, count: int) -> int:
+    """The 1-based shard of recording `file` among `count` shards."""
+    return zlib.crc32(file.encode('utf-8')) % count + 1
+
+
+class ShardView(Mapping):
+    """The recordings of `data` ({file: ...}) that fall in shard `index` of `count`."""
+
+    def __init__(self, data: Mapping, index: int, count: int):
+        self.data = data
+        self.index = index
+        self.count = count
+
+    def __contains__(self, file) -> bool:
+        return shard_of(file, self.count) == self.index and file in self.data
+
+    def __getitem__(self, file: str):
+        if shard_of(file, self.count) != self.index:
+            raise KeyError(file)
+        return self.data[file]
+
+    def __iter__(self) -> Iterator[str]:
+        return (file for file in self.data if shard_of(file, self.count) == self.index)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class PartialWriter:
+    """
+    Writes a partial result file. results[k][s] passed to add() is the
+    (stats, spkr_map) pair of system k under collar s. Use as a context
+    manager: the file only appears at `path` when the block completes.
+    """
+
+    def __init__(self, path: str, systems: Sequence[str], collars: Sequence[float], single_speaker: bool,
+                 stat_keys: Sequence[str], shards: Sequence[int] = (1,), shard_count: int = 1):
+        self.path = path
+        self.stat_keys = list(stat_keys)
+        self.count = 0
+        self._tmp_path = f"{path}.tmp{os.getpid()}"
+        self._f = open(self._tmp_path, 'w')
+        self._write({'format': PARTIAL_FORMAT, 'version': PARTIAL_VERSION, 'systems': list(systems),
+                     'collars': list(collars), 'single_speaker': single_speaker, 'stat_keys': self.stat_keys,
+                     'shards': sorted(shards), 'shard_count': shard_count})
+
+    def _write(self, obj: Dict[str, Any]):
+        self._f.write(json.dumps(obj, separators=(',', ':')) + '\n')
+
+    def add(self, file: str, chnl: str, results: Sequence[Sequence[Tuple[Dict[str, float], Dict[str, str]]]]):
+        self._write({'file': file, 'chnl': chnl,
+                     'results': [[[[stats.get(k, 0) for k in self.stat_keys], spkr_map]
+                                  for stats, spkr_map in sys_results] for sys_results in results]})
+        self.count += 1
+
+    def close(self):
+        self._write({'recordings': self.count})
+        self._f.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self):
+        self._f.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+
+def read_partial(path: str) -> Tuple[Dict[str, Any], Iterator[Tuple[str, str, List]]]:
+    """
+    Return (header, rows) of a partial. rows yields (file, chnl, results) with
+    results[k][s] = (stats, spkr_map), and raises ValueError at its end if
+    the file is truncated. Only the header is read here; rows reopens the
+    file when iterated, so an unused rows holds no open file.
+    """
+    with open(path) as f:
+        try:
+            header = json.loads(f.readline() or 'null')
+        except ValueError:
+            header = None
+        offset = f.tell()
+    if not isinstance(header, dict) or header.get('format') != PARTIAL_FORMAT:
+        raise ValueError(f"{path} is not an mdeval partial result file")
+    if header.get('version') != PARTIAL_VERSION:
+        raise ValueError(f"{path} has partial format version {header.get('version')}, expected {PARTIAL_VERSION}")
+    return header, _read_rows(path, offset, header['stat_keys'])
+
+
+def _read_rows(path: str, offset: int, stat_keys: List[str]):
+    count = 0
+    with open(path) as f:
+        f.seek(offset)
+        for line in f:
+            row = json.loads(line)
+            if 'file' not in row:
+                if row.get('recordings') != count:
+                    break
+                return
+            results = [[(dict(zip(stat_keys, values)), spkr_map) for values, spkr_map in sys_results]
+                       for sys_results in row['results']]
+            yield row['file'], row['chnl'], results
+            count += 1
+    raise ValueError(f"{path} is truncated or corrupt")
+
+
+def merge_partials(paths: Sequence[str]) -> Tuple[Dict[str, Any], Iterator[Tuple[str, str, List]]]:
+    """
+    Combine partials into one (header, rows) in sorted (file, chnl) order.
+    The header's 'shards' lists the shards covered and 'missing' those of
+    the shard count that no partial covers. Raises ValueError for partials
+    with different options or overlapping shards.
+    """
+    if not paths:
+        raise ValueError('no partial result files given')
+    partials = [read_partial(path) for path in paths]
+    header = dict(partials[0][0])
+    shards = set()
+    for path, (other, _) in zip(paths, partials):
+        for key in _MERGE_KEYS:
+            if other[key] != header[key]:
+                raise ValueError(f"{path} was scored with {key}={other[key]}, but {paths[0]} with {header[key]}")
+        if len(other['systems']) != len(header['systems']):
+            raise ValueError(f"{path} scores {len(other['systems'])} systems, but {paths[0]} {len(header['systems'])}")
+        overlap = shards.intersection(other['shards'])
+        if overlap:
+            raise ValueError(f"{path} repeats shard(s) {', '.join(map(str, sorted(overlap)))}")
+        shards.update(other['shards'])
+    header['shards'] = sorted(shards)
+    header['missing'] = [i for i in range(1, header['shard_count'] + 1) if i not in shards]
+    rows = heapq.merge(*(rows for _, rows in partials), key=lambda row: (row[0], row[1]))
+    return header, _unique_rows(rows)
+
+
+def _unique_rows(rows):
+    last = None
+    for row in rows:
+        key = (row[0], row[1])
+        if key == last:
+            raise ValueError(f"recording {key[0]} channel {key[1]} appears in several partials")
+        last = key
+        yield row
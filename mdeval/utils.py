@@ -1,6 +1,8 @@
 from typing import List, Tuple, Dict, Any, Optional
 
 class Segment:
+    __slots__ = ('tbeg', 'tend')
+
     def __init__(self, tbeg: float, tend: float):
         self.tbeg = tbeg
         self.tend = tend
@@ -26,14 +28,6 @@ class Segment:
 
 
 def merge_segments(segments: List[Segment]) -> List[Segment]:
-    if not segments:
-        return []
-    sorted_segs = sorted(segments, key=lambda s: s.tbeg)
-    merged = [sorted_segs[0]]
-    for current in sorted_segs[1:]:
-        last = merged[-1]
-        if current.tbeg <= last.tend:
-            last.tend = max(last.tend, current.tend)
-        else:
-            merged.append(current)
-    return merged
+    """Merge overlapping or touching segments into new sorted segments; the input is left unchanged."""
+    from .intervals import IntervalSet  # intervals imports Segment from here
+    return IntervalSet.from_segments(segments).segments()
@@ -0,0 +1,163 @@
+"""
+Word-weighted speaker diarization scoring.
+
+As in md-eval, every REF word (LEXEME row) counts at its midpoint
+TBEG + TDUR / 2:
+
+- EVAL_WORDS: words whose midpoint falls in the UEM.
+- SCORED_WORDS: words whose midpoint falls in the scored region, the UEM
+  without collars and, with overlap exclusion, REF overlap.
+- MISSED_WORDS: scored words with no SYS speaker talking at the midpoint.
+- ERROR_WORDS: scored words during which SYS speakers talk, but not the one
+  the word's speaker is mapped to.
+
+Midpoints are located by binary search: the UEM and scored region are
+`IntervalSet`s and the SYS speakers a `SpeakerTimeline` of sorted
+boundaries, so W words cost O(W log S) for S segments, in any order.
+With NumPy installed, the searches of columnar words run in bulk.
+"""
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+from .intervals import IntervalSet
+from .segments import SegmentTable, SpeakerData, iter_segment_ids, speaker_names
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+WORD_KEYS = ('EVAL_WORDS', 'SCORED_WORDS', 'MISSED_WORDS', 'ERROR_WORDS')
+
+# LEXEME rows as a SegmentTable or as load_rttm row dicts.
+Words = Union[SegmentTable, List[Dict[str, Any]]]
+
+
+def iter_words(words: Words) -> Iterator[Tuple[str, float]]:
+    """Yield (spkr, midpoint) for every word, computed alike for both forms."""
+    if isinstance(words, SegmentTable):
+        names = words.speakers
+        for spkr_id, tbeg, tend in zip(words.spkr, words.tbeg, words.tend):
+            yield names[spkr_id], tbeg + (tend - tbeg) / 2
+        return
+    for word in words:
+        tbeg = word['TBEG']
+        yield word['SPKR'], tbeg + (word['TEND'] - tbeg) / 2
+
+
+def words_table(words: Words) -> SegmentTable:
+    """The words as a SegmentTable of (speaker, tbeg, tend)."""
+    if isinstance(words, SegmentTable):
+        return words
+    table = SegmentTable()
+    for word in words:
+        table.append(word['SPKR'], word['TBEG'], word['TDUR'])
+    return table
+
+
+class SpeakerTimeline:
+    """
+    Active speakers of one side of a recording over time.
+
+    Between bounds[k] and bounds[k + 1] the speakers active[k] (ids indexing
+    `names`) talk; nobody talks before bounds[0] or after bounds[-1].
+    """
+    __slots__ = ('names', 'bounds', 'active')
+
+    def __init__(self, data: SpeakerData):
+        self.names = speaker_names(data)
+        times = []
+        events = []
+        for spkr, tbeg, tend in iter_segment_ids(data):
+            if tend > tbeg:
+                times += (tbeg, tend)
+                events += ((spkr, 1), (spkr, -1))
+        order = sorted(range(len(times)), key=times.__getitem__)
+
+        self.bounds = array('d')
+        self.active = []
+        current = {}
+        last = None
+        for k in order:
+            time = times[k]
+            if last is not None and time > last:
+                self.bounds.append(last)
+                self.active.append(tuple(current))
+            last = time
+            spkr, delta = events[k]
+            cnt = current.get(spkr, 0) + delta
+            if cnt > 0:
+                current[spkr] = cnt
+            else:
+                current.pop(spkr, None)
+        if last is not None:
+            self.bounds.append(last)
+            self.active.append(())
+
+    def at(self, time: float) -> Tuple[int, ...]:
+        """Ids of the speakers talking at `time` (binary search)."""
+        k = bisect_right(self.bounds, time) - 1
+        return self.active[k] if k >= 0 else ()
+
+
+def score_words(words: Words, uem: IntervalSet, scored: IntervalSet, sys_timeline: SpeakerTimeline,
+                spkr_map: Dict[str, str]) -> Dict[str, int]:
+    """Count the WORD_KEYS stats of one recording's REF words under the REF -> SYS map spkr_map."""
+    stats = dict.fromkeys(WORD_KEYS, 0)
+    sys_ids = {name: j for j, name in enumerate(sys_timeline.names)}
+    mapped = {r: sys_ids[s] for r, s in spkr_map.items() if s in sys_ids}
+    if np is not None and isinstance(words, SegmentTable):
+        _score_words_numpy(stats, words, uem, scored, sys_timeline, mapped)
+        return stats
+    for spkr, tmid in iter_words(words):
+        if tmid not in uem:
+            continue
+        stats['EVAL_WORDS'] += 1
+        if tmid not in scored:
+            continue
+        stats['SCORED_WORDS'] += 1
+        active = sys_timeline.at(tmid)
+        if not active:
+            stats['MISSED_WORDS'] += 1
+        elif mapped.get(spkr) not in active:
+            stats['ERROR_WORDS'] += 1
+    return stats
+
+
+def _inside(intervals: IntervalSet, times):
+    """Mask of the times that fall in `intervals`."""
+    if not len(intervals):
+        return np.zeros(len(times), dtype=bool)
+    tbeg = np.frombuffer(intervals.tbeg, dtype=np.float64)
+    tend = np.frombuffer(intervals.tend, dtype=np.float64)
+    i = np.searchsorted(tbeg, times, side='right') - 1
+    return (i >= 0) & (times < tend[np.maximum(i, 0)])
+
+
+def _score_words_numpy(stats: Dict[str, int], words: SegmentTable, uem: IntervalSet, scored: IntervalSet,
+                       sys_timeline: SpeakerTimeline, mapped: Dict[str, int]):
+    tbeg, tend, spkr = words.numpy()
+    tmid = tbeg + (tend - tbeg) / 2
+    in_eval = _inside(uem, tmid)
+    tmid = tmid[in_eval]
+    in_scored = _inside(scored, tmid)
+    tmid = tmid[in_scored]
+    stats['EVAL_WORDS'] = int(in_eval.sum())
+    stats['SCORED_WORDS'] = len(tmid)
+    if not len(tmid):
+        return
+
+    # Interval of every word, and whether any SYS speaker talks in it.
+    n_active = np.array([len(active) for active in sys_timeline.active] + [0], dtype=np.intp)
+    k = np.searchsorted(np.frombuffer(sys_timeline.bounds, dtype=np.float64), tmid, side='right') - 1
+    talking = n_active[k] > 0 # k = -1 picks the trailing 0
+    stats['MISSED_WORDS'] = int(len(tmid) - talking.sum())
+
+    # A word is right when (interval, mapped SYS id) is one of the active pairs.
+    n_sys = max(len(sys_timeline.names), 1)
+    pairs = np.array([i * n_sys + j for i, active in enumerate(sys_timeline.active) for j in active], dtype=np.int64)
+    word_map = np.array([mapped.get(name, -1) for name in words.speakers], dtype=np.int64)
+    sys_id = word_map[spkr[in_eval][in_scored]]
+    right = (sys_id >= 0) & np.isin(k.astype(np.int64) * n_sys + sys_id, pairs)
+    stats['ERROR_WORDS'] = int((talking & ~right).sum())
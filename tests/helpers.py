@@ -0,0 +1,24 @@
+import contextlib
+import io
+import sys
+from unittest import mock
+from mdeval import cli
+
+
+def random_rttm(rng, files, n_spkrs, prefix, n_rows=20):
+    lines = []
+    for file in files:
+        for _ in range(n_rows):
+            tbeg = round(rng.uniform(0, 100), 2)
+            lines.append(f"SPEAKER {file} 1 {tbeg} {round(rng.uniform(0.5, 5), 2)} <NA> <NA> "
+                         f"{prefix}{rng.randrange(n_spkrs)} <NA> <NA>\n")
+    return ''.join(lines)
+
+
+def run_cli(*argv):
+    """Run the mdeval CLI with argv and return its stdout."""
+    out = io.StringIO()
+    with mock.patch.object(sys, 'argv', ['mdeval'] + list(argv)), contextlib.redirect_stdout(out), \
+            contextlib.redirect_stderr(io.StringIO()):
+        cli.main()
+    return out.getvalue()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from mdeval import binary_cache
+from mdeval.binary_cache import CachedData, cache_path_for, load_rttm_cached, load_uem_cached
+from mdeval.io import load_rttm, load_rttm_fast, load_uem
+from mdeval.utils import Segment
+
+RTTM = """SPEAKER file2 1 0.0 5.0 <NA> <NA> spk1 <NA> <NA>
+SPEAKER file1 1 0.0 2.0 <NA> <NA> spk1 <NA> <NA>
+SPEAKER file2 1 5.0 5.0 <NA> <NA> spk2 <NA> <NA>
+SPEAKER file1 2 1.0 2.5 <NA> <NA> spk3 <NA> <NA>
+LEXEME file2 1 1.0 0.5 hello lex spk1 <NA> <NA>
+LEXEME file2 1 6.0 0.5 world lex spk2 <NA> <NA>
+"""
+
+class TestBinaryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.rttm_path = os.path.join(self.tmp_dir, 'ref.rttm')
+        with open(self.rttm_path, 'w') as f:
+            f.write(RTTM)
+
+    def test_rttm_roundtrip(self):
+        expected = load_rttm(self.rttm_path, columnar=True)
+        data = load_rttm_cached(self.rttm_path)
+        self.assertIsInstance(data, CachedData)
+        self.assertTrue(os.path.exists(cache_path_for(self.rttm_path)))
+        self.assertEqual(sorted(data), sorted(expected))
+        for file in expected:
+            for chnl in expected[file]:
+                self.assertEqual(list(data[file][chnl]['SPEAKER'].rows()),
+                                 list(expected[file][chnl]['SPEAKER'].rows()))
+        words = load_rttm_fast(self.rttm_path, words=True)
+        self.assertEqual(list(data['file2']['1']['LEXEME'].rows()), list(words['file2']['1']['LEXEME'].rows()))
+        self.assertEqual(data['file1']['1']['LEXEME'], [])
+
+    def test_cache_reused_and_invalidated(self):
+        load_rttm_cached(self.rttm_path)
+        cache_path = cache_path_for(self.rttm_path)
+        inode = os.stat(cache_path).st_ino
+
+        # Same content with a new mtime: cache kept, and the new mtime is
+        # recorded so later runs do not hash the source again.
+        os.utime(self.rttm_path, (0, 12345))
+        load_rttm_cached(self.rttm_path)
+        self.assertEqual(os.stat(cache_path).st_ino, inode)
+        with mock.patch.object(binary_cache, '_file_hash', side_effect=AssertionError) as file_hash:
+            data = load_rttm_cached(self.rttm_path)
+            self.assertIn('file1', data)
+            self.assertEqual(file_hash.call_count, 0)
+
+        with open(self.rttm_path, 'a') as f:
+            f.write("SPEAKER file3 1 0.0 1.0 <NA> <NA> spk4 <NA> <NA>\n")
+        data = load_rttm_cached(self.rttm_path)
+        self.assertIn('file3', data)
+
+    def test_uem_roundtrip(self):
+        uem_path = os.path.join(self.tmp_dir, 'test.uem')
+        with open(uem_path, 'w') as f:
+            f.write("file1 1 0.0 10.0\nfile1 1 20.0 30.0\nfile2 A 1.5 2.5\n")
+        data = load_uem_cached(uem_path)
+        self.assertEqual(data['file1']['1'], [Segment(0.0, 10.0), Segment(20.0, 30.0)])
+        self.assertEqual(dict(data), load_uem(uem_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import random
+import unittest
+from mdeval import bootstrap
+from mdeval.bootstrap import RecordingStats
+
+
+def make_stats(scored, missed, falarm, error):
+    stats = {k: 0.0 for k in bootstrap.TIME_KEYS}
+    stats.update({'SCORED_SPEAKER': scored, 'MISSED_SPEAKER': missed,
+                  'FALARM_SPEAKER': falarm, 'SPEAKER_ERROR': error})
+    return stats
+
+
+class TestBootstrap(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.rows = RecordingStats()
+        for _ in range(200):
+            scored = rng.uniform(100.0, 1000.0)
+            self.rows.append(make_stats(scored, 0.1 * scored * rng.random(),
+                                        0.05 * scored * rng.random(), 0.1 * scored * rng.random()))
+
+    def test_columns(self):
+        self.assertEqual(len(self.rows), 200)
+        self.assertEqual(len(self.rows.column('SCORED_SPEAKER')), 200)
+
+    def test_interval_contains_point_estimate(self):
+        scored = sum(self.rows.column('SCORED_SPEAKER'))
+        errors = sum(self.rows.column('MISSED_SPEAKER') + self.rows.column('FALARM_SPEAKER')
+                     + self.rows.column('SPEAKER_ERROR'))
+        der = 100 * errors / scored
+        low, high = self.rows.bootstrap_der(2000, 0.95, seed=0)
+        self.assertLess(low, der)
+        self.assertGreater(high, der)
+        self.assertLess(high - low, 5.0)
+
+    def test_single_recording_has_degenerate_interval(self):
+        rows = RecordingStats()
+        rows.append(make_stats(100.0, 5.0, 3.0, 2.0))
+        low, high = rows.bootstrap_der(100, seed=1)
+        self.assertAlmostEqual(low, 10.0)
+        self.assertAlmostEqual(high, 10.0)
+
+    @unittest.skipIf(bootstrap.np is None, 'numpy not installed')
+    def test_numpy_matches_python_resampling(self):
+        scored = self.rows.column('SCORED_SPEAKER')
+        errors = [sum(v) for v in zip(self.rows.column('MISSED_SPEAKER'), self.rows.column('FALARM_SPEAKER'),
+                                      self.rows.column('SPEAKER_ERROR'))]
+        py = bootstrap._resample_python(scored, errors, 4000, 0)
+        vec = bootstrap._resample_numpy(bootstrap.np.asarray(scored), bootstrap.np.asarray(errors), 4000, 0)
+        for q in (0.025, 0.5, 0.975):
+            self.assertAlmostEqual(bootstrap._percentile(py, q), bootstrap._percentile(vec, q), delta=0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import random
+import unittest
+from mdeval import scoring
+from mdeval.scoring import score_speaker_diarization
+from mdeval.utils import Segment
+
+
+def seg(tbeg, tend):
+    return {'TBEG': tbeg, 'TDUR': tend - tbeg, 'TEND': tend}
+
+
+def random_speaker_data(rng, n_spkrs, n_segs, duration, prefix):
+    data = {}
+    for _ in range(n_segs):
+        tbeg = round(rng.uniform(0, duration), 2)
+        data.setdefault(f"{prefix}{rng.randrange(n_spkrs)}", []).append(seg(tbeg, tbeg + round(rng.uniform(0.5, 5), 2)))
+    return data
+
+
+class TestBreakdown(unittest.TestCase):
+    def setUp(self):
+        self.backends = ['python'] + (['numpy'] if scoring.numpy_scoring is not None else [])
+        self.ref = {'A': [seg(0.0, 10.0)], 'B': [seg(5.0, 15.0)], 'C': [seg(20.0, 22.0)]}
+        self.hyp = {'x': [seg(0.0, 8.0)], 'y': [seg(8.0, 15.0)], 'z': [seg(22.0, 24.0)]}
+        self.uem = [Segment(0.0, 25.0)]
+
+    def test_per_speaker_times(self):
+        for backend in self.backends:
+            stats, spkr_map, breakdown = score_speaker_diarization(
+                'f', '1', self.ref, self.hyp, self.uem, backend=backend, detailed=True)
+            speakers = breakdown['SPEAKERS']
+            self.assertEqual(spkr_map, {'A': 'x', 'B': 'y'})
+            for r, expected in (('A', (10.0, 8.0, 0.0, 2.0)), ('B', (10.0, 7.0, 0.0, 3.0)), ('C', (2.0, 0.0, 2.0, 0.0))):
+                got = tuple(speakers[r][k] for k in ('SCORED', 'CORRECT', 'MISSED', 'CONFUSED'))
+                for g, e in zip(got, expected):
+                    self.assertAlmostEqual(g, e, msg=(backend, r))
+            self.assertIsNone(speakers['C']['MAPPED'])
+            self.assertAlmostEqual(breakdown['SYSTEMS']['z']['FALARM'], 2.0)
+            self.assertAlmostEqual(breakdown['CONFUSION']['B']['x'], 3.0)
+            # Per-speaker missed and confused time add up to the DER terms.
+            self.assertAlmostEqual(sum(s['MISSED'] + s['CONFUSED'] for s in speakers.values()),
+                                   stats['MISSED_SPEAKER'] + stats['SPEAKER_ERROR'])
+
+    def test_jer(self):
+        for backend in self.backends:
+            _, _, breakdown = score_speaker_diarization(
+                'f', '1', self.ref, self.hyp, self.uem, backend=backend, detailed=True)
+            speakers = breakdown['SPEAKERS']
+            # Jaccard A-x = 8/10, B-y = 7/10; C is unpaired.
+            self.assertAlmostEqual(speakers['A']['JER'], 20.0)
+            self.assertAlmostEqual(speakers['B']['JER'], 30.0)
+            self.assertEqual(speakers['C']['JER'], 100.0)
+            self.assertAlmostEqual(breakdown['JER'], 50.0)
+
+    def test_detailed_keeps_stats(self):
+        rng = random.Random(4)
+        ref = random_speaker_data(rng, 3, 30, 100, 'r')
+        hyp = random_speaker_data(rng, 4, 30, 100, 's')
+        uem = [Segment(0, 60), Segment(70, 110)]
+        for backend in self.backends:
+            for collar, ignore_overlap in ((0.0, False), (0.25, True)):
+                plain = score_speaker_diarization('f', '1', ref, hyp, uem, collar, ignore_overlap, backend)
+                stats, spkr_map, breakdown = score_speaker_diarization(
+                    'f', '1', ref, hyp, uem, collar, ignore_overlap, backend, detailed=True)
+                self.assertEqual((stats, spkr_map), plain)
+                self.assertAlmostEqual(sum(s['SCORED'] for s in breakdown['SPEAKERS'].values()),
+                                       stats['SCORED_SPEAKER'])
+                self.assertAlmostEqual(sum(s['CORRECT'] for s in breakdown['SPEAKERS'].values()),
+                                       stats['SCORED_SPEAKER'] - stats['MISSED_SPEAKER'] - stats['SPEAKER_ERROR'])
+
+
+if __name__ == '__main__':
+    unittest.main()
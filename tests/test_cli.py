@@ -0,0 +1,64 @@
+import unittest
+from mdeval.cli import (iter_recordings, iter_multi_recordings, score_recordings,
+                        score_multi_recordings, new_total_stats, add_stats)
+from mdeval.utils import Segment
+
+
+def make_seg(file, spkr, tbeg, tdur):
+    return {'TYPE': 'SPEAKER', 'FILE': file, 'CHNL': '1', 'TBEG': tbeg, 'TDUR': tdur,
+            'TEND': tbeg + tdur, 'SPKR': spkr, 'SUBT': '<NA>'}
+
+
+def make_data(files, offset):
+    data = {}
+    for i, file in enumerate(files):
+        segs = [make_seg(file, f"s{k % 3}", k * 1.5 + offset, 1.0 + 0.1 * i) for k in range(10)]
+        data[file] = {'1': {'SPEAKER': segs, 'LEXEME': []}}
+    return data
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        files = [f"file{i}" for i in range(6)]
+        self.ref_data = make_data(files, 0.0)
+        self.sys_data = make_data(files, 0.3)
+
+    def test_iter_recordings_infers_uem(self):
+        recordings = list(iter_recordings(self.ref_data, self.sys_data))
+        self.assertEqual([r[0] for r in recordings], sorted(self.ref_data))
+        file, chnl, curr_ref, curr_sys, uem_eval, words = recordings[0]
+        self.assertEqual(sorted(curr_ref), ['s0', 's1', 's2'])
+        self.assertEqual(uem_eval, [Segment(0.0, 14.5)])
+        self.assertEqual(words, [])
+
+    def test_parallel_scoring_matches_serial(self):
+        totals = []
+        for jobs in (1, 2):
+            total_stats = new_total_stats()
+            recordings = iter_recordings(self.ref_data, self.sys_data)
+            for file_stats in score_recordings(recordings, 0.1, False, 'python', jobs):
+                add_stats(total_stats, file_stats)
+            totals.append(total_stats)
+        self.assertEqual(totals[0], totals[1])
+        self.assertGreater(totals[0]['SCORED_SPEAKER'], 0.0)
+
+    def test_multi_system_scoring_matches_single(self):
+        other = make_data([f"file{i}" for i in range(4)], 0.7)
+        sys_list = [self.sys_data, other]
+        results = list(score_multi_recordings(iter_multi_recordings(self.ref_data, sys_list), 0.1, False, 'python'))
+        self.assertEqual(len(results), len(self.ref_data))
+        for k, sys_data in enumerate(sys_list):
+            expected = new_total_stats()
+            # Recordings missing from a system count as empty output.
+            filled = {file: sys_data.get(file, {'1': {'SPEAKER': [], 'LEXEME': []}}) for file in self.ref_data}
+            for file_stats in score_recordings(iter_recordings(self.ref_data, filled), 0.1, False, 'python'):
+                add_stats(expected, file_stats)
+            total_stats = new_total_stats()
+            for file_stats in results:
+                add_stats(total_stats, file_stats[k])
+            for key, value in expected.items():
+                self.assertAlmostEqual(total_stats[key], value, delta=1e-9, msg=key)
+
+
+if __name__ == '__main__':
+    unittest.main()
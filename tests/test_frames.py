@@ -0,0 +1,123 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from mdeval import frames
+from mdeval.frames import FrameData, labels_to_table, load_frames, score_frames, write_frames
+from mdeval.scoring import score_speaker_diarization
+from mdeval.segments import SegmentTable
+from mdeval.utils import Segment
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def random_labels(rng, n_frames, n_spkrs):
+    labels = []
+    while len(labels) < n_frames:
+        labels.extend([rng.randrange(-1, n_spkrs)] * rng.randint(1, 40))
+    return labels[:n_frames]
+
+
+def naive_table(labels, frame_shift):
+    """One segment per frame, as an RTTM written frame by frame would give."""
+    table = SegmentTable()
+    for i, label in enumerate(labels):
+        if label >= 0:
+            table.append(str(label), i * frame_shift, frame_shift)
+    return table
+
+
+def segments(table):
+    return sorted((spkr, round(tbeg, 9), round(tend, 9)) for spkr, tbeg, tend in table.rows())
+
+
+class TestFrames(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def test_run_length_encoding(self):
+        table = labels_to_table([-1, 0, 0, 1, 1, 1, -1, 0], 0.5)
+        self.assertEqual(segments(table), [('0', 0.5, 1.5), ('0', 3.5, 4.0), ('1', 1.5, 3.0)])
+
+    def test_python_matches_numpy(self):
+        rng = random.Random(3)
+        labels = random_labels(rng, 2000, 4)
+        expected = segments(labels_to_table(labels))
+        saved = frames.np
+        frames.np = None
+        try:
+            self.assertEqual(segments(labels_to_table(labels)), expected)
+        finally:
+            frames.np = saved
+
+    def test_scoring_matches_frame_segments(self):
+        rng = random.Random(5)
+        ref = SegmentTable.from_speaker_dict({'a': [{'TBEG': 0.0, 'TEND': 7.3}, {'TBEG': 12.0, 'TEND': 19.9}],
+                                              'b': [{'TBEG': 6.1, 'TEND': 14.2}]})
+        labels = random_labels(rng, 2000, 3)
+        uem = [Segment(0.0, 20.0)]
+        for collar, ignore_overlap in ((0.0, False), (0.25, True)):
+            expected, expected_map = score_speaker_diarization(
+                'f', '1', ref, naive_table(labels, 0.01), uem, collar, ignore_overlap, backend='python')
+            stats, mapping = score_frames('f', '1', ref, labels, uem, 0.01, collar, ignore_overlap, backend='python')
+            self.assertEqual(mapping, expected_map)
+            for key, value in expected.items():
+                self.assertAlmostEqual(stats[key], value, delta=1e-6, msg=key)
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_activity_matrix(self):
+        activity = np.zeros((10, 2), dtype=bool)
+        activity[2:6, 0] = True
+        activity[4:10, 1] = True
+        table = labels_to_table(activity, 0.1)
+        self.assertEqual(segments(table), [('0', 0.2, 0.6), ('1', 0.4, 1.0)])
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_frames_file_roundtrip(self):
+        rng = random.Random(7)
+        recordings = {'rec1': {'1': random_labels(rng, 1001, 3)},
+                      'rec2': {'1': random_labels(rng, 17, 2), 'B': random_labels(rng, 500, 5)}}
+        path = os.path.join(self.tmp_dir, 'sys.frames')
+        write_frames(path, recordings, 0.02)
+        data = load_frames(path)
+        self.assertEqual(sorted(data), ['rec1', 'rec2'])
+        with mock.patch.object(data, '_load', wraps=data._load) as load:
+            self.assertIn('rec2', data)
+            self.assertNotIn('rec3', data)
+            self.assertEqual(load.call_count, 0)
+        for file, chnls in recordings.items():
+            self.assertEqual(sorted(data[file]), sorted(chnls))
+            for chnl, labels in chnls.items():
+                self.assertEqual(segments(data[file][chnl]['SPEAKER']), segments(labels_to_table(labels, 0.02)))
+        # The packed format is also read without NumPy.
+        expected = segments(labels_to_table(recordings['rec2']['B'], 0.02))
+        saved = frames.np
+        frames.np = None
+        try:
+            self.assertEqual(segments(FrameData(path)['rec2']['B']['SPEAKER']), expected)
+        finally:
+            frames.np = saved
+
+    @unittest.skipIf(np is None, 'numpy not installed')
+    def test_npz_and_npy(self):
+        labels = np.array([0, 0, -1, 1, 1, 1])
+        npz_path = os.path.join(self.tmp_dir, 'sys.npz')
+        np.savez(npz_path, rec1=labels, **{'rec2/A': labels[::-1], 'frame_shift': 0.5})
+        data = load_frames(npz_path)
+        self.assertEqual(data.frame_shift, 0.5)
+        self.assertEqual(segments(data['rec1']['1']['SPEAKER']), [('0', 0.0, 1.0), ('1', 1.5, 3.0)])
+        self.assertEqual(sorted(data['rec2']), ['A'])
+        npy_path = os.path.join(self.tmp_dir, 'rec3.npy')
+        np.save(npy_path, labels)
+        self.assertEqual(segments(load_frames(npy_path, 0.5)['rec3']['1']['SPEAKER']),
+                         [('0', 0.0, 1.0), ('1', 1.5, 3.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import random
+import unittest
+from mdeval.intervals import IntervalSet
+from mdeval.utils import Segment
+
+GRID = [k / 4 for k in range(-3, 100, 2)]
+
+
+def random_pairs(rng, n):
+    tbeg = [rng.randint(0, 40) / 2 for _ in range(n)]
+    tend = [b + rng.randint(0, 8) / 2 for b in tbeg]
+    return tbeg, tend
+
+
+def covers(tbeg, tend, t):
+    return sum(1 for b, e in zip(tbeg, tend) if b < t < e)
+
+
+class TestIntervalSet(unittest.TestCase):
+    def assertValid(self, s):
+        for i in range(len(s)):
+            self.assertLess(s.tbeg[i], s.tend[i])
+            if i:
+                self.assertLess(s.tend[i - 1], s.tbeg[i])
+
+    def test_from_segments_joins_and_sorts(self):
+        s = IntervalSet.from_segments([Segment(5.0, 6.0), Segment(1.0, 3.0), Segment(3.0, 4.0), Segment(7.0, 7.0)])
+        self.assertEqual(s.segments(), [Segment(1.0, 4.0), Segment(5.0, 6.0)])
+        self.assertIs(IntervalSet.from_segments(s), s)
+        self.assertAlmostEqual(s.total_duration(), 4.0)
+
+    def test_algebra_matches_pointwise(self):
+        rng = random.Random(3)
+        for _ in range(300):
+            a_pairs = random_pairs(rng, rng.randint(0, 6))
+            b_pairs = random_pairs(rng, rng.randint(0, 6))
+            a = IntervalSet.from_pairs(*a_pairs)
+            b = IntervalSet.from_pairs(*b_pairs)
+            results = {
+                'union': (a.union(b), lambda x, y: x or y),
+                'intersect': (a.intersect(b), lambda x, y: x and y),
+                'difference': (a.difference(b), lambda x, y: x and not y),
+            }
+            # Boundaries lie on the half-second grid, so odd quarter points
+            # sample every piece without hitting a boundary.
+            for t in GRID:
+                in_a = covers(*a_pairs, t) > 0
+                in_b = covers(*b_pairs, t) > 0
+                for name, (result, op) in results.items():
+                    self.assertValid(result)
+                    self.assertEqual(covers(result.tbeg, result.tend, t) > 0, op(in_a, in_b), (name, t))
+            overlap = IntervalSet.coverage(*a_pairs, 2)
+            self.assertValid(overlap)
+            for t in GRID:
+                self.assertEqual(covers(overlap.tbeg, overlap.tend, t) > 0, covers(*a_pairs, t) >= 2)
+
+    def test_dilate_and_around(self):
+        s = IntervalSet.from_pairs([0.0, 3.0], [1.0, 4.0])
+        self.assertEqual(s.dilate(1.0), IntervalSet.from_pairs([-1.0], [5.0]))
+        self.assertEqual(s.dilate(-0.5), IntervalSet())
+        self.assertEqual(IntervalSet.around([4.0, 1.0, 1.5], 0.25), IntervalSet.from_pairs([0.75, 3.75], [1.75, 4.25]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,30 @@
 import unittest
 import tempfile
 import os
-from mdeval.io import load_rttm, load_uem
+from mdeval import io
+from mdeval.cli import iter_recordings
+from unittest import mock
+import shutil
+import bz2
+import gzip
+import lzma
+from mdeval.io import load_rttm, load_uem, load_rttm_fast, RttmFiles, RttmIndex, iter_rttm, rttm_paths, open_input
+
+UNSORTED_RTTM = """SPEAKER file2 1 0.0 5.0 <NA> <NA> spk1 <NA> <NA>
+SPEAKER file1 1 0.0 2.0 <NA> <NA> spk1 <NA> <NA>
+;; comment
+LEXEME file1 1 0.5 0.2 hello lex spk1 <NA> <NA>
+SPEAKER file2 1 5.0 5.0 <NA> <NA> spk2 <NA> <NA>
+SPEAKER file1 2 1.0 2.0 <NA> <NA> spk3 <NA> <NA>
+"""
 
 class TestIO(unittest.TestCase):
+    def write_tmp(self, content):
+        with tempfile.NamedTemporaryFile(mode='w', delete=False) as tmp:
+            tmp.write(content)
+        self.addCleanup(os.remove, tmp.name)
+        return tmp.name
+
     def test_load_rttm(self):
         content = """SPEAKER file1 1 0.0 5.0 <NA> <NA> spk1 <NA> <NA>
 SPEAKER file1 1 5.0 5.0 <NA> <NA> spk2 <NA> <NA>
@@ -40,5 +61,138 @@ SPEAKER file1 1 5.0 5.0 <NA> <NA> spk2 <NA> <NA>
         finally:
             os.remove(tmp_path)
 
+    def test_rttm_index_matches_load_rttm(self):
+        path = self.write_tmp(UNSORTED_RTTM)
+        index = RttmIndex(path)
+        self.assertFalse(index.is_sorted)
+        self.assertEqual(sorted(index), ['file1', 'file2'])
+        data = load_rttm(path)
+        for file in data:
+            self.assertEqual(index[file], data[file])
+
+    def test_rttm_index_drops_types(self):
+        index = RttmIndex(self.write_tmp(UNSORTED_RTTM), types=('SPEAKER',))
+        self.assertEqual(index['file1']['1']['LEXEME'], [])
+        self.assertEqual(len(index['file1']['1']['SPEAKER']), 1)
+
+    def test_iter_rttm(self):
+        path = self.write_tmp(UNSORTED_RTTM)
+        self.assertEqual([f for f, _ in iter_rttm(path)], ['file1', 'file2'])
+        with self.assertRaises(ValueError):
+            list(iter_rttm(path, presorted=True))
+
+        sorted_path = self.write_tmp(
+            "".join(sorted(UNSORTED_RTTM.splitlines(True), key=lambda l: l.split()[1])))
+        recordings = list(iter_rttm(sorted_path, presorted=True))
+        self.assertEqual([f for f, _ in recordings], ['file1', 'file2'])
+        self.assertEqual(recordings[1][1], load_rttm(path)['file2'])
+        self.assertTrue(RttmIndex(sorted_path).is_sorted)
+
+    def test_load_rttm_fast_matches_load_rttm(self):
+        content = UNSORTED_RTTM + "SPEAKER file3 1 2.5 <NA> <NA> <NA> spk9 <NA> <NA>\n"
+        path = self.write_tmp(content)
+        expected = load_rttm(path, columnar=True)
+        modes = [False, True] if io.np is not None else [False]
+        for use_numpy in modes:
+            # A tiny block size exercises lines split across blocks.
+            data = load_rttm_fast(path, use_numpy=use_numpy, block_size=16)
+            self.assertEqual(sorted(data), sorted(expected))
+            for file in expected:
+                self.assertEqual(sorted(data[file]), sorted(expected[file]))
+                for chnl in expected[file]:
+                    table = data[file][chnl]['SPEAKER']
+                    ref_table = expected[file][chnl]['SPEAKER']
+                    self.assertEqual(list(table.rows()), list(ref_table.rows()))
+        self.assertEqual(RttmIndex(path, ('SPEAKER',), columnar=True)['file3']['1']['SPEAKER'].speakers, ['spk9'])
+
+    def write_compressed(self, content, opener):
+        path = self.write_tmp('')
+        with opener(path, 'wt') as f:
+            f.write(content)
+        return path
+
+    def test_compressed_input(self):
+        expected = load_rttm(self.write_tmp(UNSORTED_RTTM), columnar=True)
+        for opener in (gzip.open, bz2.open, lzma.open):
+            path = self.write_compressed(UNSORTED_RTTM, opener)
+            self.assertFalse(io.is_plain_file(path))
+            self.assertEqual(load_rttm(path), load_rttm(self.write_tmp(UNSORTED_RTTM)))
+            data = load_rttm_fast(path, block_size=16)
+            for file in expected:
+                for chnl in expected[file]:
+                    self.assertEqual(list(data[file][chnl]['SPEAKER'].rows()),
+                                     list(expected[file][chnl]['SPEAKER'].rows()))
+            self.assertEqual([f for f, _ in iter_rttm(path)], ['file1', 'file2'])
+            with self.assertRaises(ValueError):
+                RttmIndex(path)
+            uem = load_uem(self.write_compressed("file1 1 0.0 10.0\n", opener))
+            self.assertEqual(uem['file1']['1'][0].tend, 10.0)
+
+    def test_open_input_threaded(self):
+        content = UNSORTED_RTTM.encode() * 50
+        path = self.write_compressed(UNSORTED_RTTM * 50, gzip.open)
+        with open_input(path, threaded=True) as f:
+            chunks = []
+            # Odd read sizes exercise blocks split between reads.
+            while True:
+                chunk = f.read(7)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        self.assertEqual(b''.join(chunks), content)
+        with open_input(path, threaded=True) as f:
+            self.assertEqual(f.read(), content)
+            self.assertEqual(f.read(), b'')
+
+    def write_rttm_dir(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        os.makedirs(os.path.join(tmp_dir, 'rttm', 'part2'))
+        lines = [line for line in UNSORTED_RTTM.splitlines(True) if line.startswith('SPEAKER')]
+        for file, sub in (('file1', ''), ('file2', 'part2')):
+            with open(os.path.join(tmp_dir, 'rttm', sub, f"{file}.rttm"), 'w') as f:
+                f.writelines(line for line in lines if line.split()[1] == file)
+        with open(os.path.join(tmp_dir, 'rttm', 'notes.txt'), 'w') as f:
+            f.write('not an RTTM')
+        return tmp_dir
+
+    def test_rttm_paths(self):
+        tmp_dir = self.write_rttm_dir()
+        paths = rttm_paths(os.path.join(tmp_dir, 'rttm'))
+        self.assertEqual(sorted(paths), ['file1', 'file2'])
+        list_path = os.path.join(tmp_dir, 'all.lst')
+        with open(list_path, 'w') as f:
+            f.write("# recordings\nrttm/file1.rttm\n\nrttm/part2/file2.rttm\n")
+        self.assertEqual(rttm_paths(list_path), paths)
+        with open(list_path, 'a') as f:
+            f.write("rttm/file1.rttm\n")
+        with self.assertRaises(ValueError):
+            rttm_paths(list_path)
+
+    def test_rttm_files_match_rttm_index(self):
+        tmp_dir = self.write_rttm_dir()
+        index = RttmIndex(self.write_tmp(UNSORTED_RTTM), ('SPEAKER',), columnar=True)
+        for depth in (0, 1, 4):
+            files = RttmFiles(os.path.join(tmp_dir, 'rttm'), depth)
+            # file0 is not there and file1 is skipped by the caller.
+            files.prefetch(['file0', 'file1', 'file2'])
+            self.assertNotIn('file0', files)
+            recording = files['file2']
+            self.assertEqual(list(recording['1']['SPEAKER'].rows()), list(index['file2']['1']['SPEAKER'].rows()))
+            self.assertEqual(list(files['file1']['2']['SPEAKER'].rows()), list(index['file1']['2']['SPEAKER'].rows()))
+            self.assertIsNone(files.get('file0'))
+            files.close()
+
+    def test_rttm_index_parses_each_recording_once(self):
+        path = self.write_tmp(UNSORTED_RTTM)
+        ref = load_rttm(path, columnar=True)
+        index = RttmIndex(path, ('SPEAKER',), columnar=True)
+        with mock.patch.object(RttmIndex, '__getitem__', autospec=True, side_effect=RttmIndex.__getitem__) as parse:
+            self.assertIn('file1', index)
+            self.assertNotIn('file0', index)
+            self.assertEqual(parse.call_count, 0)
+            self.assertEqual(len(list(iter_recordings(ref, index))), 3)
+            self.assertEqual(parse.call_count, 2)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,19 @@
+import itertools
+import random
 import unittest
-from mdeval.munkres import linear_sum_assignment
+from mdeval import munkres
+from mdeval.munkres import linear_sum_assignment, max_weight_matching
+
+
+def brute_force_cost(cost_matrix):
+    n_rows = len(cost_matrix)
+    n_cols = len(cost_matrix[0])
+    if n_rows <= n_cols:
+        return min(sum(cost_matrix[r][c] for r, c in enumerate(perm))
+                   for perm in itertools.permutations(range(n_cols), n_rows))
+    return min(sum(cost_matrix[r][c] for c, r in enumerate(perm))
+               for perm in itertools.permutations(range(n_rows), n_cols))
+
 
 class TestMunkres(unittest.TestCase):
     def test_simple_assignment(self):
@@ -39,6 +53,53 @@ class TestMunkres(unittest.TestCase):
         # Should match rows 0 and 1
         matched_rows = sorted(list(row_ind))
         self.assertEqual(matched_rows, [0, 1])
-        
+
+    def test_empty_matrix(self):
+        self.assertEqual(linear_sum_assignment([]), ([], []))
+        self.assertEqual(linear_sum_assignment([[], []]), ([], []))
+
+    def test_against_brute_force(self):
+        rng = random.Random(1234)
+        for _ in range(200):
+            n_rows = rng.randint(1, 6)
+            n_cols = rng.randint(1, 6)
+            # Integer costs with many ties and zeros, like overlap matrices.
+            cost_matrix = [[-rng.randint(0, 5) for _ in range(n_cols)]
+                           for _ in range(n_rows)]
+            row_ind, col_ind = linear_sum_assignment(cost_matrix)
+            self.assertEqual(len(row_ind), min(n_rows, n_cols))
+            self.assertEqual(row_ind, sorted(row_ind))
+            self.assertEqual(len(set(col_ind)), len(col_ind))
+            total = sum(cost_matrix[r][c] for r, c in zip(row_ind, col_ind))
+            self.assertAlmostEqual(total, brute_force_cost(cost_matrix))
+
+    @unittest.skipIf(munkres.np is None, 'numpy not installed')
+    def test_numpy_solver_matches_python(self):
+        rng = random.Random(42)
+        for _ in range(20):
+            n_rows = rng.randint(1, 40)
+            n_cols = rng.randint(n_rows, 80)
+            cost_matrix = [[rng.random() for _ in range(n_cols)]
+                           for _ in range(n_rows)]
+            py_cols = munkres._solve(cost_matrix, n_rows, n_cols)
+            np_cols = munkres._solve_numpy(munkres.np.asarray(cost_matrix))
+            py_total = sum(cost_matrix[r][c] for r, c in enumerate(py_cols))
+            np_total = sum(cost_matrix[r][c] for r, c in enumerate(np_cols))
+            self.assertAlmostEqual(py_total, np_total)
+
+    def test_sparse_matching_matches_brute_force(self):
+        rng = random.Random(2)
+        for _ in range(200):
+            n_rows = rng.randint(1, 6)
+            n_cols = rng.randint(1, 6)
+            weights = [[rng.randint(1, 9) if rng.random() < 0.4 else 0 for _ in range(n_cols)]
+                       for _ in range(n_rows)]
+            edges = [[(j, float(w)) for j, w in enumerate(row) if w > 0] for row in weights]
+            pairs = max_weight_matching(n_rows, n_cols, edges)
+            self.assertEqual(len({j for _, j in pairs}), len(pairs))
+            self.assertTrue(all(weights[i][j] > 0 for i, j in pairs))
+            self.assertEqual(sum(weights[i][j] for i, j in pairs),
+                             -brute_force_cost([[-w for w in row] for row in weights]))
+
 if __name__ == '__main__':
     unittest.main()
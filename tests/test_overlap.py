@@ -0,0 +1,62 @@
+import random
+import unittest
+from mdeval.overlap import OverlapMatrix
+
+
+def naive_overlap(additions):
+    result = {}
+    for ref_ids, sys_ids, dur in additions:
+        for i in ref_ids:
+            for j in sys_ids:
+                result[i, j] = result.get((i, j), 0.0) + dur
+    return result
+
+
+class TestOverlapMatrix(unittest.TestCase):
+    def check_random_sweep(self, n_ref, n_sys):
+        rng = random.Random(n_ref * 1000 + n_sys)
+        matrix = OverlapMatrix([f"r{i}" for i in range(n_ref)], [f"s{j}" for j in range(n_sys)])
+        refs, syss = set(), set()
+        additions = []
+        for _ in range(500):
+            # Toggle one speaker per interval, as a boundary sweep does.
+            if rng.random() < 0.5:
+                refs ^= {rng.randrange(n_ref)}
+            else:
+                syss ^= {rng.randrange(n_sys)}
+            if rng.random() < 0.1:
+                refs |= set(rng.sample(range(n_ref), min(4, n_ref)))
+            dur = rng.uniform(0.01, 2.0)
+            matrix.add(list(refs), list(syss), dur)
+            additions.append((set(refs), set(syss), dur))
+        expected = {k: v for k, v in naive_overlap(additions).items() if v > 0}
+        got = {(i, j): v for i, j, v in matrix.items()}
+        self.assertEqual(set(got), set(expected))
+        for key, value in expected.items():
+            self.assertAlmostEqual(got[key], value, delta=1e-9)
+        i, j = next(iter(expected))
+        self.assertAlmostEqual(matrix.get(f"r{i}", f"s{j}"), expected[i, j], delta=1e-9)
+
+    def test_dense_storage(self):
+        self.check_random_sweep(6, 12)
+
+    def test_sparse_storage(self):
+        self.check_random_sweep(300, 300)
+
+    def test_reads_between_adds(self):
+        matrix = OverlapMatrix(['a', 'b', 'c'], ['x', 'y'])
+        matrix.add([0, 1, 2], [0, 1], 1.0)
+        self.assertEqual(matrix.get('a', 'x'), 1.0)
+        matrix.add([0, 1, 2], [0, 1], 2.0)
+        matrix.add([0], [1], 0.5)
+        self.assertEqual(matrix.to_dict(), {'a': {'x': 3.0, 'y': 3.5}, 'b': {'x': 3.0, 'y': 3.0},
+                                            'c': {'x': 3.0, 'y': 3.0}})
+        self.assertEqual(matrix.mapped_overlap({'a': 'y', 'b': 'x', 'z': 'x'}), 6.5)
+
+    def test_from_triplets(self):
+        matrix = OverlapMatrix.from_triplets(['a', 'b'], ['x'], [0, 1, 0], [0, 0, 0], [1.0, 2.0, 0.5])
+        self.assertEqual(matrix.to_dict(), {'a': {'x': 1.5}, 'b': {'x': 2.0}})
+
+
+if __name__ == '__main__':
+    unittest.main()
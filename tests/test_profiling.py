@@ -0,0 +1,54 @@
+import json
+import unittest
+from mdeval import profiling
+from mdeval.scoring import score_speaker_diarization, score_systems
+from mdeval.utils import Segment
+
+
+REF = {'spk1': [{'TBEG': 0.0, 'TEND': 6.0}], 'spk2': [{'TBEG': 4.0, 'TEND': 10.0}]}
+SYS = {'a': [{'TBEG': 0.0, 'TEND': 5.0}], 'b': [{'TBEG': 5.0, 'TEND': 9.0}]}
+UEM = [Segment(0.0, 10.0)]
+
+
+class TestProfiling(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        self.assertIsNone(profiling.active())
+        with profiling.stage('sweep') as st:
+            self.assertFalse(st)
+            st.count(segments=3)
+        with profiling.profile() as prof:
+            pass
+        self.assertEqual(prof.stages, {})
+
+    def test_stages_and_recordings(self):
+        with profiling.profile() as prof:
+            for file in ('f1', 'f2'):
+                score_speaker_diarization(file, '1', REF, SYS, UEM, backend='python')
+        self.assertIsNone(profiling.active())
+        self.assertEqual(set(prof.stages), {'events', 'sweep', 'map_speakers'})
+        self.assertEqual(prof.stages['sweep']['calls'], 2)
+        self.assertEqual(prof.stages['events']['events'], 2 * 10)
+        self.assertEqual(prof.stages['sweep']['segments'], 2 * 5)
+        self.assertEqual(prof.stages['map_speakers']['matrix_cells'], 4)
+        self.assertEqual(sorted(prof.recordings), ['f1', 'f2'])
+        self.assertEqual(prof.recordings['f1']['stages']['sweep']['calls'], 1)
+        report = json.loads(prof.to_json())
+        self.assertEqual(len(report['slowest_recordings']), 2)
+        self.assertIn(report['slowest_recordings'][0]['slowest_stage'], prof.stages)
+
+    def test_merge_worker_profile(self):
+        with profiling.profile() as prof:
+            result, data = profiling.call_profiled(
+                lambda sys_list: score_systems('f1', '1', REF, sys_list, UEM, backend='python'), [SYS, SYS])
+            self.assertIs(profiling.active(), prof)
+            prof.merge(data)
+            prof.merge(data)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(prof.stages['merge']['calls'], 4)
+        self.assertEqual(prof.stages['partition']['calls'], 2)
+        self.assertEqual(prof.stages['map_speakers']['matrix_cells'], 4)
+        self.assertEqual(prof.recordings['f1']['stages']['merge']['calls'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from helpers import run_cli
+from mdeval import cli
+from mdeval.report import ReportWriter
+
+STATS = {'SCORED_SPEAKER': 10.0, 'MISSED_SPEAKER': 1.0, 'FALARM_SPEAKER': 0.5, 'SPEAKER_ERROR': 0.5}
+KEYS = ('SCORED_SPEAKER', 'MISSED_SPEAKER', 'FALARM_SPEAKER', 'SPEAKER_ERROR')
+
+REF = """SPEAKER f1 1 0.0 6.0 <NA> <NA> spk1 <NA> <NA>
+SPEAKER f1 1 4.0 6.0 <NA> <NA> spk2 <NA> <NA>
+SPEAKER f2 1 0.0 5.0 <NA> <NA> spk1 <NA> <NA>
+"""
+SYS = """SPEAKER f1 1 0.0 5.0 <NA> <NA> a <NA> <NA>
+SPEAKER f1 1 5.0 4.0 <NA> <NA> b <NA> <NA>
+SPEAKER f2 1 1.0 5.0 <NA> <NA> a <NA> <NA>
+"""
+
+
+class TestReport(unittest.TestCase):
+    def test_json_records(self):
+        out = io.StringIO()
+        writer = ReportWriter('json', out, KEYS)
+        writer.record('f1', '1', 'sys.rttm', 0.25, STATS)
+        writer.summary('sys.rttm', 0.25, STATS, (1.0, 3.0, 0.95))
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(records[0]['file'], 'f1')
+        self.assertAlmostEqual(records[0]['DER'], 20.0)
+        self.assertEqual(records[1]['file'], 'ALL')
+        self.assertEqual(records[1]['DER_INTERVAL'], [1.0, 3.0, 0.95])
+
+    def test_delimited_records(self):
+        for fmt, delimiter in (('csv', ','), ('tsv', '\t')):
+            out = io.StringIO()
+            writer = ReportWriter(fmt, out, KEYS)
+            writer.record('f1', '1', 'sys.rttm', 0.0, STATS)
+            rows = list(csv.DictReader(io.StringIO(out.getvalue()), delimiter=delimiter))
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0]['chnl'], '1')
+            self.assertEqual(float(rows[0]['MISSED_SPEAKER']), 1.0)
+
+    def test_cli_per_file_records_sum_to_summary(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        paths = []
+        for name, text in (('ref.rttm', REF), ('sys.rttm', SYS)):
+            paths.append(os.path.join(tmp_dir, name))
+            with open(paths[-1], 'w') as f:
+                f.write(text)
+        out = run_cli('-r', paths[0], '-s', paths[1], '--per-file', '--format', 'json', '--no-cache')
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([r['file'] for r in records], ['f1', 'f2', 'ALL'])
+        for key in cli.STAT_KEYS:
+            self.assertAlmostEqual(records[0][key] + records[1][key], records[2][key], msg=key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from helpers import random_rttm, run_cli
+from mdeval.cli import iter_recordings, score_recordings
+from mdeval.result_cache import ResultCache, result_key
+from mdeval.utils import Segment
+
+
+def make_data(files, offset):
+    data = {}
+    for file in files:
+        segs = [{'TBEG': k * 1.5 + offset, 'TDUR': 1.0, 'TEND': k * 1.5 + offset + 1.0, 'SPKR': f"s{k % 3}"}
+                for k in range(10)]
+        data[file] = {'1': {'SPEAKER': segs, 'LEXEME': []}}
+    return data
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ref = {'a': [{'TBEG': 0.0, 'TEND': 2.0}], 'b': [{'TBEG': 2.0, 'TEND': 3.0}]}
+        self.sys = {'x': [{'TBEG': 0.5, 'TEND': 3.0}]}
+        self.uem = [Segment(0.0, 3.0)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_depends_on_inputs_and_options(self):
+        key = result_key(self.ref, self.sys, self.uem, 0.25, False, 'python')
+        self.assertEqual(key, result_key(self.ref, self.sys, self.uem, 0.25, False, 'python'))
+        other_sys = {'x': [{'TBEG': 0.5, 'TEND': 2.9}]}
+        self.assertNotEqual(key, result_key(self.ref, other_sys, self.uem, 0.25, False, 'python'))
+        self.assertNotEqual(key, result_key(self.ref, self.sys, [Segment(0.0, 2.0)], 0.25, False, 'python'))
+        self.assertNotEqual(key, result_key(self.ref, self.sys, self.uem, 0.0, False, 'python'))
+        self.assertNotEqual(key, result_key(self.ref, self.sys, self.uem, 0.25, True, 'python'))
+
+    def test_round_trip_and_persistence(self):
+        with ResultCache(self.tmp.name) as cache:
+            self.assertIsNone(cache.get('k'))
+            cache.put('k', {'SCORED_SPEAKER': 1.5, 'EVAL_WORDS': 0}, {'a': 'x'})
+        with ResultCache(self.tmp.name) as cache:
+            self.assertEqual(cache.get('k'), ({'SCORED_SPEAKER': 1.5, 'EVAL_WORDS': 0}, {'a': 'x'}))
+
+    def test_lru_eviction(self):
+        cache = ResultCache(self.tmp.name, max_bytes=200)
+        for i in range(5):
+            cache.put(f"k{i}", {'SCORED_SPEAKER': float(i)}, {'spk': 'x' * 40})
+        cache.get('k0')  # most recently used
+        cache.evict()
+        self.assertLessEqual(cache.total_bytes(), 200)
+        self.assertIsNotNone(cache.get('k0'))
+        self.assertIsNone(cache.get('k1'))
+        cache.close()
+
+    def test_cached_scoring_skips_unchanged_recordings(self):
+        files = [f"file{i}" for i in range(4)]
+        ref_data = make_data(files, 0.0)
+        sys_data = make_data(files, 0.3)
+        with ResultCache(self.tmp.name) as cache:
+            first = list(score_recordings(iter_recordings(ref_data, sys_data), 0.1, False, 'python', cache=cache))
+            self.assertEqual((cache.hits, cache.misses), (0, 4))
+        sys_data['file2'] = make_data(['file2'], 0.6)['file2']
+        with ResultCache(self.tmp.name) as cache:
+            second = list(score_recordings(iter_recordings(ref_data, sys_data), 0.1, False, 'python', jobs=2, cache=cache))
+            self.assertEqual((cache.hits, cache.misses), (3, 1))
+        expected = list(score_recordings(iter_recordings(ref_data, sys_data), 0.1, False, 'python'))
+        self.assertEqual(second, expected)
+        self.assertEqual([first[i] for i in (0, 1, 3)], [second[i] for i in (0, 1, 3)])
+
+    def test_read_only_cache_still_scores(self):
+        with ResultCache(self.tmp.name) as cache:
+            cache.put('k', {'SCORED_SPEAKER': 1.0}, {})
+        cache = ResultCache(self.tmp.name)
+        cache._db.close()
+        cache._db = sqlite3.connect(f"file:{os.path.join(self.tmp.name, 'results.sqlite')}?mode=ro", uri=True)
+        self.assertEqual(cache.get('k'), ({'SCORED_SPEAKER': 1.0}, {}))
+        cache.put('k2', {'SCORED_SPEAKER': 2.0}, {})
+        self.assertFalse(cache.writable)
+        self.assertIsNone(cache.get('k2'))
+        cache.close()
+
+    def test_cli_scores_without_unusable_cache_dir(self):
+        rng = random.Random(2)
+        paths = []
+        for name, prefix in (('ref.rttm', 'ref'), ('sys.rttm', 'sys')):
+            paths.append(os.path.join(self.tmp.name, name))
+            with open(paths[-1], 'w') as f:
+                f.write(random_rttm(rng, ['f1', 'f2'], 3, prefix))
+        # A path below a regular file cannot be created.
+        cache_dir = os.path.join(paths[0], 'cache')
+        expected = run_cli('-r', paths[0], '-s', paths[1], '--no-cache')
+        self.assertEqual(run_cli('-r', paths[0], '-s', paths[1], '--cache-dir', cache_dir), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
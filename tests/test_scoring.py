@@ -1,7 +1,51 @@
+import random
 import unittest
-from mdeval.scoring import apply_collars, exclude_overlapping_speech, score_speaker_diarization, map_speakers
+from unittest import mock
+from mdeval import scoring
+from mdeval.scoring import apply_collars, partition_reference, score_settings, exclude_overlapping_speech, score_speaker_diarization, map_speakers, create_speaker_segs
 from mdeval.utils import Segment
 
+
+def random_speaker_data(rng, n_spkrs, n_segs, duration, prefix):
+    data = {}
+    for _ in range(n_segs):
+        spkr = f"{prefix}{rng.randrange(n_spkrs)}"
+        tbeg = round(rng.uniform(0, duration), 2)
+        tdur = round(rng.uniform(0, 5), 2)
+        data.setdefault(spkr, []).append({'TBEG': tbeg, 'TDUR': tdur, 'TEND': tbeg + tdur})
+    return data
+
+
+def legacy_score(ref_data, sys_data, uem_eval, collar, ignore_overlap):
+    """The separate overlap/collar/segmentation passes the fused sweep replaces."""
+    uem_score = uem_eval
+    if ignore_overlap:
+        uem_score = exclude_overlapping_speech(uem_score, ref_data)
+    if collar > 0:
+        uem_score = apply_collars(uem_score, ref_data, collar)
+    eval_segs = create_speaker_segs(uem_score, ref_data, sys_data)
+    overlap = {}
+    for seg in eval_segs:
+        for r in seg['REF']:
+            overlap.setdefault(r, {})
+            for s in seg['SYS']:
+                overlap[r][s] = overlap[r].get(s, 0.0) + seg['TDUR']
+    mapping = map_speakers(overlap)
+    stats = {'SCORED_TIME': sum(u.tdur for u in uem_score), 'SCORED_SPEAKER': 0.0,
+             'MISSED_SPEAKER': 0.0, 'FALARM_SPEAKER': 0.0, 'SPEAKER_ERROR': 0.0, 'EVAL_SPEECH': 0.0}
+    for seg in eval_segs:
+        n_ref, n_sys, dur = len(seg['REF']), len(seg['SYS']), seg['TDUR']
+        n_map = sum(1 for r in seg['REF'] if mapping.get(r) in seg['SYS'])
+        stats['SCORED_SPEAKER'] += dur * n_ref
+        stats['MISSED_SPEAKER'] += dur * max(n_ref - n_sys, 0)
+        stats['FALARM_SPEAKER'] += dur * max(n_sys - n_ref, 0)
+        stats['SPEAKER_ERROR'] += dur * (min(n_ref, n_sys) - n_map)
+    for seg in create_speaker_segs(uem_eval, ref_data, sys_data):
+        if seg['REF']:
+            stats['EVAL_SPEECH'] += seg['TDUR']
+    return stats, mapping
+
+
 class TestScoring(unittest.TestCase):
     def test_apply_collars_simple(self):
         uem = [Segment(0.0, 10.0)]
@@ -18,6 +62,9 @@ class TestScoring(unittest.TestCase):
         self.assertEqual(len(res), 2)
         self.assertAlmostEqual(res[0].tend, 4.5)
         self.assertAlmostEqual(res[1].tbeg, 6.5)
+        self.assertIsInstance(res, list)
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(apply_collars(uem, ref_data, 0.5, 1.0), res)
         
     def test_exclude_overlap(self):
         uem = [Segment(0.0, 10.0)]
@@ -32,6 +79,7 @@ class TestScoring(unittest.TestCase):
         self.assertEqual(len(res), 2)
         self.assertAlmostEqual(res[0].tend, 4.0)
         self.assertAlmostEqual(res[1].tbeg, 6.0)
+        self.assertIsInstance(res, list)
         
     def test_map_speakers(self):
         # spk1(ref) overlaps spkA(sys) by 10
@@ -44,5 +92,146 @@ class TestScoring(unittest.TestCase):
         self.assertEqual(mapping['spk1'], 'spkA')
         self.assertEqual(mapping['spk2'], 'spkB')
 
+    def test_map_speakers_matches_dense_solver(self):
+        rng = random.Random(5)
+        for trial in range(200):
+            n_ref = rng.randint(1, 60 if trial % 10 == 0 else 8)
+            n_sys = rng.randint(1, 60 if trial % 10 == 0 else 8)
+            density = rng.choice([0.05, 0.2, 0.6])
+            overlap = {f"r{i}": {f"s{j}": float(rng.randint(1, 20))
+                                 for j in range(n_sys) if rng.random() < density}
+                       for i in range(n_ref)}
+            mapping = map_speakers(overlap)
+            self.assertEqual(len(set(mapping.values())), len(mapping))
+            self.assertTrue(all(overlap[r][s] > 0 for r, s in mapping.items()))
+            refs = sorted(overlap)
+            syss = sorted({s for row in overlap.values() for s in row})
+            dense = scoring._map_dense(refs, syss, overlap) if syss else {}
+            self.assertEqual(sum(overlap[r][s] for r, s in mapping.items()),
+                             sum(overlap[r][s] for r, s in dense.items()))
+
+    def test_score_simple(self):
+        uem = [Segment(0.0, 10.0)]
+        ref_data = {'spk1': [{'TBEG': 0.0, 'TEND': 6.0, 'TDUR': 6.0}],
+                    'spk2': [{'TBEG': 6.0, 'TEND': 10.0, 'TDUR': 4.0}]}
+        sys_data = {'a': [{'TBEG': 0.0, 'TEND': 5.0, 'TDUR': 5.0}],
+                    'b': [{'TBEG': 5.0, 'TEND': 9.0, 'TDUR': 4.0}]}
+        for backend in ('python', scoring.resolve_backend()):
+            stats, mapping = score_speaker_diarization('f', '1', ref_data, sys_data, uem, backend=backend)
+            self.assertEqual(mapping, {'spk1': 'a', 'spk2': 'b'})
+            self.assertAlmostEqual(stats['SCORED_SPEAKER'], 10.0)
+            self.assertAlmostEqual(stats['MISSED_SPEAKER'], 1.0)
+            self.assertAlmostEqual(stats['FALARM_SPEAKER'], 0.0)
+            self.assertAlmostEqual(stats['SPEAKER_ERROR'], 1.0)
+
+    @unittest.skipIf(scoring.numpy_scoring is None, 'numpy not installed')
+    def test_numpy_backend_matches_python(self):
+        rng = random.Random(7)
+        for trial in range(30):
+            ref_data = random_speaker_data(rng, 4, 40, 100.0, 'ref')
+            sys_data = random_speaker_data(rng, 6, 60, 100.0, 'sys')
+            uem = [Segment(0.0, 50.0), Segment(60.0, 110.0)]
+            collar = rng.choice([0.0, 0.25])
+            ignore_overlap = bool(trial % 2)
+            py_stats, py_map = score_speaker_diarization(
+                'f', '1', ref_data, sys_data, uem, collar, ignore_overlap, backend='python')
+            np_stats, np_map = score_speaker_diarization(
+                'f', '1', ref_data, sys_data, uem, collar, ignore_overlap, backend='numpy')
+            self.assertEqual(py_map, np_map)
+            for key, value in py_stats.items():
+                self.assertAlmostEqual(value, np_stats[key], delta=1e-9, msg=key)
+
+    @unittest.skipIf(scoring.numpy_scoring is None, 'numpy not installed')
+    def test_large_recordings_fall_back_to_python_sweep(self):
+        rng = random.Random(5)
+        ref_data = random_speaker_data(rng, 3, 30, 100.0, 'ref')
+        sys_data = random_speaker_data(rng, 40, 200, 100.0, 'sys')
+        uem = [Segment(0.0, 100.0)]
+        numpy_scoring = scoring.numpy_scoring
+        cells = numpy_scoring.dense_cells(ref_data, sys_data, len(uem), 1)
+        self.assertGreaterEqual(cells, 43 * 2 * (30 * 3 + 200))
+        expected = score_speaker_diarization('f', '1', ref_data, sys_data, uem, 0.25, backend='python')
+        with mock.patch.object(numpy_scoring, 'MAX_DENSE_CELLS', cells - 1), \
+                mock.patch.object(numpy_scoring, 'score', side_effect=AssertionError) as dense, \
+                mock.patch.object(numpy_scoring, 'score_partition', side_effect=AssertionError):
+            self.assertEqual(score_speaker_diarization('f', '1', ref_data, sys_data, uem, 0.25, backend='auto'),
+                             expected)
+            self.assertEqual(partition_reference(ref_data, uem, 0.25, backend='auto').score(sys_data), expected)
+            self.assertEqual(score_settings('f', '1', ref_data, sys_data, uem, [(0.25, False)], 'auto'),
+                             score_settings('f', '1', ref_data, sys_data, uem, [(0.25, False)], 'python'))
+        self.assertEqual(dense.call_count, 0)
+        # Within the bound, NumPy is used.
+        with mock.patch.object(numpy_scoring, 'MAX_DENSE_CELLS', cells), \
+                mock.patch.object(numpy_scoring, 'score', wraps=numpy_scoring.score) as dense:
+            score_speaker_diarization('f', '1', ref_data, sys_data, uem, 0.25, backend='auto')
+        self.assertEqual(dense.call_count, 1)
+
+    @unittest.skipIf(scoring.numpy_scoring is None, 'numpy not installed')
+    def test_numpy_backend_deep_coverage(self):
+        # More segments over one interval than an int16 count can hold.
+        ref_data = {'spk1': [{'TBEG': 0.0, 'TEND': 2.0}] * 33000}
+        sys_data = {'a': [{'TBEG': 1.0, 'TEND': 2.0}]}
+        uem = [Segment(0.0, 2.0)]
+        py_stats, _ = score_speaker_diarization('f', '1', ref_data, sys_data, uem, backend='python')
+        np_stats, _ = score_speaker_diarization('f', '1', ref_data, sys_data, uem, backend='numpy')
+        for key, value in py_stats.items():
+            self.assertAlmostEqual(value, np_stats[key], delta=1e-6, msg=key)
+
+    def test_fused_sweep_matches_separate_passes(self):
+        rng = random.Random(11)
+        for trial in range(30):
+            ref_data = random_speaker_data(rng, 4, 40, 100.0, 'ref')
+            sys_data = random_speaker_data(rng, 5, 50, 100.0, 'sys')
+            uem = [Segment(0.0, 45.0), Segment(55.0, 105.0)]
+            collar = rng.choice([0.0, 0.25, 0.5])
+            ignore_overlap = bool(trial % 2)
+            expected, expected_map = legacy_score(ref_data, sys_data, uem, collar, ignore_overlap)
+            stats, mapping = score_speaker_diarization(
+                'f', '1', ref_data, sys_data, uem, collar, ignore_overlap, backend='python')
+            self.assertEqual(mapping, expected_map)
+            for key, value in expected.items():
+                self.assertAlmostEqual(stats[key], value, delta=1e-9, msg=key)
+
+    def test_score_systems_matches_single_scoring(self):
+        rng = random.Random(13)
+        backends = ['python'] + (['numpy'] if scoring.numpy_scoring is not None else [])
+        for trial in range(20):
+            ref_data = random_speaker_data(rng, 4, 40, 100.0, 'ref')
+            sys_list = [random_speaker_data(rng, 5, 50, 120.0, 'sys') for _ in range(3)] + [{}]
+            uem = [Segment(0.0, 45.0), Segment(55.0, 105.0)]
+            collar = rng.choice([0.0, 0.25])
+            ignore_overlap = bool(trial % 2)
+            for backend in backends:
+                results = scoring.score_systems(
+                    'f', '1', ref_data, sys_list, uem, collar, ignore_overlap, backend=backend)
+                self.assertEqual(len(results), len(sys_list))
+                for sys_data, (stats, mapping) in zip(sys_list, results):
+                    expected, expected_map = score_speaker_diarization(
+                        'f', '1', ref_data, sys_data, uem, collar, ignore_overlap, backend=backend)
+                    self.assertEqual(mapping, expected_map)
+                    for key, value in expected.items():
+                        self.assertAlmostEqual(stats[key], value, delta=1e-9, msg=key)
+
+    def test_score_settings_matches_single_scoring(self):
+        rng = random.Random(17)
+        backends = ['python'] + (['numpy'] if scoring.numpy_scoring is not None else [])
+        settings = [(collar, ignore_overlap) for collar in (0.0, 0.1, 0.25, 0.5) for ignore_overlap in (False, True)]
+        for trial in range(15):
+            ref_data = random_speaker_data(rng, 4, 40, 100.0, 'ref')
+            sys_data = random_speaker_data(rng, 5, 50, 100.0, 'sys')
+            uem = [Segment(0.0, 45.0), Segment(55.0, 105.0)]
+            for backend in backends:
+                results = scoring.score_settings('f', '1', ref_data, sys_data, uem, settings, backend=backend)
+                for (collar, ignore_overlap), (stats, mapping) in zip(settings, results):
+                    expected, expected_map = score_speaker_diarization(
+                        'f', '1', ref_data, sys_data, uem, collar, ignore_overlap, backend=backend)
+                    self.assertEqual(mapping, expected_map)
+                    for key, value in expected.items():
+                        self.assertAlmostEqual(stats[key], value, delta=1e-9, msg=key)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            scoring.resolve_backend('fortran')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from mdeval import scoring
+from mdeval.segments import SegmentTable, iter_segments
+from mdeval.scoring import score_speaker_diarization
+from mdeval.utils import Segment
+
+
+class TestSegments(unittest.TestCase):
+    def setUp(self):
+        self.ref_data = {
+            'spk1': [{'TBEG': 0.0, 'TDUR': 6.0, 'TEND': 6.0}],
+            'spk2': [{'TBEG': 4.0, 'TDUR': 6.0, 'TEND': 10.0},
+                     {'TBEG': 12.0, 'TDUR': 0.0, 'TEND': 12.0}],
+        }
+        self.sys_data = {
+            'a': [{'TBEG': 0.5, 'TDUR': 5.0, 'TEND': 5.5}],
+            'b': [{'TBEG': 5.5, 'TDUR': 6.0, 'TEND': 11.5}],
+        }
+
+    def test_append_and_interning(self):
+        table = SegmentTable()
+        table.append('spk1', 0.0, 1.0)
+        table.append('spk2', 1.0, 2.0)
+        table.append('spk1', 3.0, 0.5)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.speakers, ['spk1', 'spk2'])
+        self.assertEqual(list(table.spkr), [0, 1, 0])
+        self.assertEqual(list(table.rows())[2], ('spk1', 3.0, 3.5))
+
+    def test_roundtrip(self):
+        table = SegmentTable.from_speaker_dict(self.ref_data)
+        self.assertEqual(sorted(iter_segments(table)), sorted(iter_segments(self.ref_data)))
+        self.assertEqual(table.to_speaker_dict(), self.ref_data)
+
+    def test_scoring_accepts_tables(self):
+        uem = [Segment(0.0, 12.0)]
+        ref_table = SegmentTable.from_speaker_dict(self.ref_data)
+        sys_table = SegmentTable.from_speaker_dict(self.sys_data)
+        for backend in ('python', scoring.resolve_backend()):
+            for collar, ignore_overlap in ((0.0, False), (0.25, True)):
+                expected = score_speaker_diarization(
+                    'f', '1', self.ref_data, self.sys_data, uem, collar, ignore_overlap, backend)
+                actual = score_speaker_diarization(
+                    'f', '1', ref_table, sys_table, uem, collar, ignore_overlap, backend)
+                self.assertEqual(expected, actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
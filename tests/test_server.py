@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from helpers import random_rttm
+from mdeval.cli import add_stats, iter_recordings, new_total_stats, score_recordings
+from mdeval.io import load_rttm, load_uem
+from mdeval import server as mdeval_server
+from mdeval.server import MAX_SETTINGS_PER_RECORDING, ReferenceSet, ScoringClient, ScoringServer
+
+
+@unittest.skipIf(not hasattr(socket, 'AF_UNIX'), 'Unix sockets not available')
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        rng = random.Random(3)
+        self.ref_path = os.path.join(self.tmp_dir, 'ref.rttm')
+        self.uem_path = os.path.join(self.tmp_dir, 'all.uem')
+        with open(self.ref_path, 'w') as f:
+            f.write(random_rttm(rng, ['f1', 'f2', 'f3'], 3, 'ref', 30))
+            for _ in range(150):
+                f.write(f"LEXEME {rng.choice(['f1', 'f2', 'f3'])} 1 {round(rng.uniform(0, 100), 2)} 0.3 w lex "
+                        f"ref{rng.randrange(3)} <NA> <NA>\n")
+        with open(self.uem_path, 'w') as f:
+            f.write("f1 1 0 60\nf1 1 70 100\n")
+        self.hyps = [random_rttm(rng, ['f1', 'f2'], 4, 'sys', 30),
+                     random_rttm(rng, ['f1', 'f2', 'f3'], 2, 'sys', 30)]
+
+    def start_server(self, workers):
+        socket_path = os.path.join(self.tmp_dir, f"server{workers}.sock")
+        server = ScoringServer(self.ref_path, self.uem_path, 'python', workers)
+        ready = threading.Event()
+        thread = threading.Thread(target=lambda: asyncio.run(server.serve(socket_path, ready=lambda _: ready.set())),
+                                  daemon=True)
+        thread.start()
+        self.assertTrue(ready.wait(30))
+        return socket_path
+
+    def expected(self, hyp, collar):
+        sys_path = os.path.join(self.tmp_dir, 'hyp.rttm')
+        with open(sys_path, 'w') as f:
+            f.write(hyp)
+        totals = new_total_stats()
+        recordings = iter_recordings(load_rttm(self.ref_path, columnar=True), load_rttm(sys_path, columnar=True),
+                                     load_uem(self.uem_path))
+        for stats in score_recordings(recordings, collar, False, 'python'):
+            add_stats(totals, stats)
+        return totals
+
+    def check(self, response, expected):
+        self.assertTrue(response['ok'], response)
+        for key, value in expected.items():
+            self.assertAlmostEqual(response['stats'][key], value, delta=1e-9, msg=key)
+
+    def test_matches_cli_scoring(self):
+        socket_path = self.start_server(0)
+        with ScoringClient(socket_path) as client:
+            for hyp in self.hyps:
+                for collar in (0.0, 0.25):
+                    expected = self.expected(hyp, collar)
+                    self.assertGreater(expected['SCORED_WORDS'], 0)
+                    self.check(client.score(hyp, collar=collar), expected)
+            response = client.score(self.hyps[0], per_file=True)
+            self.assertEqual(sorted(response['files']), ['f1', 'f2'])
+            self.assertEqual(response['recordings'], 2)
+            response = client.score(sys_path=os.path.join(self.tmp_dir, 'missing.rttm'))
+            self.assertFalse(response['ok'])
+
+    def test_bad_requests_do_not_stop_server(self):
+        socket_path = self.start_server(0)
+        bad = [{'id': 1, 'sys': self.hyps[0], 'collar': 'abc'}, {'id': 2, 'sys': self.hyps[0], 'collar': None},
+               {'id': 3, 'sys': self.hyps[0], 'single_speaker': 'yes'}, {'id': 4, 'sys': 123},
+               {'id': 5, 'sys_path': ['a']}]
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(30)
+            sock.connect(socket_path)
+            with sock.makefile('rwb') as f:
+                for request in bad:
+                    f.write(json.dumps(request).encode() + b'\n')
+                    f.flush()
+                    response = json.loads(f.readline())
+                    self.assertEqual(response['id'], request['id'])
+                    self.assertFalse(response['ok'])
+        with ScoringClient(socket_path) as client:
+            self.check(client.score(self.hyps[0]), self.expected(self.hyps[0], 0.0))
+        # A malformed hypothesis in a batch only fails its own request.
+        responses = mdeval_server._score_batch([{'sys': 123}, {'sys': self.hyps[0]}], 0.0, False)
+        self.assertEqual([r['ok'] for r in responses], [False, True])
+
+    def test_partitions_bounded_per_recording(self):
+        references = ReferenceSet(self.ref_path, self.uem_path, 'python')
+        first = references.partition('f1', '1', 0.25, False)
+        for k in range(20):
+            references.partition('f1', '1', k / 10, False)
+            references.partition('f1', '1', 0.25, False)
+        settings = references._partitions[('f1', '1')]
+        self.assertEqual(len(settings), MAX_SETTINGS_PER_RECORDING)
+        # The setting in use throughout is never evicted.
+        self.assertIs(references.partition('f1', '1', 0.25, False), first)
+
+    def test_concurrent_requests_in_worker_process(self):
+        socket_path = self.start_server(1)
+        expected = [self.expected(hyp, 0.25) for hyp in self.hyps]
+        results = {}
+
+        def request(k):
+            with ScoringClient(socket_path) as client:
+                results[k] = client.score(self.hyps[k % 2], collar=0.25)
+
+        threads = [threading.Thread(target=request, args=(k,)) for k in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for k in range(6):
+            self.check(results[k], expected[k % 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
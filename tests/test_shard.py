@@ -0,0 +1,92 @@
+import gc
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import warnings
+from helpers import random_rttm, run_cli
+from mdeval.shard import PartialWriter, ShardView, merge_partials, parse_shard, read_partial, shard_of
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        rng = random.Random(5)
+        files = [f"rec{i}" for i in range(12)]
+        self.ref_path = self.path('ref.rttm')
+        self.sys_paths = [self.path('sysA.rttm'), self.path('sysB.rttm')]
+        with open(self.ref_path, 'w') as f:
+            f.write(random_rttm(rng, files, 3, 'ref'))
+        for path in self.sys_paths:
+            with open(path, 'w') as f:
+                f.write(random_rttm(rng, files[1:], 3, 'sys'))
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/4'), (2, 4))
+        for value in ('0/4', '5/4', '1', 'a/b', '1/0'):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+    def test_shards_partition_recordings(self):
+        data = {f"rec{i}": i for i in range(50)}
+        views = [ShardView(data, i, 3) for i in (1, 2, 3)]
+        self.assertEqual(sorted(f for view in views for f in view), sorted(data))
+        self.assertEqual(sum(len(view) for view in views), len(data))
+        self.assertEqual(shard_of('rec7', 3), shard_of('rec7', 3))
+        other = next(view for view in views if 'rec7' not in view)
+        with self.assertRaises(KeyError):
+            other['rec7']
+
+    def test_merge_matches_single_run(self):
+        for sys_paths, collars in (([self.sys_paths[0]], '0.25'), (self.sys_paths, '0,0.25')):
+            options = ['-r', self.ref_path, '-s'] + sys_paths + ['-c', collars, '--no-cache', '--per-file']
+            expected = run_cli(*options, '--bootstrap', '50', '--seed', '1')
+            partials = []
+            for i in (1, 2, 3):
+                partials.append(self.path(f"part{i}"))
+                run_cli(*options, '--shard', f"{i}/3", '--partial', partials[-1])
+            merged = run_cli('merge', *reversed(partials), '--per-file', '--bootstrap', '50', '--seed', '1')
+            self.assertEqual(merged, expected)
+
+    def test_merge_rejects_repeated_shards(self):
+        part = self.path('part1')
+        run_cli('-r', self.ref_path, '-s', self.sys_paths[0], '--no-cache', '--shard', '1/2', '--partial', part)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            with self.assertRaises(ValueError):
+                merge_partials([part, part])
+            gc.collect()
+        self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+        header, _ = merge_partials([part])
+        self.assertEqual(header['missing'], [2])
+
+    def test_truncated_partial(self):
+        part = self.path('part')
+        with PartialWriter(part, ['sys'], [0.0], False, ['SCORED_SPEAKER']) as writer:
+            writer.add('f1', '1', [[({'SCORED_SPEAKER': 2.5}, {'a': 'b'})]])
+            writer.add('f2', '1', [[({'SCORED_SPEAKER': 1.0}, {})]])
+        header, rows = read_partial(part)
+        self.assertEqual(list(rows)[0], ('f1', '1', [[({'SCORED_SPEAKER': 2.5}, {'a': 'b'})]]))
+        with open(part) as f:
+            lines = f.readlines()
+        with open(part, 'w') as f:
+            f.writelines(lines[:-1])
+        _, rows = read_partial(part)
+        with self.assertRaises(ValueError):
+            list(rows)
+
+    def test_failed_run_leaves_no_partial(self):
+        part = self.path('part')
+        with self.assertRaises(RuntimeError):
+            with PartialWriter(part, ['sys'], [0.0], False, ['SCORED_SPEAKER']):
+                raise RuntimeError
+        self.assertFalse(any(name.startswith('part') for name in os.listdir(self.tmp_dir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -28,6 +28,8 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(merged[0].tend, 4.0)
         self.assertEqual(merged[1].tbeg, 5.0)
         self.assertEqual(merged[1].tend, 6.0)
+        # The input segments are left unchanged.
+        self.assertEqual(segs[0], Segment(1.0, 3.0))
         
     def test_merge_segments_empty(self):
         self.assertEqual(merge_segments([]), [])
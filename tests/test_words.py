@@ -0,0 +1,147 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from helpers import random_rttm, run_cli
+from mdeval import scoring
+from mdeval.io import load_rttm, load_rttm_fast, RttmIndex
+from mdeval.scoring import score_settings, score_speaker_diarization, score_systems
+from mdeval.utils import Segment
+from mdeval.words import WORD_KEYS, SpeakerTimeline, iter_words, words_table
+
+
+def seg(tbeg, tend):
+    return {'TBEG': tbeg, 'TDUR': tend - tbeg, 'TEND': tend}
+
+
+def word(spkr, tbeg, tdur):
+    return {'TYPE': 'LEXEME', 'TBEG': tbeg, 'TDUR': tdur, 'TEND': tbeg + tdur, 'SPKR': spkr, 'SUBT': 'lex'}
+
+
+def linear_word_stats(words, uem, scored, sys_data, spkr_map):
+    """Word stats by scanning every segment for every word."""
+    stats = {'EVAL_WORDS': 0, 'SCORED_WORDS': 0, 'MISSED_WORDS': 0, 'ERROR_WORDS': 0}
+    for spkr, tmid in iter_words(words):
+        if not any(s.tbeg <= tmid < s.tend for s in uem):
+            continue
+        stats['EVAL_WORDS'] += 1
+        if not any(s.tbeg <= tmid < s.tend for s in scored):
+            continue
+        stats['SCORED_WORDS'] += 1
+        active = {s for s, segs in sys_data.items() if any(x['TBEG'] <= tmid < x['TEND'] for x in segs)}
+        if not active:
+            stats['MISSED_WORDS'] += 1
+        elif spkr_map.get(spkr) not in active:
+            stats['ERROR_WORDS'] += 1
+    return stats
+
+
+class TestWords(unittest.TestCase):
+    def setUp(self):
+        self.backends = ['python'] + (['numpy'] if scoring.numpy_scoring is not None else [])
+        self.ref = {'A': [seg(0.0, 10.0)], 'B': [seg(10.0, 20.0)]}
+        self.hyp = {'x': [seg(0.0, 12.0)], 'y': [seg(14.0, 18.0)]}
+        self.uem = [Segment(0.0, 19.0)]
+        self.words = [
+            word('A', 1.0, 0.4),   # correct
+            word('A', 9.8, 0.4),   # midpoint 10.0 falls in the collar around 10.0
+            word('B', 11.0, 0.2),  # x talks, but B maps to y: error
+            word('B', 12.5, 1.0),  # nobody talks: missed
+            word('B', 15.0, 0.5),  # correct
+            word('B', 19.5, 0.2),  # outside the UEM
+        ]
+
+    def test_word_stats(self):
+        for backend in self.backends:
+            for collar, scored in ((0.0, 5), (0.25, 4)):
+                stats, spkr_map = score_speaker_diarization('f', '1', self.ref, self.hyp, self.uem, collar,
+                                                            backend=backend, words=self.words)
+                self.assertEqual(spkr_map, {'A': 'x', 'B': 'y'})
+                self.assertEqual((stats['EVAL_WORDS'], stats['SCORED_WORDS'], stats['MISSED_WORDS'],
+                                  stats['ERROR_WORDS']), (5, scored, 1, 1), (backend, collar))
+
+    def test_speaker_timeline(self):
+        timeline = SpeakerTimeline({'x': [seg(0.0, 2.0), seg(3.0, 4.0)], 'y': [seg(1.0, 3.0)]})
+        self.assertEqual(timeline.names, ['x', 'y'])
+        for time, active in ((-1.0, ()), (0.5, (0,)), (1.0, (0, 1)), (2.0, (1,)), (3.0, (0,)), (4.0, ())):
+            self.assertEqual(sorted(timeline.at(time)), list(active), time)
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(11)
+        for trial in range(30):
+            ref = {}
+            hyp = {}
+            for data, prefix in ((ref, 'r'), (hyp, 's')):
+                for _ in range(rng.randint(1, 25)):
+                    tbeg = round(rng.uniform(0, 60), 1)
+                    data.setdefault(f"{prefix}{rng.randrange(4)}", []).append(seg(tbeg, tbeg + round(rng.uniform(0.1, 6), 1)))
+            words = [word(rng.choice(sorted(ref)), round(rng.uniform(0, 65), 1), round(rng.uniform(0, 1), 1))
+                     for _ in range(100)]
+            uem = [Segment(0.0, 30.0), Segment(35.0, 62.0)]
+            collar = rng.choice([0.0, 0.25])
+            ignore_overlap = trial % 2 == 1
+            stats, spkr_map = score_speaker_diarization('f', '1', ref, hyp, uem, collar, ignore_overlap,
+                                                        backend='python', words=words)
+            scored = scoring.scored_region(uem, ref, collar, ignore_overlap)
+            expected = linear_word_stats(words, uem, scored, hyp, spkr_map)
+            for key, value in expected.items():
+                self.assertEqual(stats[key], value, (trial, key))
+
+            # Columnar words (searched in bulk with NumPy) give the same counts.
+            table_stats, _ = score_speaker_diarization('f', '1', ref, hyp, uem, collar, ignore_overlap,
+                                                       backend='python', words=words_table(words))
+            self.assertEqual({k: table_stats[k] for k in expected}, expected)
+
+            # The multi-system and multi-setting paths count the same words.
+            (multi, _), = score_systems('f', '1', ref, [hyp], uem, collar, ignore_overlap, 'python', words)
+            (setting, _), = score_settings('f', '1', ref, hyp, uem, [(collar, ignore_overlap)], 'python', words)
+            for key in expected:
+                self.assertEqual(multi[key], stats[key])
+                self.assertEqual(setting[key], stats[key])
+
+    def test_loaders_keep_words(self):
+        content = ("SPEAKER f 1 0.0 5.0 <NA> <NA> A <NA> <NA>\n"
+                   "LEXEME f 1 0.5 0.2 hello lex A <NA> <NA>\n"
+                   "LEXEME f 1 1.0 <NA> um fp A <NA> <NA>\n")
+        with tempfile.NamedTemporaryFile(mode='w', delete=False) as tmp:
+            tmp.write(content)
+        self.addCleanup(os.remove, tmp.name)
+        expected = [('A', 0.6), ('A', 1.0)]
+        table = load_rttm_fast(tmp.name, words=True)['f']['1']['LEXEME']
+        self.assertEqual([(s, round(t, 6)) for s, t in iter_words(table)], expected)
+        indexed = RttmIndex(tmp.name, ('SPEAKER', 'LEXEME'), columnar=True)['f']['1']['LEXEME']
+        self.assertEqual(list(indexed.rows()), list(table.rows()))
+        rows = load_rttm(tmp.name)['f']['1']['LEXEME']
+        self.assertEqual(list(words_table(rows).rows()), list(table.rows()))
+        self.assertEqual(load_rttm_fast(tmp.name)['f']['1']['LEXEME'], [])
+
+    def test_ref_cache_keeps_words(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        rng = random.Random(7)
+        ref_path = os.path.join(tmp_dir, 'ref.rttm')
+        sys_path = os.path.join(tmp_dir, 'sys.rttm')
+        files = ['f1', 'f2', 'f3']
+        with open(ref_path, 'w') as f:
+            f.write(random_rttm(rng, files, 3, 'ref'))
+            for _ in range(200):
+                f.write(f"LEXEME {rng.choice(files)} 1 {round(rng.uniform(0, 100), 2)} 0.3 w lex "
+                        f"ref{rng.randrange(3)} <NA> <NA>\n")
+        with open(sys_path, 'w') as f:
+            f.write(random_rttm(rng, files, 3, 'sys'))
+
+        def summary(*options):
+            out = run_cli('-r', ref_path, '-s', sys_path, '--format', 'json', '--no-cache', *options)
+            return json.loads(out.splitlines()[-1])
+        expected = summary()
+        self.assertGreater(expected['SCORED_WORDS'], 0)
+        # The first run writes the cache, the second reads it.
+        for _ in range(2):
+            cached = summary('--ref-cache')
+            self.assertEqual({k: cached[k] for k in WORD_KEYS}, {k: expected[k] for k in WORD_KEYS})
+
+
+if __name__ == '__main__':
+    unittest.main()